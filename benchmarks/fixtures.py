@@ -0,0 +1,168 @@
+#! /usr/bin/env python3
+
+"""
+Deterministic wallets, descriptors and PSBTs for the benchmarks.
+
+Everything is derived from fixed seeds so results are comparable between runs and
+machines. Building a large PSBT is slow without libsec, so generated fixtures are
+cached under benchmarks/.cache/ (delete the folder to rebuild them).
+"""
+
+import os
+
+from buidl.hd import HDPrivateKey
+from buidl.helper import sha256
+from buidl.op import OP_CODE_NAMES_LOOKUP
+from buidl.psbt import PSBT, NamedHDPublicKey
+from buidl.script import P2WPKHScriptPubKey, P2WSHScriptPubKey, WitnessScript
+from buidl.tx import Tx, TxIn, TxOut
+
+# Bump when a fixture changes so stale cache files are ignored
+FIXTURES_VERSION = 1
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# Cosigner #0 signs the PSBTs, so it needs a seed phrase
+SIGNER_SEED_PHRASE = " ".join(["abandon"] * 23 + ["art"])
+ACCOUNT_PATH = "m/48'/1'/0'/2'"  # testnet p2wsh
+
+SATS_PER_INPUT = 100_000
+CHANGE_SATS = 50_000
+
+
+def _cached(filename, build):
+    path = os.path.join(CACHE_DIR, f"v{FIXTURES_VERSION}-{filename}")
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return f.read()
+    to_return = build()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        f.write(to_return)
+    os.replace(path + ".tmp", path)
+    return to_return
+
+
+def _get_cosigner_hd_priv(cosigner):
+    if cosigner == 0:
+        return HDPrivateKey.from_mnemonic(SIGNER_SEED_PHRASE, testnet=True)
+    return HDPrivateKey.from_seed(bytes([cosigner]) * 32, testnet=True)
+
+
+def _get_named_account_pubs(quorum_n):
+    return [
+        NamedHDPublicKey.from_hd_priv(_get_cosigner_hd_priv(x), ACCOUNT_PATH)
+        for x in range(quorum_n)
+    ]
+
+
+def get_descriptor(quorum_m, quorum_n):
+    """
+    Testnet wsh(sortedmulti()) receive descriptor with quorum_n cosigners.
+    """
+
+    def build():
+        key_records = []
+        for named_pub in _get_named_account_pubs(quorum_n):
+            key_records.append(
+                "[{}{}]{}/0/*".format(
+                    named_pub.root_fingerprint.hex(),
+                    ACCOUNT_PATH.replace("m", "").replace("'", "h"),
+                    named_pub.xpub(),
+                )
+            )
+        return "wsh(sortedmulti({},{}))".format(quorum_m, ",".join(key_records))
+
+    return _cached(f"descriptor-{quorum_m}-of-{quorum_n}.txt", build)
+
+
+def _get_witness_script(quorum_m, leaf_pubs):
+    commands = [OP_CODE_NAMES_LOOKUP["OP_{}".format(quorum_m)]]
+    commands.extend(sorted(x.sec() for x in leaf_pubs))  # BIP67
+    commands.append(OP_CODE_NAMES_LOOKUP["OP_{}".format(len(leaf_pubs))])
+    commands.append(OP_CODE_NAMES_LOOKUP["OP_CHECKMULTISIG"])
+    return WitnessScript(commands)
+
+
+def _build_psbt_b64(num_inputs, quorum_m, quorum_n, num_addresses):
+    account_pubs = _get_named_account_pubs(quorum_n)
+    branch_pubs = [[x.child(0), x.child(1)] for x in account_pubs]
+
+    pubkey_lookup, witness_lookup = {}, {}
+
+    def add_address(branch, index):
+        leaf_pubs = [x[branch].child(index) for x in branch_pubs]
+        for leaf_pub in leaf_pubs:
+            pubkey_lookup[leaf_pub.sec()] = leaf_pub
+        witness_script = _get_witness_script(quorum_m=quorum_m, leaf_pubs=leaf_pubs)
+        witness_script_hash = sha256(witness_script.raw_serialize())
+        witness_lookup[witness_script_hash] = witness_script
+        return P2WSHScriptPubKey(witness_script_hash)
+
+    # One funding TX paying receive addresses 0/0 ... 0/num_addresses-1 in turn
+    script_pubkeys = [add_address(0, x) for x in range(num_addresses)]
+    funding_tx = Tx(
+        version=2,
+        tx_ins=[TxIn(prev_tx=b"\x00" * 32, prev_index=0xFFFFFFFF)],
+        tx_outs=[
+            TxOut(
+                amount=SATS_PER_INPUT, script_pubkey=script_pubkeys[x % num_addresses]
+            )
+            for x in range(num_inputs)
+        ],
+        locktime=0,
+        testnet=True,
+        segwit=False,
+    )
+
+    # Spend all of it to a third party (p2wpkh) with change back to 1/0
+    fee_sats = 200 + 100 * num_inputs
+    spend_pub = HDPrivateKey.from_seed(b"\xff" * 32, testnet=True).pub
+    spend_tx = Tx(
+        version=2,
+        tx_ins=[
+            TxIn(prev_tx=funding_tx.hash(), prev_index=x, sequence=0xFFFFFFFD)
+            for x in range(num_inputs)
+        ],
+        tx_outs=[
+            TxOut(
+                amount=SATS_PER_INPUT * num_inputs - CHANGE_SATS - fee_sats,
+                script_pubkey=P2WPKHScriptPubKey(spend_pub.hash160()),
+            ),
+            TxOut(amount=CHANGE_SATS, script_pubkey=add_address(1, 0)),
+        ],
+        locktime=0,
+        testnet=True,
+        segwit=False,
+    )
+
+    psbt_obj = PSBT.create(spend_tx)
+    psbt_obj.update(
+        tx_lookup={funding_tx.hash(): funding_tx},
+        pubkey_lookup=pubkey_lookup,
+        witness_lookup=witness_lookup,
+    )
+    return psbt_obj.serialize_base64()
+
+
+def get_psbt_b64(num_inputs, quorum_m=2, quorum_n=3, num_addresses=None):
+    """
+    Base64 testnet PSBT spending num_inputs multisig UTXOs to one spend output plus
+    change, signable with SIGNER_SEED_PHRASE.
+
+    Each input is from a different receive address unless num_addresses is set,
+    then the inputs cycle through that many (like consolidating a reused address).
+    """
+    if num_addresses is None or num_addresses >= num_inputs:
+        filename = f"psbt-{quorum_m}-of-{quorum_n}-{num_inputs}-inputs.b64"
+        num_addresses = num_inputs
+    else:
+        filename = f"psbt-{quorum_m}-of-{quorum_n}-{num_inputs}-inputs-{num_addresses}-addresses.b64"
+    return _cached(
+        filename,
+        lambda: _build_psbt_b64(
+            num_inputs=num_inputs,
+            quorum_m=quorum_m,
+            quorum_n=quorum_n,
+            num_addresses=num_addresses,
+        ),
+    )
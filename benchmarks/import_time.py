@@ -0,0 +1,92 @@
+#! /usr/bin/env python3
+
+"""
+Check that `import multiwallet_core` stays within its import-time budget.
+
+buidl (and anything only imported on behalf of buidl) is excluded, everything else
+imported by multiwallet_core counts. Each run is a fresh interpreter using
+`python -X importtime`, and the fastest of --runs is compared to the budget.
+
+    $ python benchmarks/import_time.py
+    $ python benchmarks/import_time.py --budget-ms 100 --module multiwallet_core
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _parse_importtime(stderr, module):
+    """
+    Returns {module_name: self_us} for everything imported under `module`, not
+    counting buidl subtrees.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.replace("import time:", "", 1).split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, int(self_us), name.strip()))
+
+    # -X importtime prints children before their parent, walk it parent first
+    to_return, stack, in_module = {}, [], False
+    for depth, self_us, name in reversed(rows):
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        if depth == 0:
+            in_module = name == module
+        is_buidl = name.split(".")[0] == "buidl" or bool(stack and stack[-1][1])
+        stack.append((depth, is_buidl))
+        if in_module and not is_buidl:
+            to_return[name] = self_us
+    return to_return
+
+
+def measure_import_time(module, runs):
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=REPO_ROOT,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        breakdown = _parse_importtime(result.stderr, module=module)
+        if best is None or sum(breakdown.values()) < sum(best.values()):
+            best = breakdown
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="multiwallet_core")
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--top", type=int, default=10, help="Number of slowest modules to show"
+    )
+    args = parser.parse_args()
+
+    breakdown = measure_import_time(module=args.module, runs=args.runs)
+    total_ms = sum(breakdown.values()) / 1000
+
+    for name, self_us in sorted(breakdown.items(), key=lambda x: -x[1])[: args.top]:
+        print(f"{self_us / 1000:8.2f} ms  {name}")
+    print(
+        f"import {args.module}: {total_ms:.2f} ms excluding buidl (budget {args.budget_ms:.0f} ms)"
+    )
+
+    if any(name.split(".")[0] == "PyQt5" for name in breakdown):
+        sys.exit(f"{args.module} must not import PyQt5")
+    if total_ms > args.budget_ms:
+        sys.exit(f"Import time budget exceeded by {total_ms - args.budget_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
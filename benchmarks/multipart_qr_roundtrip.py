@@ -0,0 +1,91 @@
+#! /usr/bin/env python3
+
+"""
+Round-trip check of the animated (multipart) QR encoder and decoder.
+
+Simulates a scanner watching the animation loop: it starts at a random frame,
+misses frames at random (--loss), and reads parts until the decoder has the
+message back. Every message must decode exactly, the output is how many frames
+that took compared to the number of fragments (1.00x is perfect).
+
+    $ python benchmarks/multipart_qr_roundtrip.py
+    $ python benchmarks/multipart_qr_roundtrip.py --loss 0 0.2 0.5 --trials 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from multiwallet_core.multipart_qr import (  # noqa: E402
+    MultipartQRDecoder,
+    MultipartQREncoder,
+)
+
+MESSAGE_LENS = (1, 150, 2_000, 20_000, 100_000)
+FRAGMENT_LENS = (200, 500)
+
+
+def scan_animation(parts, loss, rng, max_frames):
+    """
+    Returns (message, frames watched), message is None if max_frames wasn't
+    enough.
+    """
+    decoder = MultipartQRDecoder()
+    start = rng.randrange(len(parts))
+    for cnt in range(max_frames):
+        if rng.random() >= loss:
+            decoder.receive_part(parts[(start + cnt) % len(parts)])
+            if decoder.is_complete():
+                return decoder.get_message(), cnt + 1
+    return None, max_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--loss", type=float, nargs="+", default=[0.0, 0.1, 0.3])
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--fps", type=float, default=8, help="To estimate scan times")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    print(
+        f"{'bytes':>8} {'frag':>5} {'loss':>5} {'frags':>6} {'median':>8} {'max':>8} {'secs':>6}"
+    )
+    for message_len in MESSAGE_LENS:
+        # base64 alphabet, like a PSBT
+        message = bytes(rng.choice(b"cHNidP8BAH0CAAAAA+/=") for _ in range(message_len))
+        for fragment_len in FRAGMENT_LENS:
+            encoder = MultipartQREncoder(message, fragment_len=fragment_len)
+            parts = encoder.get_animation_parts()
+            for loss in args.loss:
+                ratios = []
+                for _ in range(args.trials):
+                    decoded, num_frames = scan_animation(
+                        parts=parts,
+                        loss=loss,
+                        rng=rng,
+                        max_frames=100 * len(parts),
+                    )
+                    if decoded != message:
+                        failures += 1
+                    ratios.append(num_frames / encoder.num_fragments)
+                median = statistics.median(ratios)
+                print(
+                    f"{message_len:>8} {fragment_len:>5} {loss:>5.2f} {encoder.num_fragments:>6} "
+                    f"{median:>7.2f}x {max(ratios):>7.2f}x "
+                    f"{median * encoder.num_fragments / args.fps:>6.1f}"
+                )
+
+    if failures:
+        sys.exit(f"{failures} round trip(s) failed")
+    print("All round trips decoded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#! /usr/bin/env python3
+
+"""
+Offline check of decoding QR images: generates the frames of an animated QR for a
+PSBT (plus a still QR of a wallet descriptor), shuffles them into a folder and
+times decode_qr_images() reassembling them, against a time budget.
+
+Needs zxing-cpp or pyzbar, see multiwallet_core/qr_decode.py.
+
+    $ python benchmarks/qr_decode_frames.py
+    $ python benchmarks/qr_decode_frames.py --frames 200 --workers 4 --budget-s 10
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qrcode  # noqa: E402
+
+from fixtures import get_descriptor, get_psbt_b64  # noqa: E402
+from multiwallet_core.derivation import get_default_workers  # noqa: E402
+from multiwallet_core.multipart_qr import MultipartQREncoder  # noqa: E402
+from multiwallet_core.qr_decode import decode_qr_images  # noqa: E402
+
+# Testnet 2-of-3 PSBT with this many inputs is ~26kB of base64
+PSBT_NUM_INPUTS = 50
+
+
+def write_frames(dirname, parts, rng):
+    # Saved under shuffled names, so they're decoded out of order
+    names = [f"frame-{x:04}.png" for x in range(len(parts))]
+    rng.shuffle(names)
+    for name, part in zip(names, parts):
+        qrcode.make(part).save(os.path.join(dirname, name))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=get_default_workers())
+    parser.add_argument("--budget-s", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    psbt_b64 = get_psbt_b64(num_inputs=PSBT_NUM_INPUTS)
+    descriptor = get_descriptor(quorum_m=2, quorum_n=3)
+
+    # Half the frames are the fragments, the rest fountain coded parts
+    fragment_len = -(-len(psbt_b64) // (args.frames // 2))
+    encoder = MultipartQREncoder(psbt_b64, fragment_len=fragment_len)
+    parts = encoder.get_animation_parts()
+
+    with tempfile.TemporaryDirectory() as dirname:
+        write_frames(dirname, parts=parts, rng=rng)
+        qrcode.make(descriptor).save(os.path.join(dirname, "descriptor.png"))
+        print(
+            f"{len(parts)} frames of {encoder.fragment_len} bytes ({len(psbt_b64):,} byte PSBT) + 1 descriptor"
+        )
+
+        start = time.perf_counter()
+        result = decode_qr_images([dirname], workers=args.workers)
+        elapsed = time.perf_counter() - start
+
+    print(f"Decoded in {elapsed:.2f}s with {args.workers} worker(s)")
+    if result["errors"] or result["incomplete"]:
+        sys.exit(f"Errors: {result['errors']}, incomplete: {result['incomplete']}")
+    if sorted(result["payloads"]) != sorted([psbt_b64, descriptor]):
+        sys.exit("Decoded payloads don't match")
+    if elapsed > args.budget_s:
+        sys.exit(f"Over budget ({args.budget_s}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,511 @@
+#! /usr/bin/env python3
+
+"""
+Time the hot paths in pure-Python and libsecp256k1 (libsec) modes.
+
+Each mode runs in a fresh interpreter (pure mode hides buidl.cecc so buidl falls
+back to its python EC math). Results are written as JSON and compared to a stored
+baseline, a benchmark regresses when its best time is more than --tolerance slower.
+
+    $ python benchmarks/run_benchmarks.py
+    $ python benchmarks/run_benchmarks.py --modes libsec --filter psbt --repeat 5
+    $ python benchmarks/run_benchmarks.py --save-baseline
+
+Fixtures are deterministic and cached in benchmarks/.cache/ (the first run of the
+500 input PSBT takes a few minutes without libsec).
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+MODES = ("pure", "libsec")
+RESULTS_VERSION = 1
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, "benchmarks", "results.json")
+
+QUORUMS = ((2, 3), (3, 5), (7, 11))
+CHECKSUM_FIRST_WORDS = {
+    11: " ".join(["zoo"] * 11),
+    23: " ".join(["zoo"] * 23),
+}
+PSBT_NUM_INPUTS = (1, 10, 500)
+QR_PAYLOAD_SIZES = (100, 500, 1000, 2000)
+# (inputs, addresses) for decoding a consolidation, with a time budget per mode
+DECODE_CONSOLIDATION = (1000, 5)
+DECODE_BUDGETS_S = {"libsec": 1.0}
+
+# Cases this size or larger only run once per mode (minutes each without libsec)
+SLOW_NUM_INPUTS = 500
+
+
+def _force_mode(mode):
+    # Must run before anything imports buidl
+    if mode == "pure":
+        sys.modules["buidl.cecc"] = None
+
+
+def _create_qt_pixmap_qr_png(text):
+    # multiwallet_gui.helper.create_qt_pixmap_qr before it rendered straight to a QImage
+    from io import BytesIO
+
+    import qrcode
+    from PyQt5.QtGui import QPixmap
+
+    buf = BytesIO()
+    qrcode.make(text).save(buf, "PNG")
+    qt_pixmap = QPixmap()
+    qt_pixmap.loadFromData(buf.getvalue(), "PNG")
+    return qt_pixmap
+
+
+def _get_benchmarks(num_addresses):
+    """
+    Returns a list of dicts with a name, setup() that returns the argument for
+    run(), the number of units each run does, and the unit name. Optional keys are
+    repeat (overrides --repeat) and budgets_s ({mode: best time must be under}).
+    """
+    from multiwallet_core.derivation import (
+        _get_address,
+        _get_pubkeys_info_from_descriptor,
+        clear_caches,
+    )
+    from multiwallet_core.psbt import (
+        PARALLEL_SIGN_MIN_INPUTS,
+        describe_psbt,
+        parse_psbt,
+        sign_psbt,
+    )
+    from multiwallet_core.seedpicker import _get_all_valid_checksum_words
+    from multiwallet_gui.helper import _get_qr_matrix, create_qt_pixmap_qr
+
+    import fixtures
+
+    # Fixtures are fetched in setup() so filtered out benchmarks never build theirs
+    to_return = []
+
+    for quorum_m, quorum_n in QUORUMS:
+
+        def setup_descriptor(quorum_m=quorum_m, quorum_n=quorum_n):
+            descriptor = fixtures.get_descriptor(quorum_m=quorum_m, quorum_n=quorum_n)
+            clear_caches()
+            return descriptor
+
+        to_return.append(
+            {
+                "name": f"derivation.parse_descriptor[{quorum_m}-of-{quorum_n}]",
+                "setup": setup_descriptor,
+                "run": _get_pubkeys_info_from_descriptor,
+                "units": 1,
+                "unit": "descriptor",
+            }
+        )
+
+        def setup_address(quorum_m=quorum_m, quorum_n=quorum_n):
+            descriptor = fixtures.get_descriptor(quorum_m=quorum_m, quorum_n=quorum_n)
+            pubkeys_info = _get_pubkeys_info_from_descriptor(descriptor)
+            clear_caches()  # every index is a cache miss
+            return pubkeys_info
+
+        def run_address(pubkeys_info):
+            for index in range(num_addresses):
+                _get_address(
+                    pubkey_dicts=pubkeys_info["pubkey_dicts"],
+                    quorum_m=pubkeys_info["quorum_m"],
+                    quorum_n=pubkeys_info["quorum_n"],
+                    index=index,
+                    is_testnet=pubkeys_info["is_testnet"],
+                )
+
+        to_return.append(
+            {
+                "name": f"derivation.get_address[{quorum_m}-of-{quorum_n}]",
+                "setup": setup_address,
+                "run": run_address,
+                "units": num_addresses,
+                "unit": "index",
+            }
+        )
+
+    for num_words, first_words in CHECKSUM_FIRST_WORDS.items():
+        for first_match in (True, False):
+
+            def run_checksum_words(first_words, first_match=first_match):
+                _get_all_valid_checksum_words(first_words, first_match=first_match)
+
+            to_return.append(
+                {
+                    "name": f"seedpicker.checksum_words[{num_words}-words,first_match={first_match}]",
+                    "setup": lambda first_words=first_words: first_words,
+                    "run": run_checksum_words,
+                    "units": 1,
+                    "unit": "phrase",
+                }
+            )
+
+    for num_inputs in PSBT_NUM_INPUTS:
+        repeat = 1 if num_inputs >= SLOW_NUM_INPUTS else None
+
+        def setup_parse(num_inputs=num_inputs):
+            return fixtures.get_psbt_b64(num_inputs=num_inputs)
+
+        def setup_describe(num_inputs=num_inputs):
+            return parse_psbt(fixtures.get_psbt_b64(num_inputs=num_inputs))
+
+        def setup_sign(num_inputs=num_inputs):
+            # signing mutates the PSBT so every run gets a fresh one
+            psbt_obj = parse_psbt(fixtures.get_psbt_b64(num_inputs=num_inputs))
+            return psbt_obj, describe_psbt(psbt_obj)["inputs_desc"]
+
+        def run_sign(args, workers=1):
+            psbt_obj, inputs_desc = args
+            sign_psbt(
+                psbt_obj=psbt_obj,
+                inputs_desc=inputs_desc,
+                seed_phrase=fixtures.SIGNER_SEED_PHRASE,
+                workers=workers,
+            )
+
+        to_return.extend(
+            [
+                {
+                    "name": f"psbt.parse[{num_inputs}-inputs]",
+                    "setup": setup_parse,
+                    "run": parse_psbt,
+                    "units": num_inputs,
+                    "unit": "input",
+                    "repeat": repeat,
+                },
+                {
+                    "name": f"psbt.validate[{num_inputs}-inputs]",
+                    "setup": setup_describe,
+                    "run": describe_psbt,
+                    "units": num_inputs,
+                    "unit": "input",
+                    "repeat": repeat,
+                },
+                {
+                    "name": f"psbt.sign[{num_inputs}-inputs]",
+                    "setup": setup_sign,
+                    "run": run_sign,
+                    "units": num_inputs,
+                    "unit": "input",
+                    "repeat": repeat,
+                },
+            ]
+        )
+
+        if num_inputs >= PARALLEL_SIGN_MIN_INPUTS:
+            # At least 2 workers so the pool path runs even on a single core
+            to_return.append(
+                {
+                    "name": f"psbt.sign_parallel[{num_inputs}-inputs]",
+                    "setup": setup_sign,
+                    "run": lambda args: run_sign(
+                        args, workers=max(2, os.cpu_count() or 1)
+                    ),
+                    "units": num_inputs,
+                    "unit": "input",
+                    "repeat": repeat,
+                }
+            )
+
+    num_inputs, num_addresses = DECODE_CONSOLIDATION
+
+    def setup_decode():
+        return fixtures.get_psbt_b64(num_inputs=num_inputs, num_addresses=num_addresses)
+
+    def run_decode(psbt_b64):
+        describe_psbt(parse_psbt(psbt_b64))
+
+    to_return.append(
+        {
+            "name": f"psbt.decode[{num_inputs}-inputs,{num_addresses}-addresses]",
+            "setup": setup_decode,
+            "run": run_decode,
+            "units": num_inputs,
+            "unit": "input",
+            "budgets_s": DECODE_BUDGETS_S,
+        }
+    )
+
+    def setup_qr(payload, warm=False):
+        from PyQt5.QtWidgets import QApplication
+
+        if QApplication.instance() is None:
+            os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+            # Keep a reference for the lifetime of the process
+            setup_qr.app = QApplication([])
+        # Time QR encoding too, unless only timing rendering a cached matrix
+        _get_qr_matrix.cache_clear()
+        if warm:
+            _get_qr_matrix(payload)
+        return payload
+
+    for payload_size in QR_PAYLOAD_SIZES:
+        # base64 alphabet, like a PSBT
+        payload = ("cHNidP8B" * payload_size)[:payload_size]
+        to_return.append(
+            {
+                "name": f"qr.create_qt_pixmap_qr[{payload_size}-bytes]",
+                "setup": lambda payload=payload: setup_qr(payload),
+                "run": create_qt_pixmap_qr,
+                "units": 1,
+                "unit": "qr",
+            }
+        )
+        to_return.append(
+            {
+                "name": f"qr.render[{payload_size}-bytes]",
+                "setup": lambda payload=payload: setup_qr(payload, warm=True),
+                "run": create_qt_pixmap_qr,
+                "units": 1,
+                "unit": "qr",
+            }
+        )
+        # The old Pillow -> PNG -> QPixmap path, to compare against
+        to_return.append(
+            {
+                "name": f"qr.create_qt_pixmap_qr_png[{payload_size}-bytes]",
+                "setup": lambda payload=payload: setup_qr(payload),
+                "run": _create_qt_pixmap_qr_png,
+                "units": 1,
+                "unit": "qr",
+            }
+        )
+
+    return to_return
+
+
+def run_mode(mode, name_filters, repeat, num_addresses):
+    """
+    Runs the benchmarks in this process, _force_mode(mode) must have been called.
+    """
+    from multiwallet_core.helper import _is_libsec_enabled
+
+    if _is_libsec_enabled() != (mode == "libsec"):
+        return {"available": False, "results": []}
+
+    results = []
+    for benchmark in _get_benchmarks(num_addresses=num_addresses):
+        if name_filters and not any(x in benchmark["name"] for x in name_filters):
+            continue
+
+        timings = []
+        for _ in range(benchmark.get("repeat") or repeat):
+            arg = benchmark["setup"]()
+            start = time.perf_counter()
+            benchmark["run"](arg)
+            timings.append(time.perf_counter() - start)
+
+        results.append(
+            {
+                "name": benchmark["name"],
+                "repeat": len(timings),
+                "min_s": min(timings),
+                "median_s": statistics.median(timings),
+                "mean_s": statistics.mean(timings),
+                "units": benchmark["units"],
+                "unit": benchmark["unit"],
+                "per_unit_s": min(timings) / benchmark["units"],
+                "budget_s": benchmark.get("budgets_s", {}).get(mode),
+            }
+        )
+        print(
+            f"{mode:>6} {benchmark['name']:<58} {min(timings):10.4f}s",
+            file=sys.stderr,
+        )
+
+    return {"available": True, "results": results}
+
+
+def _get_machine_info():
+    try:
+        import pkg_resources
+
+        buidl_version = pkg_resources.get_distribution("buidl").version
+    except Exception:
+        buidl_version = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "buidl": buidl_version,
+    }
+
+
+def get_over_budget(results):
+    # [(mode, name, min_s, budget_s), ...] for results slower than their budget
+    to_return = []
+    for mode, mode_results in results["modes"].items():
+        for result in mode_results["results"]:
+            budget_s = result.get("budget_s")
+            if budget_s is not None and result["min_s"] > budget_s:
+                to_return.append((mode, result["name"], result["min_s"], budget_s))
+    return to_return
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Returns (rows, regressions, missing), comparing the best time of every
+    benchmark to the baseline (in the same mode). missing is every benchmark that
+    ran but has no baseline to compare to, a regression could hide there.
+    """
+    baseline_by_key = {}
+    for mode, mode_results in baseline["modes"].items():
+        for result in mode_results["results"]:
+            baseline_by_key[(mode, result["name"])] = result
+
+    rows, regressions, missing = [], [], []
+    for mode, mode_results in results["modes"].items():
+        for result in mode_results["results"]:
+            baseline_result = baseline_by_key.get((mode, result["name"]))
+            if baseline_result is None:
+                missing.append((mode, result["name"]))
+                rows.append(
+                    f"{mode:>6} {result['name']:<58} {'':>11} {result['min_s']:10.4f}s {'':>7} NO BASELINE"
+                )
+                continue
+            ratio = result["min_s"] / baseline_result["min_s"]
+            if ratio > 1 + tolerance:
+                status = "SLOWER"
+                regressions.append((mode, result["name"]))
+            elif ratio < 1 - tolerance:
+                status = "faster"
+            else:
+                status = ""
+            rows.append(
+                f"{mode:>6} {result['name']:<58} {baseline_result['min_s']:10.4f}s {result['min_s']:10.4f}s {ratio:6.2f}x {status}"
+            )
+    return rows, regressions, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument(
+        "--filter",
+        action="append",
+        dest="name_filters",
+        help="Only run benchmarks whose name contains this (can be repeated)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--addresses", type=int, default=10, help="Indices per get_address run"
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown vs the baseline before failing (0.25 = 25%%)",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Also write these results to --baseline",
+    )
+    parser.add_argument(
+        "--allow-missing",
+        action="store_true",
+        help="Don't fail on benchmarks (or modes) the baseline has no results for",
+    )
+    # Internal: run a single mode in this process and print its JSON to stdout
+    parser.add_argument("--child-mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_mode:
+        _force_mode(args.child_mode)
+        json.dump(
+            run_mode(
+                mode=args.child_mode,
+                name_filters=args.name_filters,
+                repeat=args.repeat,
+                num_addresses=args.addresses,
+            ),
+            sys.stdout,
+        )
+        return
+
+    results = {
+        "version": RESULTS_VERSION,
+        "created": datetime.datetime.utcnow().isoformat() + "Z",
+        "machine": _get_machine_info(),
+        "modes": {},
+    }
+    for mode in args.modes:
+        cmd = [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--child-mode",
+            mode,
+            "--repeat",
+            str(args.repeat),
+            "--addresses",
+            str(args.addresses),
+        ]
+        for name_filter in args.name_filters or []:
+            cmd.extend(["--filter", name_filter])
+        child = subprocess.run(
+            cmd, cwd=REPO_ROOT, stdout=subprocess.PIPE, universal_newlines=True
+        )
+        if child.returncode != 0:
+            sys.exit(f"{mode} benchmarks failed")
+        results["modes"][mode] = json.loads(child.stdout)
+        if not results["modes"][mode]["available"]:
+            print(f"{mode:>6} not available, skipped", file=sys.stderr)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    over_budget = get_over_budget(results)
+    for mode, name, min_s, budget_s in over_budget:
+        print(f"{mode:>6} {name:<58} {min_s:10.4f}s over its {budget_s}s budget")
+    if over_budget:
+        sys.exit(f"{len(over_budget)} benchmark(s) over budget")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create one")
+        return
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    rows, regressions, missing = compare_to_baseline(
+        results=results, baseline=baseline, tolerance=args.tolerance
+    )
+    print(f"{'':>6} {'benchmark':<58} {'baseline':>11} {'current':>11}")
+    print("\n".join(rows))
+    errors = []
+    if regressions:
+        errors.append(
+            f"{len(regressions)} benchmark(s) more than {args.tolerance:.0%} slower than the baseline"
+        )
+    if missing and not args.allow_missing:
+        errors.append(
+            f"{len(missing)} benchmark(s) not in the baseline, regenerate it with "
+            "--save-baseline (in both modes) or pass --allow-missing"
+        )
+    if errors:
+        sys.exit("\n".join(errors))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#! /usr/bin/env python3
+
+"""
+Check that the GUI paints its first window within a time-to-first-paint budget.
+
+Each run launches a fresh interpreter that imports and starts the app the way
+`multiwallet_gui` does, and reports the time from launching the process to the
+main window's first paint event (so interpreter startup and imports count).
+The fastest of --runs is compared to the budget.
+
+    $ python benchmarks/startup_time.py
+    $ python benchmarks/startup_time.py --budget-ms 500 --runs 5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Prints time.time() at the first paint of the main window, then quits
+FIRST_PAINT_SCRIPT = """
+import sys, time
+from PyQt5.QtCore import QEvent, QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+from multiwallet_gui.app import MultiwalletApp
+
+class FirstPaintFilter(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and not self.painted:
+            self.painted = True
+            print(time.time(), flush=True)
+            QTimer.singleShot(0, qapp.quit)
+        return False
+
+qapp = QApplication(sys.argv)
+my_app = MultiwalletApp()
+first_paint_filter = FirstPaintFilter()
+first_paint_filter.painted = False
+my_app.installEventFilter(first_paint_filter)
+my_app.show()
+qapp.exec()
+"""
+
+
+def measure_first_paint(runs):
+    env = dict(os.environ)
+    # Works without a display server (e.g. CI), pass QT_QPA_PLATFORM to override
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    best = None
+    for _ in range(runs):
+        started_at = time.time()
+        result = subprocess.run(
+            [sys.executable, "-c", FIRST_PAINT_SCRIPT],
+            cwd=REPO_ROOT,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+            check=True,
+        )
+        elapsed_ms = (float(result.stdout.split()[-1]) - started_at) * 1000
+        if best is None or elapsed_ms < best:
+            best = elapsed_ms
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=500.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    first_paint_ms = measure_first_paint(runs=args.runs)
+    print(
+        f"Time to first paint: {first_paint_ms:.0f} ms (budget {args.budget_ms:.0f} ms)"
+    )
+    if first_paint_ms > args.budget_ms:
+        sys.exit("Over budget")
+
+
+if __name__ == "__main__":
+    main()
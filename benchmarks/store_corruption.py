@@ -0,0 +1,129 @@
+#! /usr/bin/env python3
+
+"""
+Check that a corrupted derivation store is an error, never a wrong address.
+
+Flips every bit of one record (index, witness script hash and checksum) in turn
+and checks that reading it raises DerivationStoreError, then does the same end to
+end through get_addresses with a store of real addresses.
+
+    $ python benchmarks/store_corruption.py
+    $ python benchmarks/store_corruption.py --records 20 --record 7
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from multiwallet_core.derivation import (  # noqa: E402
+    _get_pubkeys_info_from_descriptor,
+    get_addresses,
+)
+from multiwallet_core.store import (  # noqa: E402
+    HEADER_STRUCT,
+    RECORD_STRUCT,
+    DerivationStore,
+    DerivationStoreError,
+    get_descriptor_checksum,
+)
+
+import fixtures  # noqa: E402
+
+
+def flip_bit(path, position, bit):
+    with open(path, "r+b") as f:
+        f.seek(position)
+        byte = f.read(1)[0]
+        f.seek(position)
+        f.write(bytes([byte ^ (1 << bit)]))
+
+
+def check_record_bit_flips(dirname, num_records, record):
+    # Returns the number of flipped bits that went undetected
+    descriptor_checksum = os.urandom(32)
+    path = os.path.join(dirname, "records.mwds")
+    with DerivationStore(path=path, descriptor_checksum=descriptor_checksum) as store:
+        store.append([(x, os.urandom(32)) for x in range(num_records)])
+        expected = store.get_witness_script_hash(record)
+
+    record_start = HEADER_STRUCT.size + record * RECORD_STRUCT.size
+    undetected = 0
+    for position in range(record_start, record_start + RECORD_STRUCT.size):
+        for bit in range(8):
+            flip_bit(path, position, bit)
+            try:
+                with DerivationStore(
+                    path=path, descriptor_checksum=descriptor_checksum
+                ) as store:
+                    store.get_witness_script_hash(record)
+                undetected += 1
+            except DerivationStoreError:
+                pass
+            flip_bit(path, position, bit)
+
+    with DerivationStore(path=path, descriptor_checksum=descriptor_checksum) as store:
+        assert store.get_witness_script_hash(record) == expected
+    return undetected
+
+
+def check_get_addresses_bit_flip(dirname, num_records, record):
+    # Returns True if get_addresses raised instead of returning a wrong address
+    pubkeys_info = _get_pubkeys_info_from_descriptor(
+        fixtures.get_descriptor(quorum_m=2, quorum_n=3)
+    )
+    descriptor_checksum = get_descriptor_checksum(pubkeys_info)
+    path = os.path.join(dirname, "addresses.mwds")
+
+    def derive():
+        with DerivationStore(
+            path=path, descriptor_checksum=descriptor_checksum
+        ) as store:
+            return list(
+                get_addresses(
+                    pubkey_dicts=pubkeys_info["pubkey_dicts"],
+                    quorum_m=pubkeys_info["quorum_m"],
+                    quorum_n=pubkeys_info["quorum_n"],
+                    limit=num_records,
+                    offset=0,
+                    is_testnet=pubkeys_info["is_testnet"],
+                    store=store,
+                )
+            )
+
+    expected = derive()
+    # A bit in the middle of the witness script hash
+    flip_bit(path, HEADER_STRUCT.size + record * RECORD_STRUCT.size + 4 + 16, 0)
+    try:
+        addresses = derive()
+    except DerivationStoreError:
+        return True
+    print(f"Undetected: {addresses[record]} instead of {expected[record]}")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=10)
+    parser.add_argument("--record", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dirname:
+        undetected = check_record_bit_flips(
+            dirname=dirname, num_records=args.records, record=args.record
+        )
+        num_bits = RECORD_STRUCT.size * 8
+        print(f"Record bit flips detected: {num_bits - undetected} of {num_bits}")
+        is_detected = check_get_addresses_bit_flip(
+            dirname=dirname, num_records=args.records, record=args.record
+        )
+        print(f"get_addresses bit flip detected: {is_detected}")
+
+    if undetected or not is_detected:
+        sys.exit("Corruption went undetected")
+
+
+if __name__ == "__main__":
+    main()
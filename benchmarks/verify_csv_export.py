@@ -0,0 +1,78 @@
+#! /usr/bin/env python3
+
+"""
+Check that the CLI's own CSV export verifies cleanly on the Receive tab.
+
+Runs `multiwallet derive --format csv` and pastes its output (header and index
+column included) into the same parsing and lookup the Receive tab's verify uses.
+Every address must be found at its own index, and nothing else may be reported.
+
+    $ python benchmarks/verify_csv_export.py
+    $ python benchmarks/verify_csv_export.py --limit 50 --offset 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from multiwallet_core.derivation import _get_pubkeys_info_from_descriptor  # noqa: E402
+from multiwallet_core.verify import (  # noqa: E402
+    RECEIVE_BRANCH,
+    AddressIndex,
+    _parse_addresses,
+    verify_addresses,
+)
+
+import fixtures  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--offset", type=int, default=0)
+    args = parser.parse_args()
+
+    descriptor = fixtures.get_descriptor(quorum_m=2, quorum_n=3)
+    csv_text = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "multiwallet_core.cli",
+            "derive",
+            descriptor,
+            "--format",
+            "csv",
+            "--limit",
+            str(args.limit),
+            "--offset",
+            str(args.offset),
+        ],
+        cwd=ROOT_DIR,
+        stdout=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    ).stdout
+
+    address_index = AddressIndex.build(
+        pubkeys_info=_get_pubkeys_info_from_descriptor(descriptor),
+        limit=args.offset + args.limit,
+    )
+    results = list(verify_addresses(address_index, _parse_addresses(csv_text)))
+    errors = []
+    for cnt, (address, branch, index) in enumerate(results):
+        if branch != RECEIVE_BRANCH or index != args.offset + cnt:
+            errors.append(f"{address}: found at branch {branch} index {index}")
+    print(f"Addresses verified: {len(results) - len(errors)} of {args.limit}")
+    if len(results) != args.limit:
+        errors.append(f"Parsed {len(results)} addresses, expected {args.limit}")
+
+    if errors:
+        sys.exit("\n".join(errors))
+
+
+if __name__ == "__main__":
+    main()
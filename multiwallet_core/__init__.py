@@ -0,0 +1,112 @@
+#! /usr/bin/env bash
+
+"""
+Multiwallet's wallet logic as a library, with no Qt dependency.
+
+Importing multiwallet_core never imports PyQt5, and has an import-time budget of
+100 ms not counting buidl (see benchmarks/import_time.py).
+
+Addresses (multiwallet_core.derivation):
+    pubkeys_info = _get_pubkeys_info_from_descriptor("wsh(sortedmulti(2,[...]xpub.../0/*,...))")
+    for index, address in get_addresses(
+        pubkey_dicts=pubkeys_info["pubkey_dicts"],
+        quorum_m=pubkeys_info["quorum_m"],
+        quorum_n=pubkeys_info["quorum_n"],
+        limit=10,
+        offset=0,
+        is_testnet=pubkeys_info["is_testnet"],
+        workers=1,  # None to use every core
+        store=None,  # or a multiwallet_core.store.DerivationStore
+    ):
+        ...
+
+Address verification (multiwallet_core.verify):
+    address_index = AddressIndex.build(pubkeys_info=pubkeys_info, limit=1000)
+    address_index.lookup("bc1q...")  # (branch, index) or None
+
+Seedpicker (multiwallet_core.seedpicker):
+    valid_checksum_words, err_str = _get_all_valid_checksum_words(first_words)
+    key_record = _get_pubkey_info(hd_priv=hd_priv, is_testnet=False)
+    for result in pick_last_words(first_words_list, is_testnet=False, workers=None):
+        ...  # last_word, xfp, path and xpub (or error)
+
+PSBTs (multiwallet_core.psbt), every function raises PSBTError on failure:
+    psbt_obj = parse_psbt(psbt_str=b64_psbt, testnet=None)
+    psbt_obj = parse_psbt_file(path="tx.psbt")  # binary files are parsed from an mmap
+    psbt_desc = describe_psbt(psbt_obj=psbt_obj)  # validates inputs/outputs
+    sign_psbt(psbt_obj=psbt_obj, inputs_desc=psbt_desc["inputs_desc"], seed_phrase=seed_phrase)
+    # workers=None signs the inputs of a large PSBT across processes (same output)
+    psbt_obj.serialize_base64()  # or write_psbt_file(psbt_obj, "tx.signed.psbt")
+    # Many PSBTs, one seed stretch, shared child keys, signed across processes:
+    for result in sign_psbts(psbt_strs=split_psbts(text), seed_phrase=seed_phrase, workers=None):
+        ...  # psbt_desc, signed_b64 and error for each PSBT
+
+Animated QRs (multiwallet_core.multipart_qr), our own format and not BC-UR:
+    parts = MultipartQREncoder(psbt_b64, fragment_len=200).get_animation_parts()
+    decoder = MultipartQRDecoder()
+    decoder.receive_part(part)  # for each scanned part, in any order
+    decoder.is_complete() and decoder.get_message()
+
+QR images (multiwallet_core.qr_decode), needs zxing-cpp or pyzbar:
+    result = decode_qr_images(paths=["frames/"], workers=None)  # raises QRDecodeError
+    result["payloads"]  # PSBTs/descriptors, animated QRs reassembled in any order
+
+Timings (multiwallet_core.metrics), off unless enabled (or MULTIWALLET_METRICS=1):
+    enable_metrics(jsonl_path=None)  # optionally log every span/counter as JSON lines
+    with span("my.operation"):
+        ...
+    print(format_metrics_summary(get_metrics_summary()))  # count, p50, p95, max
+
+Profiling one action (multiwallet_core.action_profile), nothing sensitive is saved:
+    arm_action_profile(output_dir=None)  # ~/.multiwallet/profiles by default
+    start_action_profile(action="my.action")  # cProfile + tracemalloc, if armed
+    with profile_thread():  # on each background thread doing the action's work
+        ...
+    finish_action_profile()  # {"pstats_path", "allocations_path", ...}
+"""
+
+from multiwallet_core.action_profile import (  # noqa: F401
+    arm_action_profile,
+    finish_action_profile,
+    profile_thread,
+    start_action_profile,
+)
+from multiwallet_core.derivation import (  # noqa: F401
+    _get_address,
+    _get_pubkeys_info_from_descriptor,
+    get_addresses,
+    get_cache_stats,
+)
+from multiwallet_core.helper import _is_libsec_enabled  # noqa: F401
+from multiwallet_core.metrics import (  # noqa: F401
+    disable_metrics,
+    enable_metrics,
+    format_metrics_summary,
+    get_metrics_summary,
+    span,
+)
+from multiwallet_core.multipart_qr import (  # noqa: F401
+    MultipartQRDecoder,
+    MultipartQREncoder,
+    MultipartQRError,
+    is_multipart_qr_part,
+)
+from multiwallet_core.psbt import (  # noqa: F401
+    PSBTError,
+    _calculate_msig_digest,
+    describe_psbt,
+    parse_psbt,
+    parse_psbt_file,
+    sign_psbt,
+    sign_psbts,
+    split_psbts,
+    write_psbt_file,
+)
+from multiwallet_core.qr_decode import QRDecodeError, decode_qr_images  # noqa: F401
+from multiwallet_core.seedpicker import (  # noqa: F401
+    _get_all_valid_checksum_words,
+    _get_pubkey_info,
+    pick_last_words,
+)
+from multiwallet_core.store import DerivationStore, DerivationStoreError  # noqa: F401
+from multiwallet_core.verify import AddressIndex  # noqa: F401
@@ -0,0 +1,241 @@
+#! /usr/bin/env bash
+
+# On-demand profiling of one user action (deriving addresses, signing a PSBT), for
+# when something is slow or uses too much memory with a PSBT or descriptor that
+# can't be shared. Arm it with arm_action_profile(), and the next action that calls
+# start_action_profile() runs under cProfile and tracemalloc until
+# finish_action_profile(), which saves:
+#     <action>-<timestamp>.pstats           python -m pstats, snakeviz, etc.
+#     <action>-<timestamp>.allocations.txt  top allocations by line, and the peak
+#
+# Both only hold code locations (file, line, function name) and numbers (calls,
+# times, sizes), never argument values or memory contents, so they can be shared:
+# no seed phrases, keys, PSBTs or addresses.
+#
+# cProfile only sees the thread it's enabled on, so background work started by the
+# action has to run inside profile_thread(). Worker processes (workers > 1) aren't
+# profiled, their time shows up as waiting on the pool.
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from multiwallet_core.helper import _is_libsec_enabled
+
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.expanduser("~"), ".multiwallet", "profiles")
+TOP_N_ALLOCATIONS = 25
+
+
+def _enable_profiler():
+    # Returns None if this thread is already being profiled. From Python 3.12 a
+    # profiler sees every thread, so the action's own profiler covers its workers.
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+
+def _take_snapshot():
+    # Leaves out the profilers' own allocations (and imports)
+    import cProfile
+    import profile
+    import tracemalloc
+
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [
+            tracemalloc.Filter(False, x)
+            for x in (
+                __file__,
+                cProfile.__file__,
+                profile.__file__,
+                tracemalloc.__file__,
+                "<frozen importlib._bootstrap*>",
+                "<unknown>",
+            )
+        ]
+    )
+    return snapshot, sum(x.size for x in snapshot.traces)
+
+
+class _ActionProfile:
+    def __init__(self, action, output_dir, top_n):
+        import tracemalloc
+
+        self.action = action
+        self.output_dir = output_dir
+        self.top_n = top_n
+        # Profilers of threads that finished their part of the action
+        self.lock = threading.Lock()
+        self.profilers = []
+        # Largest snapshot so far (taken as each thread finishes and at the end),
+        # retained memory is easily freed before the action finishes
+        self.snapshot, self.snapshot_size = None, -1
+
+        # Leave it running if it was already (e.g. PYTHONTRACEMALLOC)
+        self.started_tracemalloc = not tracemalloc.is_tracing()
+        if self.started_tracemalloc:
+            tracemalloc.start()
+        # reset_peak() is Python 3.9+, before that a peak we didn't start tracing
+        # for covers the whole trace
+        self.is_peak_since_start = self.started_tracemalloc
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+            self.is_peak_since_start = True
+        self.start_size, _ = tracemalloc.get_traced_memory()
+        self.started_at = time.perf_counter()
+        self.profiler = _enable_profiler()
+
+    def add_snapshot(self):
+        snapshot, snapshot_size = _take_snapshot()
+        with self.lock:
+            if snapshot_size > self.snapshot_size:
+                self.snapshot, self.snapshot_size = snapshot, snapshot_size
+
+    def add_thread_profiler(self, profiler):
+        # Called on the profiled thread, create_stats() disables the profiler
+        if profiler is not None:
+            profiler.create_stats()
+            with self.lock:
+                self.profilers.append(profiler)
+        self.add_snapshot()
+
+    def get_allocations_report(self, elapsed_s, current_size, peak_size):
+        peak_note = "" if self.is_peak_since_start else " (whole trace, Python < 3.9)"
+        lines = [
+            f"Action: {self.action}",
+            f"Wall time: {elapsed_s * 1000:,.0f} ms",
+            f"Peak traced memory: {peak_size / 1024:,.1f} KiB{peak_note}",
+            f"Traced memory at the start: {self.start_size / 1024:,.1f} KiB",
+            f"Traced memory at the end: {current_size / 1024:,.1f} KiB",
+            f"Largest snapshot: {self.snapshot_size / 1024:,.1f} KiB",
+            f"libsec: {'installed' if _is_libsec_enabled() else 'not installed'}",
+            f"Python {sys.version.split()[0]} on {sys.platform}",
+            "",
+            f"Top {self.top_n} allocations (largest snapshot) by line:",
+        ]
+        for stat in self.snapshot.statistics("lineno")[: self.top_n]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"{frame.filename}:{frame.lineno}: size={stat.size / 1024:,.1f} KiB, count={stat.count:,}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def finish(self):
+        import pstats
+        import tracemalloc
+
+        elapsed_s = time.perf_counter() - self.started_at
+        try:
+            self.add_thread_profiler(self.profiler)
+            current_size, peak_size = tracemalloc.get_traced_memory()
+        finally:
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+
+        basename = f"{self.action}-{time.strftime('%Y%m%d-%H%M%S')}"
+        result = {
+            "action": self.action,
+            "pstats_path": os.path.join(self.output_dir, basename + ".pstats"),
+            "allocations_path": os.path.join(
+                self.output_dir, basename + ".allocations.txt"
+            ),
+            "error": None,
+        }
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            if self.profilers:
+                pstats.Stats(*self.profilers).dump_stats(result["pstats_path"])
+            else:
+                result["pstats_path"] = None
+            with open(result["allocations_path"], "w") as f:
+                f.write(
+                    self.get_allocations_report(
+                        elapsed_s=elapsed_s,
+                        current_size=current_size,
+                        peak_size=peak_size,
+                    )
+                )
+        except OSError as e:
+            result["error"] = str(e)
+        return result
+
+
+# {"output_dir", "top_n"} for the next action while armed, else None
+_armed = None
+# The action being profiled, else None
+_action_profile = None
+_last_result = None
+
+
+def arm_action_profile(output_dir=None, top_n=TOP_N_ALLOCATIONS):
+    # Profile the next action (only one)
+    global _armed
+    _armed = {"output_dir": output_dir or DEFAULT_OUTPUT_DIR, "top_n": top_n}
+
+
+def disarm_action_profile():
+    global _armed
+    _armed = None
+
+
+def is_action_profile_armed():
+    return _armed is not None
+
+
+def is_action_profile_running():
+    return _action_profile is not None
+
+
+def start_action_profile(action):
+    """
+    Starts profiling action if armed (which disarms it), returns whether it did.
+
+    Call finish_action_profile() once the action is done, including its work on
+    other threads.
+    """
+    global _armed, _action_profile
+    if _armed is None or _action_profile is not None:
+        return False
+    _action_profile = _ActionProfile(action=action, **_armed)
+    _armed = None
+    return True
+
+
+@contextmanager
+def profile_thread():
+    # For the action's work on other threads (e.g. a QRunnable's run), a no-op
+    # unless an action is being profiled
+    action_profile = _action_profile
+    if action_profile is None:
+        yield
+        return
+    profiler = _enable_profiler()
+    try:
+        yield
+    finally:
+        action_profile.add_thread_profiler(profiler)
+
+
+def finish_action_profile():
+    """
+    Stops profiling and saves the report, returns
+    {"action", "pstats_path", "allocations_path", "error"} (None if no action was
+    being profiled).
+    """
+    global _action_profile, _last_result
+    if _action_profile is None:
+        return None
+    action_profile, _action_profile = _action_profile, None
+    _last_result = action_profile.finish()
+    return _last_result
+
+
+def get_last_action_profile():
+    # The last finish_action_profile() result, or None
+    return _last_result
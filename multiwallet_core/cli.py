@@ -0,0 +1,412 @@
+#! /usr/bin/env bash
+
+# Headless entry point, must never import PyQt5 (directly or indirectly)
+
+import argparse
+import getpass
+import json
+import os
+import sys
+from pathlib import Path
+
+from multiwallet_core.derivation import (
+    _get_pubkeys_info_from_descriptor,
+    get_addresses,
+)
+from multiwallet_core.psbt import (
+    PSBTError,
+    get_batch_summary,
+    sign_psbts,
+    split_psbts,
+    write_psbt_file,
+)
+from multiwallet_core.qr_decode import QRDecodeError, decode_qr_images
+from multiwallet_core.seedpicker import pick_last_words
+from multiwallet_core.store import (
+    DEFAULT_STORE_DIR,
+    DerivationStore,
+    DerivationStoreError,
+    get_default_store_path,
+    get_descriptor_checksum,
+)
+
+
+def _read_descriptor(args):
+    if args.file:
+        with open(args.file, "r") as f:
+            return f.read().strip()
+    if args.descriptor and args.descriptor != "-":
+        return args.descriptor.strip()
+    return sys.stdin.read().strip()
+
+
+def _write_stdout(lines):
+    # Write as we go, and exit quietly if the reader goes away (e.g. piped to head)
+    try:
+        for line in lines:
+            sys.stdout.write(line)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # https://docs.python.org/3/library/signal.html#note-on-sigpipe
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+
+
+def derive(args):
+    descriptor = _read_descriptor(args)
+    if not descriptor:
+        sys.exit("No wallet descriptor supplied")
+
+    try:
+        pubkeys_info = _get_pubkeys_info_from_descriptor(descriptor)
+    except Exception as e:
+        sys.exit(f"Could not parse wallet descriptor: {e}")
+
+    store = None
+    if args.store_dir:
+        descriptor_checksum = get_descriptor_checksum(pubkeys_info)
+        try:
+            store = DerivationStore(
+                path=get_default_store_path(
+                    descriptor_checksum=descriptor_checksum, store_dir=args.store_dir
+                ),
+                descriptor_checksum=descriptor_checksum,
+            )
+        except DerivationStoreError as e:
+            sys.exit(str(e))
+
+    addresses = get_addresses(
+        pubkey_dicts=pubkeys_info["pubkey_dicts"],
+        quorum_m=pubkeys_info["quorum_m"],
+        quorum_n=pubkeys_info["quorum_n"],
+        limit=args.limit,
+        offset=args.offset,
+        is_testnet=pubkeys_info["is_testnet"],
+        workers=args.workers,
+        store=store,
+    )
+
+    def to_lines():
+        if args.format == "csv":
+            yield "index,address\n"
+        # Written as we go so memory use doesn't grow with --limit
+        for index, address in addresses:
+            if args.format == "jsonl":
+                yield json.dumps({"index": index, "address": address}) + "\n"
+            else:
+                yield f"{index},{address}\n"
+
+    try:
+        _write_stdout(to_lines())
+    except DerivationStoreError as e:
+        # Corruption is only found as records are read, after some were written
+        sys.exit(f"Derivation store error after writing some addresses: {e}")
+    finally:
+        addresses.close()
+        if store is not None:
+            store.close()
+
+
+def _read_first_words_list(path):
+    # One partial mnemonic per line, blank lines and # comments are skipped
+    if path and path != "-":
+        with open(path, "r") as f:
+            lines = f.readlines()
+    else:
+        lines = sys.stdin.readlines()
+    to_return = []
+    for cnt, line in enumerate(lines):
+        line = line.split("#")[0].strip()
+        if line:
+            to_return.append((cnt + 1, line.lower()))
+    return to_return
+
+
+def seedpicker(args):
+    first_words_list = _read_first_words_list(args.file)
+    if not first_words_list:
+        sys.exit("No partial seed phrases supplied")
+
+    results = pick_last_words(
+        first_words_list=[x[1] for x in first_words_list],
+        is_testnet=args.testnet,
+        workers=args.workers,
+    )
+
+    errors = []
+
+    def to_lines():
+        if args.format == "csv":
+            yield "line,last_word,xfp,path,xpub\n"
+        for (line_num, _), result in zip(first_words_list, results):
+            if "error" in result:
+                errors.append(f"Line {line_num}: {result['error']}")
+            if args.format == "jsonl":
+                to_write = {"line": line_num}
+                to_write.update({k: v for k, v in result.items() if k != "first_words"})
+                yield json.dumps(to_write) + "\n"
+            else:
+                yield "{},{},{},{},{}\n".format(
+                    line_num,
+                    result.get("last_word", ""),
+                    result.get("xfp", ""),
+                    result.get("path", ""),
+                    result.get("xpub", ""),
+                )
+
+    try:
+        _write_stdout(to_lines())
+    except DerivationStoreError as e:
+        # Corruption is only found as records are read, after some were written
+        sys.exit(f"Derivation store error after writing some addresses: {e}")
+    finally:
+        results.close()
+
+    if errors:
+        sys.exit("\n".join(errors))
+
+
+def _read_psbts(paths):
+    """
+    Returns a list of (name, PSBT) from files, directories of .psbt files, or
+    stdin (for no paths or -). Files are returned as a Path (sign_psbts reads
+    them), stdin as base64.
+    """
+    to_return = []
+    for path in paths or ["-"]:
+        if path == "-":
+            for cnt, psbt_b64 in enumerate(split_psbts(sys.stdin.read())):
+                to_return.append((f"stdin-{cnt + 1}", psbt_b64))
+        elif os.path.isdir(path):
+            for filename in sorted(os.listdir(path)):
+                if filename.endswith(".psbt"):
+                    to_return.append((filename[: -len(".psbt")], Path(path, filename)))
+        else:
+            name = os.path.basename(path)
+            if name.endswith(".psbt"):
+                name = name[: -len(".psbt")]
+            to_return.append((name, Path(path)))
+    return to_return
+
+
+def _read_seed_phrase(args):
+    if args.seed_file:
+        with open(args.seed_file, "r") as f:
+            return " ".join(f.read().split())
+    # getpass reads from the terminal, so this works when PSBTs come from stdin
+    return " ".join(getpass.getpass("Seed phrase (input hidden): ").split())
+
+
+def sign(args):
+    if args.binary and not args.output_dir:
+        sys.exit("--binary needs --output-dir")
+    names_and_psbts = _read_psbts(args.psbts)
+    if not names_and_psbts:
+        sys.exit("No PSBTs supplied")
+    names = [x[0] for x in names_and_psbts]
+
+    try:
+        results = sign_psbts(
+            psbt_strs=[x[1] for x in names_and_psbts],
+            seed_phrase=_read_seed_phrase(args),
+            testnet={"auto": None, "mainnet": False, "testnet": True}[args.network],
+            workers=args.workers,
+        )
+    except PSBTError as e:
+        sys.exit(" - ".join(x for x in (e.main_text, e.informative_text) if x))
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    signed_lines = []
+    for name, result in zip(names, results):
+        if not result["signed_b64"]:
+            continue
+        if args.output_dir:
+            path = os.path.join(args.output_dir, f"{name}.signed.psbt")
+            if args.binary:
+                write_psbt_file(result["signed_b64"], path)
+            else:
+                with open(path, "w") as f:
+                    f.write(result["signed_b64"] + "\n")
+        else:
+            signed_lines.append(result["signed_b64"] + "\n")
+
+    # Summary to stderr so stdout is just the signed PSBTs
+    print(get_batch_summary(names=names, results=results), file=sys.stderr)
+    _write_stdout(signed_lines)
+
+    if any(x["error"] is not None for x in results):
+        sys.exit(1)
+
+
+def scan_qr(args):
+    try:
+        result = decode_qr_images(paths=args.images, workers=args.workers)
+    except QRDecodeError as e:
+        sys.exit(str(e))
+
+    for path, error in result["errors"]:
+        print(f"{path}: {error}", file=sys.stderr)
+    for progress in result["incomplete"]:
+        print(f"Incomplete animated QR ({progress:.0%} decoded)", file=sys.stderr)
+    # One per line, so PSBTs can be piped to `multiwallet sign`
+    _write_stdout(x + "\n" for x in result["payloads"])
+
+    if not result["payloads"]:
+        sys.exit(1)
+
+
+def _positive_int(value):
+    value = int(value)
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return value
+
+
+def _non_negative_int(value):
+    value = int(value)
+    if value < 0:
+        raise argparse.ArgumentTypeError("must be at least 0")
+    return value
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="multiwallet", description="Stateless multisig bitcoin wallet (headless)"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    derive_parser = subparsers.add_parser(
+        "derive", help="Derive addresses from a wallet descriptor"
+    )
+    derive_parser.add_argument(
+        "descriptor",
+        nargs="?",
+        help="Wallet descriptor (read from stdin if omitted or -)",
+    )
+    derive_parser.add_argument(
+        "-f", "--file", help="Read the wallet descriptor from this file"
+    )
+    derive_parser.add_argument(
+        "--limit",
+        type=_positive_int,
+        default=5,
+        help="Number of addresses to derive (default: %(default)s)",
+    )
+    derive_parser.add_argument(
+        "--offset",
+        type=_non_negative_int,
+        default=0,
+        help="First address index to derive (default: %(default)s)",
+    )
+    derive_parser.add_argument(
+        "--format",
+        choices=("csv", "jsonl"),
+        default="csv",
+        help="Output format (default: %(default)s)",
+    )
+    derive_parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=1,
+        help="Number of processes to derive with (default: %(default)s)",
+    )
+    derive_parser.add_argument(
+        "--store-dir",
+        nargs="?",
+        const=DEFAULT_STORE_DIR,
+        help=f"Cache derived addresses in this directory (default if no value given: {DEFAULT_STORE_DIR})",
+    )
+    derive_parser.set_defaults(func=derive)
+
+    seedpicker_parser = subparsers.add_parser(
+        "seedpicker",
+        help="Calculate the last word and multisig xpub for a file of partial seed phrases",
+    )
+    seedpicker_parser.add_argument(
+        "file",
+        nargs="?",
+        help="File with the first 23 words of a seed phrase per line (read from stdin if omitted or -)",
+    )
+    seedpicker_parser.add_argument(
+        "--testnet",
+        action="store_true",
+        help="Export testnet xpubs (m/48'/1'/0'/2') instead of mainnet (m/48'/0'/0'/2')",
+    )
+    seedpicker_parser.add_argument(
+        "--format",
+        choices=("csv", "jsonl"),
+        default="csv",
+        help="Output format (default: %(default)s)",
+    )
+    seedpicker_parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=None,
+        help="Number of processes to derive keys with (default: all cores)",
+    )
+    seedpicker_parser.set_defaults(func=seedpicker)
+
+    sign_parser = subparsers.add_parser(
+        "sign", help="Validate and sign a batch of PSBTs with one seed phrase"
+    )
+    sign_parser.add_argument(
+        "psbts",
+        nargs="*",
+        help=".psbt files (binary or base64) and/or directories of them (base64 PSBTs are read from stdin if omitted or -)",
+    )
+    sign_parser.add_argument(
+        "--output-dir",
+        help="Write each signed PSBT to NAME.signed.psbt here (default: print them to stdout, one per line)",
+    )
+    sign_parser.add_argument(
+        "--binary",
+        action="store_true",
+        help="Write binary (BIP174) .psbt files to --output-dir instead of base64",
+    )
+    sign_parser.add_argument(
+        "--seed-file",
+        help="Read the seed phrase from this file (default: prompt for it)",
+    )
+    sign_parser.add_argument(
+        "--network",
+        choices=("auto", "mainnet", "testnet"),
+        default="auto",
+        help="Network of the PSBTs (default: %(default)s, inferred from the BIP32 paths)",
+    )
+    sign_parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=None,
+        help="Number of processes to sign with (default: all cores)",
+    )
+    sign_parser.set_defaults(func=sign)
+
+    scan_qr_parser = subparsers.add_parser(
+        "scan-qr",
+        help="Decode QR codes (including animated QRs) from images or folders of frames",
+    )
+    scan_qr_parser.add_argument(
+        "images",
+        nargs="+",
+        help="Image files and/or directories of them, animated QR frames can be in any order",
+    )
+    scan_qr_parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=None,
+        help="Number of processes to decode with (default: all cores)",
+    )
+    scan_qr_parser.set_defaults(func=scan_qr)
+
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+#! /usr/bin/env bash
+
+# Multisig (p2wsh sortedmulti) address derivation from a wallet descriptor
+
+import multiprocessing
+import os
+import re
+
+from collections import OrderedDict
+from functools import lru_cache
+
+from buidl.hd import HDPublicKey
+from buidl.helper import sha256
+from buidl.op import OP_CODE_NAMES_LOOKUP
+from buidl.script import P2WSHScriptPubKey, WitnessScript
+
+from multiwallet_core.metrics import span, timed
+
+# TODO: package with libsec
+
+# Leaf pubkeys are cached by (xpub, branch, index) as raw 33-byte SEC, in the
+# parent process (pooled derivation adds what its workers derived, see _derive).
+# 2**16 entries is ~10 MB and covers a 10k address run for a 3-of-5 quorum (or a
+# 20k run for 2-of-3), so overlapping offsets and re-submits skip the EC math.
+LEAF_SEC_CACHE_SIZE = 2 ** 16
+BRANCH_PUBKEY_CACHE_SIZE = 64
+
+
+@lru_cache(maxsize=BRANCH_PUBKEY_CACHE_SIZE)
+def _get_branch_pubkey_obj(xpub, branch):
+    return HDPublicKey.parse(xpub).child(index=branch)
+
+
+class _LeafSecCache:
+    """
+    LRU cache like functools.lru_cache, except it can be checked and filled
+    without deriving: the pooled path only sends the parent's misses to the pool,
+    and keeps what the pool derived.
+
+    No lock (a forked pool worker could inherit it held), each OrderedDict call is
+    atomic and an entry evicted by another thread is just a miss.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            self.entries.move_to_end(key)
+            sec = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return sec
+
+    def put(self, key, sec):
+        self.entries[key] = sec
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            try:
+                self.entries.popitem(last=False)
+            except KeyError:
+                pass
+
+    def has_all(self, keys):
+        return all(x in self.entries for x in keys)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+_leaf_sec_cache = _LeafSecCache(maxsize=LEAF_SEC_CACHE_SIZE)
+
+
+def _get_leaf_sec(xpub, branch, index):
+    key = (xpub, branch, index)
+    sec = _leaf_sec_cache.get(key)
+    if sec is None:
+        sec = _get_branch_pubkey_obj(xpub, branch).child(index=index).sec()
+        _leaf_sec_cache.put(key, sec)
+    return sec
+
+
+def get_cache_stats():
+    """
+    Hit/miss/size counters for the derivation caches (for sizing LEAF_SEC_CACHE_SIZE).
+    """
+    info = _get_branch_pubkey_obj.cache_info()
+    return {
+        "branch_pubkey": {
+            "hits": info.hits,
+            "misses": info.misses,
+            "maxsize": info.maxsize,
+            "currsize": info.currsize,
+        },
+        "leaf_sec": {
+            "hits": _leaf_sec_cache.hits,
+            "misses": _leaf_sec_cache.misses,
+            "maxsize": _leaf_sec_cache.maxsize,
+            "currsize": len(_leaf_sec_cache.entries),
+        },
+    }
+
+
+def clear_caches():
+    _get_branch_pubkey_obj.cache_clear()
+    _leaf_sec_cache.clear()
+
+
+def _re_pubkey_info_from_descriptor_fragment(fragment):
+    xfp, path, xpub, idx = re.match(
+        "\[([0-9a-f]+)\*?(.*?)\]([0-9A-Za-z]+).*([0-9]+?)",  # noqa: W605
+        fragment,
+    ).groups()
+    return {
+        "xfp": xfp,
+        "path": path.replace("\\/", "/").lstrip("/"),
+        "xpub": xpub,
+        "idx": int(idx),
+    }
+
+
+@timed("descriptor.parse")
+def _get_pubkeys_info_from_descriptor(descriptor):
+    re_results = re.findall("wsh\(sortedmulti\((.*)\)\)", descriptor)  # noqa: W605
+    parts = re_results[0].split(",")
+    quorum_m = int(parts.pop(0))
+    quorum_n = len(parts)  # remaining entries are pubkeys with fingerprint/path
+    assert 0 < quorum_m <= quorum_n
+
+    pubkey_dicts = []
+    for fragment in parts:
+        pubkey_info = _re_pubkey_info_from_descriptor_fragment(fragment=fragment)
+        pubkey_info["parent_pubkey_obj"] = HDPublicKey.parse(pubkey_info["xpub"])
+        pubkey_info["child_pubkey_obj"] = _get_branch_pubkey_obj(
+            pubkey_info["xpub"], pubkey_info["idx"]
+        )
+        pubkey_dicts.append(pubkey_info)
+
+    # safety check
+    all_pubkeys = [x["xpub"] for x in pubkey_dicts]
+    assert (
+        len(set([x[:4] for x in all_pubkeys])) == 1
+    ), "ERROR: multiple conflicting networks in pubkeys: {}".format(all_pubkeys)
+
+    xpub_prefix = all_pubkeys[0][:4]
+    if xpub_prefix == "tpub":
+        is_testnet = True
+    elif xpub_prefix == "xpub":
+        is_testnet = False
+    else:
+        raise Exception(f"Invalid xpub prefix: {xpub_prefix}")
+
+    return {
+        "is_testnet": is_testnet,
+        "quorum_m": quorum_m,
+        "quorum_n": quorum_n,
+        "pubkey_dicts": pubkey_dicts,
+    }
+
+
+def _get_witness_script_hash(pubkey_dicts, quorum_m, quorum_n, index):
+    secs_to_use = [_get_leaf_sec(x["xpub"], x["idx"], index) for x in pubkey_dicts]
+
+    commands = [OP_CODE_NAMES_LOOKUP["OP_{}".format(quorum_m)]]
+    commands.extend(sorted(secs_to_use))  # BIP67
+    commands.append(OP_CODE_NAMES_LOOKUP["OP_{}".format(quorum_n)])
+    commands.append(OP_CODE_NAMES_LOOKUP["OP_CHECKMULTISIG"])
+    witness_script = WitnessScript(commands)
+    return sha256(witness_script.raw_serialize())
+
+
+def _get_address_from_witness_script_hash(witness_script_hash, is_testnet):
+    redeem_script = P2WSHScriptPubKey(witness_script_hash)
+    return redeem_script.address(testnet=is_testnet)
+
+
+@timed("derivation.get_address")
+def _get_address(pubkey_dicts, quorum_m, quorum_n, index, is_testnet):
+    witness_script_hash = _get_witness_script_hash(
+        pubkey_dicts=pubkey_dicts, quorum_m=quorum_m, quorum_n=quorum_n, index=index
+    )
+    return _get_address_from_witness_script_hash(
+        witness_script_hash=witness_script_hash, is_testnet=is_testnet
+    )
+
+
+def _derive(pubkey_dicts, quorum_m, quorum_n, limit, offset, is_testnet, workers):
+    # Yields (index, witness_script_hash, address)
+    indices = range(offset, offset + limit)
+    if workers > 1 and limit >= PARALLEL_DERIVE_MIN_ADDRESSES:
+        # Only indices missing from the leaf cache are worth sending to a pool
+        to_shard = [
+            index
+            for index in indices
+            if not _leaf_sec_cache.has_all(
+                (x["xpub"], x["idx"], index) for x in pubkey_dicts
+            )
+        ]
+        if len(to_shard) >= PARALLEL_DERIVE_MIN_ADDRESSES:
+            yield from _derive_parallel(
+                pubkey_dicts=pubkey_dicts,
+                quorum_m=quorum_m,
+                quorum_n=quorum_n,
+                indices=indices,
+                to_shard=to_shard,
+                is_testnet=is_testnet,
+                workers=workers,
+            )
+            return
+
+    for index in indices:
+        with span("derivation.get_address"):
+            witness_script_hash = _get_witness_script_hash(
+                pubkey_dicts=pubkey_dicts,
+                quorum_m=quorum_m,
+                quorum_n=quorum_n,
+                index=index,
+            )
+            address = _get_address_from_witness_script_hash(
+                witness_script_hash=witness_script_hash, is_testnet=is_testnet
+            )
+        yield index, witness_script_hash, address
+
+
+def get_addresses(
+    pubkey_dicts,
+    quorum_m,
+    quorum_n,
+    limit,
+    offset,
+    is_testnet,
+    workers=1,
+    store=None,
+):
+    """
+    Yield (index, address) for indices offset..offset+limit-1, in order.
+
+    workers > 1 spreads the derivation of larger ranges
+    (PARALLEL_DERIVE_MIN_ADDRESSES+) across a process pool (see _derive_parallel),
+    workers=None uses every available core.
+
+    store is an optional DerivationStore for this descriptor: indices it already
+    has are served from disk with no EC math, and newly derived indices that extend
+    it are appended.
+    """
+    if workers is None:
+        workers = get_default_workers()
+
+    # Use generator for iterative display
+    if store is None:
+        for index, _, address in _derive(
+            pubkey_dicts=pubkey_dicts,
+            quorum_m=quorum_m,
+            quorum_n=quorum_n,
+            limit=limit,
+            offset=offset,
+            is_testnet=is_testnet,
+            workers=workers,
+        ):
+            yield index, address
+        return
+
+    cached_end = max(offset, min(offset + limit, len(store)))
+    for index in range(offset, cached_end):
+        yield index, _get_address_from_witness_script_hash(
+            witness_script_hash=store.get_witness_script_hash(index),
+            is_testnet=is_testnet,
+        )
+
+    to_store = []
+    try:
+        for index, witness_script_hash, address in _derive(
+            pubkey_dicts=pubkey_dicts,
+            quorum_m=quorum_m,
+            quorum_n=quorum_n,
+            limit=offset + limit - cached_end,
+            offset=cached_end,
+            is_testnet=is_testnet,
+            workers=workers,
+        ):
+            # Only contiguous indices can be stored (record n is index n)
+            if index == len(store) + len(to_store):
+                to_store.append((index, witness_script_hash))
+                if len(to_store) >= STORE_APPEND_BATCH_SIZE:
+                    batch, to_store = to_store, []
+                    store.append(batch)
+            yield index, address
+    finally:
+        # Keep whatever was derived, even if the caller stopped early
+        store.append(to_store)
+
+
+# Below this many addresses (not already in the leaf cache) a process pool costs
+# more to start (a re-import of buidl in every worker with spawn) than it saves
+PARALLEL_DERIVE_MIN_ADDRESSES = 100
+
+# Derived records are written to a DerivationStore in batches of this many
+STORE_APPEND_BATCH_SIZE = 1000
+
+# Upper bound on the number of indices a pool worker derives per task.
+# Small enough that results stream back steadily, big enough to amortize IPC.
+MAX_SHARD_SIZE = 500
+
+# Per-process state for pool workers, populated once by _init_shard_worker
+_SHARD_WORKER_STATE = {}
+
+
+def get_default_workers():
+    return os.cpu_count() or 1
+
+
+def _get_shards(indices, workers):
+    # Aim for several shards per worker so that slow shards don't leave cores idle
+    shard_size = max(1, min(MAX_SHARD_SIZE, -(-len(indices) // (workers * 4))))
+    for start in range(0, len(indices), shard_size):
+        end = start + shard_size
+        yield indices[start:end]
+
+
+def _init_shard_worker(xpub_idxs, quorum_m, quorum_n, is_testnet):
+    # Only plain xpub strings cross the process boundary (HD key objects aren't
+    # guaranteed to pickle when libsec is installed). Each worker rebuilds the
+    # cosigner branch keys once, into its own _get_branch_pubkey_obj cache.
+    for xpub, idx in xpub_idxs:
+        _get_branch_pubkey_obj(xpub, idx)
+    _SHARD_WORKER_STATE.update(
+        pubkey_dicts=[{"xpub": xpub, "idx": idx} for xpub, idx in xpub_idxs],
+        quorum_m=quorum_m,
+        quorum_n=quorum_n,
+        is_testnet=is_testnet,
+    )
+
+
+def _derive_shard(indices):
+    state = _SHARD_WORKER_STATE
+    to_return = []
+    for index in indices:
+        # Only shows up in a MULTIWALLET_METRICS_LOG (this is a worker process)
+        with span("derivation.get_address"):
+            witness_script_hash = _get_witness_script_hash(
+                pubkey_dicts=state["pubkey_dicts"],
+                quorum_m=state["quorum_m"],
+                quorum_n=state["quorum_n"],
+                index=index,
+            )
+            # Encode addresses here too, bech32 is slow enough to bottleneck the parent
+            address = _get_address_from_witness_script_hash(
+                witness_script_hash=witness_script_hash,
+                is_testnet=state["is_testnet"],
+            )
+        # For the parent's leaf cache, this process's is thrown away with the pool
+        secs = [
+            _get_leaf_sec(x["xpub"], x["idx"], index) for x in state["pubkey_dicts"]
+        ]
+        to_return.append((witness_script_hash, address, secs))
+    return to_return
+
+
+def _derive_parallel(
+    pubkey_dicts, quorum_m, quorum_n, indices, to_shard, is_testnet, workers
+):
+    """
+    Split the to_shard indices into shards and derive them across a process pool,
+    the rest of indices come from the parent's leaf cache.
+
+    Pool.imap hands back shard results in submission order, so results are yielded
+    in index order as soon as the shard containing them (and every shard before it)
+    is done. Closing the generator early terminates the pool.
+    """
+    xpub_idxs = [(x["xpub"], x["idx"]) for x in pubkey_dicts]
+    with multiprocessing.Pool(
+        processes=workers,
+        initializer=_init_shard_worker,
+        initargs=(xpub_idxs, quorum_m, quorum_n, is_testnet),
+    ) as pool:
+        shards = list(_get_shards(indices=to_shard, workers=workers))
+        pooled = (
+            (index, result)
+            for shard, results in zip(shards, pool.imap(_derive_shard, shards))
+            for index, result in zip(shard, results)
+        )
+        next_pooled = next(pooled, None)
+        for index in indices:
+            if next_pooled is not None and next_pooled[0] == index:
+                witness_script_hash, address, secs = next_pooled[1]
+                for (xpub, idx), sec in zip(xpub_idxs, secs):
+                    _leaf_sec_cache.put((xpub, idx, index), sec)
+                next_pooled = next(pooled, None)
+            else:
+                # Cached (unless evicted since, then it's derived here)
+                witness_script_hash = _get_witness_script_hash(
+                    pubkey_dicts=pubkey_dicts,
+                    quorum_m=quorum_m,
+                    quorum_n=quorum_n,
+                    index=index,
+                )
+                address = _get_address_from_witness_script_hash(
+                    witness_script_hash=witness_script_hash, is_testnet=is_testnet
+                )
+            yield index, witness_script_hash, address
@@ -0,0 +1,16 @@
+#! /usr/bin/env bash
+
+
+def _clean_submisission(string):
+    # TODO: more advanced regex
+    return string.replace("  ", " ").strip()
+
+
+def _is_libsec_enabled():
+    # TODO: move to buidl
+    try:
+        from buidl import cecc  # noqa: F401
+
+        return True
+    except ModuleNotFoundError:
+        return False
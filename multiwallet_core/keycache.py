@@ -0,0 +1,147 @@
+#! /usr/bin/env bash
+
+# In-memory caches of BIP32 keys: the (opt-in) session master key cache, and a
+# derivation trie so paths with a common prefix only derive it once
+
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+from buidl.ecc import PrivateKey
+from buidl.hd import HDPrivateKey
+
+from multiwallet_core.metrics import increment, span, timed
+
+DEFAULT_TTL_SECONDS = 5 * 60
+
+
+def _wipe(buf):
+    # Overwrite in place (same length slice assignment doesn't reallocate)
+    buf[:] = bytes(len(buf))
+
+
+class MasterKeyCache:
+    """
+    Maps seed phrases to their master key for ttl_seconds after they are first
+    derived (the TTL is not extended on use).
+
+    Entries are keyed by an HMAC-SHA256 of the phrase under a random per-cache
+    salt, so the phrase itself is never stored. The master secret and chain code
+    are kept in a bytearray that is zeroed when the entry expires or is
+    forgotten.
+
+    Python can't wipe the immutable ints/bytes inside the HDPrivateKey objects
+    handed out by get(), those are left to the garbage collector as before.
+
+    Safe to use from several threads (the GUI signs off its main thread).
+    """
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._salt = os.urandom(32)
+        # {salted_hash: (expires_at, is_testnet, bytearray(secret + chain_code))}
+        self._entries = {}
+        # Reentrant, get() and __len__() call expire()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        with self._lock:
+            self.expire()
+            return len(self._entries)
+
+    def _get_key(self, seed_phrase, is_testnet):
+        msg = f"{'testnet' if is_testnet else 'mainnet'}:{seed_phrase}".encode()
+        return hmac.new(self._salt, msg, hashlib.sha256).digest()
+
+    def get(self, seed_phrase, is_testnet):
+        """
+        Returns the cached HDPrivateKey for seed_phrase, or None.
+        """
+        with self._lock:
+            self.expire()
+            entry = self._entries.get(self._get_key(seed_phrase, is_testnet))
+            if entry is None:
+                return None
+            _, is_testnet, buf = entry
+            secret, chain_code = int.from_bytes(buf[:32], "big"), bytes(buf[32:])
+        return HDPrivateKey(
+            private_key=PrivateKey(secret=secret),
+            chain_code=chain_code,
+            testnet=is_testnet,
+        )
+
+    def put(self, seed_phrase, is_testnet, hd_priv):
+        key = self._get_key(seed_phrase, is_testnet)
+        buf = bytearray(hd_priv.private_key.secret.to_bytes(32, "big"))
+        buf.extend(hd_priv.chain_code)
+        with self._lock:
+            if key in self._entries:
+                _wipe(self._entries.pop(key)[2])
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, is_testnet, buf)
+
+    def get_or_derive(self, seed_phrase, is_testnet):
+        hd_priv = self.get(seed_phrase, is_testnet)
+        if hd_priv is None:
+            increment("keycache.miss")
+            with span("hd.from_mnemonic"):
+                hd_priv = HDPrivateKey.from_mnemonic(seed_phrase, testnet=is_testnet)
+            self.put(seed_phrase, is_testnet, hd_priv)
+        else:
+            increment("keycache.hit")
+        return hd_priv
+
+    def expire(self):
+        # Wipe and drop entries past their TTL
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, v in self._entries.items() if v[0] <= now]:
+                _wipe(self._entries.pop(key)[2])
+
+    def forget(self):
+        # Wipe and drop every entry
+        with self._lock:
+            for _, _, buf in self._entries.values():
+                _wipe(buf)
+            self._entries.clear()
+
+
+class _TrieNode:
+    __slots__ = ("hd_key", "children")
+
+    def __init__(self, hd_key):
+        self.hd_key = hd_key
+        self.children = {}
+
+
+class DerivationTrie:
+    """
+    Derives BIP32 paths from root_hd_key, deriving each shared prefix only once.
+
+    Paths like m/48'/0'/0'/2'/0/5 and m/48'/0'/0'/2'/1/0 share their hardened
+    account prefix, so signing a PSBT with hundreds of inputs derives the account
+    key and each branch (/0, /1) once, then one level per path.
+
+    Derived keys are held for the lifetime of the trie, keep it short lived.
+    """
+
+    def __init__(self, root_hd_key):
+        self._root = _TrieNode(root_hd_key)
+
+    @timed("hd.traverse")
+    def traverse(self, path):
+        # Same path format as HDPrivateKey.traverse ("m/48'/0'/0'/2'/0/5", or h)
+        node = self._root
+        for component in path.lower().replace("h", "'").split("/")[1:]:
+            if component.endswith("'"):
+                index = int(component[:-1]) + 0x80000000
+            else:
+                index = int(component)
+            child = node.children.get(index)
+            if child is None:
+                increment("hd.child_derivations")
+                child = _TrieNode(node.hd_key.child(index))
+                node.children[index] = child
+            node = child
+        return node.hd_key
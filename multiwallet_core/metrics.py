@@ -0,0 +1,260 @@
+#! /usr/bin/env bash
+
+# Opt-in timings (spans) and counters for the expensive operations, so a slow
+# machine can be told apart from one that's just missing libsec.
+#
+# Disabled by default, where a span is a global lookup returning a shared no-op
+# object. Enable them with enable_metrics() (the GUI's hidden diagnostics panel,
+# Ctrl+Shift+D), or for any process with MULTIWALLET_METRICS=1 or
+# MULTIWALLET_METRICS_LOG=spans.jsonl (which also logs each span as a JSON line).
+#
+# Summaries only cover this process. Worker processes inherit the environment
+# variables though, so with a JSONL log they add their spans to it too.
+
+import functools
+import json
+import os
+import random
+import threading
+import time
+
+METRICS_ENV_VAR = "MULTIWALLET_METRICS"
+METRICS_LOG_ENV_VAR = "MULTIWALLET_METRICS_LOG"
+
+# Durations kept per span name for percentiles (a random sample after that),
+# count/total/max are always exact
+MAX_SAMPLES = 10_000
+
+
+class _SpanStats:
+    __slots__ = ("count", "total_s", "max_s", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.samples = []
+
+    def add(self, duration_s):
+        self.count += 1
+        self.total_s += duration_s
+        self.max_s = max(self.max_s, duration_s)
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(duration_s)
+        else:
+            # Reservoir sampling, so every duration is equally likely to be kept
+            index = random.randrange(self.count)
+            if index < MAX_SAMPLES:
+                self.samples[index] = duration_s
+
+
+def _get_percentile(sorted_values, percentile):
+    # Nearest-rank
+    index = max(0, -(-len(sorted_values) * percentile // 100) - 1)
+    return sorted_values[int(index)]
+
+
+class _Metrics:
+    def __init__(self):
+        # Spans are recorded from GUI worker threads too
+        self.lock = threading.Lock()
+        # {name: _SpanStats}
+        self.spans = {}
+        # {name: int}
+        self.counters = {}
+        self.jsonl_path = None
+        self.jsonl_file = None
+
+    def set_jsonl_path(self, jsonl_path):
+        # Line buffered appends, so processes can share one log
+        jsonl_file = open(jsonl_path, "a", buffering=1) if jsonl_path else None
+        with self.lock:
+            if self.jsonl_file is not None:
+                self.jsonl_file.close()
+            self.jsonl_path, self.jsonl_file = jsonl_path, jsonl_file
+
+    def _log(self, record):
+        # Called with the lock held
+        if self.jsonl_file is not None:
+            record["time"] = time.time()
+            record["pid"] = os.getpid()
+            self.jsonl_file.write(json.dumps(record) + "\n")
+
+    def record_span(self, name, duration_s):
+        with self.lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = _SpanStats()
+            stats.add(duration_s)
+            self._log({"type": "span", "name": name, "ms": duration_s * 1000})
+
+    def increment(self, name, value):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            self._log({"type": "counter", "name": name, "value": value})
+
+    def get_summary(self):
+        with self.lock:
+            spans = {}
+            for name, stats in self.spans.items():
+                samples = sorted(stats.samples)
+                spans[name] = {
+                    "count": stats.count,
+                    "total_ms": stats.total_s * 1000,
+                    "p50_ms": _get_percentile(samples, 50) * 1000,
+                    "p95_ms": _get_percentile(samples, 95) * 1000,
+                    "max_ms": stats.max_s * 1000,
+                }
+            return {"spans": spans, "counters": dict(self.counters)}
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "started_at")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.record_span(self.name, time.perf_counter() - self.started_at)
+        return False
+
+
+# None while disabled
+_metrics = None
+# The parent's _Metrics in a forked child, kept so its log file is never closed
+# (which could block on a buffer lock held at the fork)
+_forked_metrics = None
+
+
+def is_metrics_enabled():
+    return _metrics is not None
+
+
+def enable_metrics(jsonl_path=None):
+    """
+    Starts collecting (keeping anything collected so far), and logs each span and
+    counter to jsonl_path if given.
+    """
+    global _metrics
+    if _metrics is None:
+        _metrics = _Metrics()
+    if jsonl_path:
+        _metrics.set_jsonl_path(jsonl_path)
+
+
+def disable_metrics():
+    # Stops collecting, and drops what was collected
+    global _metrics
+    if _metrics is not None:
+        _metrics.set_jsonl_path(None)
+        _metrics = None
+
+
+def get_metrics_jsonl_path():
+    return None if _metrics is None else _metrics.jsonl_path
+
+
+def span(name):
+    """
+    Context manager timing its block under name:
+        with span("psbt.sign_with_private_keys"):
+            ...
+    """
+    if _metrics is None:
+        return _NOOP_SPAN
+    return _Span(_metrics, name)
+
+
+def timed(name):
+    # Decorator version of span()
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _metrics is None:
+                return func(*args, **kwargs)
+            with _Span(_metrics, name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def increment(name, value=1):
+    if _metrics is not None:
+        _metrics.increment(name, value)
+
+
+def get_metrics_summary():
+    """
+    Returns {"spans": {name: {count, total_ms, p50_ms, p95_ms, max_ms}},
+    "counters": {name: value}}, both empty while disabled.
+    """
+    if _metrics is None:
+        return {"spans": {}, "counters": {}}
+    return _metrics.get_summary()
+
+
+def format_metrics_summary(summary):
+    lines = [
+        "{:<36} {:>8} {:>10} {:>10} {:>10} {:>10}".format(
+            "operation", "count", "p50 ms", "p95 ms", "max ms", "total ms"
+        )
+    ]
+    for name in sorted(summary["spans"]):
+        stats = summary["spans"][name]
+        lines.append(
+            "{:<36} {:>8,} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.1f}".format(
+                name,
+                stats["count"],
+                stats["p50_ms"],
+                stats["p95_ms"],
+                stats["max_ms"],
+                stats["total_ms"],
+            )
+        )
+    if summary["counters"]:
+        lines.append("")
+        lines.append("{:<36} {:>8}".format("counter", "value"))
+        for name in sorted(summary["counters"]):
+            lines.append("{:<36} {:>8,}".format(name, summary["counters"][name]))
+    return "\n".join(lines)
+
+
+def _reinit_after_fork():
+    # Pools are forked from threads while others may hold the lock (or be writing
+    # the log), leaving the child's copies held for good, so start over in the child
+    global _metrics, _forked_metrics
+    if _metrics is not None:
+        _forked_metrics, jsonl_path = _metrics, _metrics.jsonl_path
+        _metrics = _Metrics()
+        if jsonl_path:
+            _metrics.set_jsonl_path(jsonl_path)
+
+
+# Not on Windows (no fork) or Python 3.6
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+if os.environ.get(METRICS_LOG_ENV_VAR):
+    enable_metrics(jsonl_path=os.environ[METRICS_LOG_ENV_VAR])
+elif os.environ.get(METRICS_ENV_VAR, "") not in ("", "0"):
+    enable_metrics()
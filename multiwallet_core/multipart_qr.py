@@ -0,0 +1,245 @@
+#! /usr/bin/env bash
+
+# Animated (multipart) QR codes for payloads too large for one QR, like big PSBTs
+#
+# Each frame is one part, and the parts are fountain coded. Parts 1 to N are
+# the N fragments of the message as they are. Every part after that XORs a
+# pseudo-random subset of the fragments together, so a scanner that missed
+# some frames can fill them in from whichever later frames it catches.
+#
+# The idea is the same as BC-UR (Blockchain Commons' Uniform Resources), but
+# this is our own format and it is NOT compatible with UR readers:
+#   MWQR:<seq>/<fragments>/<message length>/<CRC32 hex>:<base32 data>
+# Everything is in the QR alphanumeric set, so it's denser than bytes mode.
+
+import base64
+import hashlib
+import math
+import zlib
+
+MULTIPART_QR_PREFIX = "MWQR:"
+
+DEFAULT_FRAGMENT_LEN = 200
+MAX_FRAGMENTS = 10_000
+# An animation loops over the plain fragments plus this many fountain parts per fragment
+DEFAULT_EXTRA_PARTS_PER_FRAGMENT = 1
+
+
+class MultipartQRError(Exception):
+    pass
+
+
+def is_multipart_qr_part(text):
+    return text.strip().upper().startswith(MULTIPART_QR_PREFIX)
+
+
+def _get_random_floats(checksum, seq):
+    # Deterministic floats in [0, 1), so encoder and decoder pick the same fragments
+    cnt = 0
+    while True:
+        digest = hashlib.sha256(f"{checksum}/{seq}/{cnt}".encode()).digest()
+        yield int.from_bytes(digest[:8], "big") / 2 ** 64
+        cnt += 1
+
+
+def _choose_fragments(seq, num_fragments, checksum):
+    """
+    Returns the sorted indexes of the fragments XORed together in part seq.
+    """
+    if seq <= num_fragments:
+        return [seq - 1]
+
+    random_floats = _get_random_floats(checksum=checksum, seq=seq)
+
+    # Degree d from the ideal soliton distribution (1/n for d=1, then 1/(d(d-1))),
+    # mostly low degrees so parts are cheap to peel once most fragments are in
+    weights = [1 / num_fragments]
+    weights.extend(1 / (d * (d - 1)) for d in range(2, num_fragments + 1))
+    target = next(random_floats) * sum(weights)
+    degree = 1
+    for degree, weight in enumerate(weights, start=1):
+        target -= weight
+        if target < 0:
+            break
+
+    # First degree indexes of a (partial) Fisher-Yates shuffle
+    indexes = list(range(num_fragments))
+    for i in range(degree):
+        j = i + int(next(random_floats) * (num_fragments - i))
+        indexes[i], indexes[j] = indexes[j], indexes[i]
+    return sorted(indexes[:degree])
+
+
+def _get_fragment_len(message_len, num_fragments):
+    return math.ceil(message_len / num_fragments) or 1
+
+
+def _xor_into(buf, data):
+    buf[:] = (int.from_bytes(buf, "big") ^ int.from_bytes(data, "big")).to_bytes(
+        len(buf), "big"
+    )
+
+
+class MultipartQREncoder:
+    """
+    Splits a message (str or bytes) into fragment_len byte fragments, and makes
+    the text of any part (frame) of the animated QR.
+
+        encoder = MultipartQREncoder(psbt_b64, fragment_len=200)
+        for part in encoder.get_animation_parts():
+            ...  # show each part as a QR frame, on a loop
+    """
+
+    def __init__(self, message, fragment_len=DEFAULT_FRAGMENT_LEN):
+        if isinstance(message, str):
+            message = message.encode()
+        if fragment_len < 1:
+            raise ValueError("fragment_len must be at least 1")
+        self.message_len = len(message)
+        self.checksum = zlib.crc32(message)
+        self.num_fragments = max(1, math.ceil(len(message) / fragment_len))
+        if self.num_fragments > MAX_FRAGMENTS:
+            raise ValueError(
+                f"More than {MAX_FRAGMENTS} fragments, use a larger fragment_len"
+            )
+        # Evened out, so the last fragment isn't mostly padding
+        self.fragment_len = _get_fragment_len(self.message_len, self.num_fragments)
+
+        padded = message.ljust(self.num_fragments * self.fragment_len, b"\x00")
+        self.fragments = []
+        for start in range(0, len(padded), self.fragment_len):
+            end = start + self.fragment_len
+            self.fragments.append(padded[start:end])
+
+    def get_part(self, seq):
+        # seq starts at 1, and any seq > num_fragments is a fountain coded part
+        data = bytearray(self.fragment_len)
+        for index in _choose_fragments(
+            seq=seq, num_fragments=self.num_fragments, checksum=self.checksum
+        ):
+            _xor_into(data, self.fragments[index])
+        return "{}{}/{}/{}/{:08X}:{}".format(
+            MULTIPART_QR_PREFIX,
+            seq,
+            self.num_fragments,
+            self.message_len,
+            self.checksum,
+            base64.b32encode(data).decode().rstrip("="),
+        )
+
+    def get_parts(self, num_parts):
+        return [self.get_part(seq) for seq in range(1, num_parts + 1)]
+
+    def get_animation_parts(
+        self, extra_parts_per_fragment=DEFAULT_EXTRA_PARTS_PER_FRAGMENT
+    ):
+        # The parts to show on a loop (a single fragment is just a regular QR)
+        if self.num_fragments == 1:
+            return self.get_parts(1)
+        return self.get_parts(self.num_fragments * (1 + extra_parts_per_fragment))
+
+
+def _parse_part(part):
+    try:
+        prefix, header, data = part.strip().upper().split(":")
+        seq, num_fragments, message_len, checksum = header.split("/")
+        data = base64.b32decode(data + "=" * (-len(data) % 8))
+        seq, num_fragments, message_len = int(seq), int(num_fragments), int(message_len)
+        checksum = int(checksum, 16)
+    except Exception as e:
+        raise MultipartQRError(f"Invalid multipart QR part: {e}")
+    is_valid = prefix + ":" == MULTIPART_QR_PREFIX and seq >= 1 and message_len >= 0
+    # Each part costs O(num_fragments), so don't trust any number we're sent
+    is_valid = is_valid and 1 <= num_fragments <= MAX_FRAGMENTS
+    if not is_valid or len(data) != _get_fragment_len(message_len, num_fragments):
+        raise MultipartQRError("Invalid multipart QR part")
+    return seq, (num_fragments, message_len, checksum), data
+
+
+class MultipartQRDecoder:
+    """
+    Rebuilds a message from the parts of an animated QR, in any order and with
+    any parts missing (as long as enough arrive).
+
+        decoder = MultipartQRDecoder()
+        while not decoder.is_complete():
+            decoder.receive_part(scan_qr())
+        message = decoder.get_message()
+    """
+
+    def __init__(self):
+        # (num_fragments, message_len, checksum) of the message being decoded
+        self.header = None
+        self.fragments = {}
+        # {fragment index: [(set of fragment indexes still XORed in, data), ...]}
+        # for the fountain coded parts we can't peel yet
+        self.mixed_parts_by_index = {}
+        self.seen_seqs = set()
+
+    def receive_part(self, part):
+        """
+        Returns True if the part was new. Raises MultipartQRError for parts that
+        aren't valid, or that belong to a different message.
+        """
+        seq, header, data = _parse_part(part)
+        if self.header is None:
+            self.header = header
+        elif header != self.header:
+            raise MultipartQRError("Part belongs to a different message")
+        if seq in self.seen_seqs:
+            return False
+        self.seen_seqs.add(seq)
+
+        num_fragments, _, checksum = self.header
+        indexes = _choose_fragments(
+            seq=seq, num_fragments=num_fragments, checksum=checksum
+        )
+        self._add_part(set(indexes), bytearray(data))
+        return True
+
+    def _reduce(self, indexes, data):
+        # XOR out the fragments we already have
+        for index in [x for x in indexes if x in self.fragments]:
+            _xor_into(data, self.fragments[index])
+            indexes.remove(index)
+
+    def _add_part(self, indexes, data):
+        self._reduce(indexes, data)
+        if len(indexes) > 1:
+            # Wait for all but one of its fragments (it stays listed under the
+            # others, and is skipped there once peeled)
+            for index in indexes:
+                self.mixed_parts_by_index.setdefault(index, []).append((indexes, data))
+            return
+        queue = [(indexes, data)]
+        while queue:
+            indexes, data = queue.pop()
+            self._reduce(indexes, data)
+            if len(indexes) != 1:
+                continue
+            # A new fragment, which may let us peel parts waiting on it
+            index = indexes.pop()
+            self.fragments[index] = bytes(data)
+            queue.extend(self.mixed_parts_by_index.pop(index, []))
+
+    def get_progress(self):
+        # Fraction of fragments recovered
+        if self.header is None:
+            return 0.0
+        return len(self.fragments) / self.header[0]
+
+    def is_complete(self):
+        return self.header is not None and len(self.fragments) == self.header[0]
+
+    def get_message(self):
+        """
+        Returns the message as bytes, once is_complete().
+        """
+        if not self.is_complete():
+            raise MultipartQRError("Not all parts have been received")
+        num_fragments, message_len, checksum = self.header
+        message = b"".join(self.fragments[i] for i in range(num_fragments))
+        message = message[:message_len]
+        if zlib.crc32(message) != checksum:
+            raise MultipartQRError("Checksum mismatch")
+        return message
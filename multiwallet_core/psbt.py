@@ -0,0 +1,759 @@
+#! /usr/bin/env bash
+
+# Decode, validate and sign multisig PSBTs
+
+import base64
+import hashlib
+import mmap
+import multiprocessing
+import os
+from io import BytesIO
+
+from buidl.ecc import PrivateKey
+from buidl.hd import HDPrivateKey
+from buidl.helper import hash256
+from buidl.psbt import PSBT
+from buidl.script import WitnessScript
+from buidl.op import OP_CODE_NAMES
+
+from multiwallet_core.derivation import get_default_workers
+from multiwallet_core.keycache import DerivationTrie
+from multiwallet_core.metrics import span, timed
+
+# The b"psbt\xff" magic every PSBT starts with, and its base64
+PSBT_MAGIC = b"psbt\xff"
+PSBT_BASE64_PREFIX = "cHNidP8"
+
+SIGHASH_ALL = b"\x01"
+
+# Below this many inputs a process pool costs more to start than it saves
+PARALLEL_SIGN_MIN_INPUTS = 20
+
+
+class PSBTError(Exception):
+    """
+    Raised when a PSBT can't be decoded, validated or signed.
+
+    The attributes line up with the arguments of the GUI's error dialog.
+    """
+
+    def __init__(self, main_text, informative_text=None, detailed_text=None):
+        super().__init__(main_text)
+        self.main_text = main_text
+        self.informative_text = informative_text
+        self.detailed_text = detailed_text
+
+
+# TODO: is there a standard to use here?
+# Inspired by https://github.com/trezor/trezor-firmware/blob/e23bb10ec49710cc2b2b993db9c907d3c7becf2c/core/src/apps/wallet/sign_tx/multisig.py#L37
+def _calculate_msig_digest(quorum_m, root_xfp_hexes):
+    fingerprints_to_hash = "-".join(sorted(root_xfp_hexes))
+    return hash256(f"{quorum_m}:{fingerprints_to_hash}".encode()).hex()
+
+
+def _get_witness_script_info(witness_script, is_testnet, cache):
+    """
+    Returns (quorum_m, address, str(witness_script)), quorum_m is None if it
+    doesn't start with OP_M. Memoized in cache (keyed by the serialized script).
+    """
+    key = witness_script.raw_serialize()
+    if key not in cache:
+        try:
+            quorum_m = OP_CODE_NAMES[witness_script.commands[0]].split("OP_")[1]
+        except Exception:
+            quorum_m = None
+        cache[key] = (
+            quorum_m,
+            witness_script.address(testnet=is_testnet),
+            str(witness_script),
+        )
+    return cache[key]
+
+
+def _get_msig_digest(quorum_m, root_xfp_hexes, cache):
+    # _calculate_msig_digest memoized in cache (keyed by quorum and fingerprint set)
+    key = (quorum_m, tuple(sorted(root_xfp_hexes)))
+    if key not in cache:
+        cache[key] = _calculate_msig_digest(
+            quorum_m=quorum_m, root_xfp_hexes=root_xfp_hexes
+        )
+    return cache[key]
+
+
+def _format_satoshis(sats, in_btc=False):
+    if in_btc:
+        btc = sats / 10 ** 8
+        return f"{btc:,.8f} BTC"
+    return f"{sats:,} sats"
+
+
+def _get_parse_error(e):
+    if type(e) is ValueError and str(e) == "Mainnet/Testnet mixing":
+        # TODO: less hackey way to catch this error?
+        return PSBTError(
+            main_text="PSBT Network Error",
+            informative_text="The network you selected doesn't match the PSBT.",
+            detailed_text=str(e),
+        )
+    return PSBTError(
+        main_text="PSBT Parse Error",
+        informative_text="Are you sure that's a valid PSBT?",
+        detailed_text=str(e),
+    )
+
+
+def parse_psbt(psbt_str, testnet=None):
+    """
+    Parse a base64 PSBT. testnet=None infers the network from the PSBT's BIP32 paths.
+    """
+    try:
+        return PSBT.parse_base64(b64=psbt_str, testnet=testnet)
+    except Exception as e:
+        raise _get_parse_error(e)
+
+
+def parse_psbt_file(path, testnet=None):
+    """
+    Parse a .psbt file, binary (BIP174) or base64 text.
+
+    Binary files are parsed straight from an mmap of the file, so a large PSBT
+    is never held in memory as bytes (let alone base64) on top of the parsed PSBT.
+    """
+    try:
+        f = open(path, "rb")
+    except OSError as e:
+        raise PSBTError(
+            main_text="Could not read PSBT file",
+            informative_text=str(path),
+            detailed_text=str(e),
+        )
+    with f:
+        if f.read(len(PSBT_MAGIC)) != PSBT_MAGIC:
+            f.seek(0)
+            try:
+                psbt_str = "".join(f.read().decode().split())
+            except UnicodeDecodeError as e:
+                raise _get_parse_error(e)
+            return parse_psbt(psbt_str=psbt_str, testnet=testnet)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as stream:
+            try:
+                return PSBT.parse(stream, testnet=testnet)
+            except Exception as e:
+                raise _get_parse_error(e)
+
+
+def _parse_psbt_source(psbt_src, testnet=None):
+    # psbt_src is a base64 PSBT, or the path of a .psbt file as an os.PathLike
+    if isinstance(psbt_src, os.PathLike):
+        return parse_psbt_file(path=psbt_src, testnet=testnet)
+    return parse_psbt(psbt_str=psbt_src, testnet=testnet)
+
+
+def get_psbt_source_digest(psbt_src):
+    """
+    SHA256 hex digest of a base64 PSBT or a .psbt file's contents (as an
+    os.PathLike), for noticing when the same PSBT is submitted again.
+    """
+    if not isinstance(psbt_src, os.PathLike):
+        return hashlib.sha256(psbt_src.encode()).hexdigest()
+    to_return = hashlib.sha256()
+    try:
+        with open(psbt_src, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                to_return.update(chunk)
+    except OSError as e:
+        raise PSBTError(
+            main_text="Could not read PSBT file",
+            informative_text=str(psbt_src),
+            detailed_text=str(e),
+        )
+    return to_return.hexdigest()
+
+
+def write_psbt_file(psbt, path):
+    """
+    Write a binary (BIP174) .psbt file from a PSBT object, its serialization or
+    its base64.
+    """
+    if isinstance(psbt, PSBT):
+        psbt = psbt.serialize()
+    elif isinstance(psbt, str):
+        psbt = base64.b64decode(psbt)
+    with open(path, "wb") as f:
+        f.write(psbt)
+
+
+def describe_psbt(psbt_obj, units="sats"):
+    """
+    Validate a multisig PSBT and describe what it does.
+
+    This tool only supports a TX with the following constraints:
+      We sign ALL inputs and they have the same multisig wallet (quorum + pubkeys)
+      There can only be 1 output (sweep transaction) or 2 outputs (spend + change).
+      If there is change, we validate it has the same multisig wallet as the inputs we sign.
+
+    Returns a dict with inputs_desc, outputs_desc, tx_summary, tx_fee_sats and
+    is_testnet. Raises PSBTError if the PSBT doesn't meet these constraints.
+    """
+    # Parse TX
+    tx_fee_sats = psbt_obj.tx_obj.fee()
+    is_testnet = psbt_obj.tx_obj.testnet
+
+    # TODO: abstract some of this into buidl library?
+
+    # Consolidations spend many UTXOs from a few addresses (same witness script) of
+    # one wallet (same fingerprints), so each script/quorum is only described once
+    witness_script_cache, msig_digest_cache = {}, {}
+
+    # Gather TX info and validate
+    inputs_desc = []
+    for cnt, psbt_in in enumerate(psbt_obj.psbt_ins):
+        psbt_in.validate()  # redundant but explicit
+
+        if type(psbt_in.witness_script) != WitnessScript:
+            raise PSBTError(
+                main_text=f"Input #{cnt} does not contain a witness script",
+                informative_text="This tool can only sign p2wsh transactions.",
+            )
+
+        quorum_m, addr, witness_script_str = _get_witness_script_info(
+            witness_script=psbt_in.witness_script,
+            is_testnet=is_testnet,
+            cache=witness_script_cache,
+        )
+        # Determine quroum_m (and that it hasn't changed between inputs)
+        if quorum_m is None:
+            raise PSBTError(
+                main_text="Non-p2wsh Input",
+                informative_text=f"Witness script for input #{cnt} is not p2wsh",
+                detailed_text=f"PSBT Input:\n {psbt_in}",
+            )
+
+        # for calculating msig fingerprint
+        root_xfp_hexes = []
+        for _, details in psbt_in.named_pubs.items():
+            root_xfp_hexes.append(details.root_fingerprint.hex())
+
+        input_desc = {
+            "quorum": f"{quorum_m}-of-{len(root_xfp_hexes)}",
+            "root_xfp_hexes": root_xfp_hexes,
+            "prev_txhash": psbt_in.tx_in.prev_tx.hex(),
+            "prev_idx": psbt_in.tx_in.prev_index,
+            "n_sequence": psbt_in.tx_in.sequence,
+            "sats": psbt_in.tx_in.value(),
+            # TODO: would be possible for transaction to be p2sh-wrapped p2wsh (can we tell?)
+            "addr": addr,
+            # "p2sh_addr": psbt_in.witness_script.p2sh_address(testnet=is_testnet),
+            "witness_script": witness_script_str,
+            "msig_digest": _get_msig_digest(
+                quorum_m=quorum_m,
+                root_xfp_hexes=root_xfp_hexes,
+                cache=msig_digest_cache,
+            ),
+        }
+        inputs_desc.append(input_desc)
+
+    if not all(x["msig_digest"] == inputs_desc[0]["msig_digest"] for x in inputs_desc):
+        raise PSBTError(
+            main_text="Inputs Contain Conflicting Wallet Quorums",
+            informative_text="This transaction is not inherently bad, but transactions of this type are only possible for experts. Please construct 1 or more transactions with one input instead.",
+            detailed_text=f"For developers: {inputs_desc}",
+        )
+
+    total_input_sats = sum([x["sats"] for x in inputs_desc])
+
+    # This too only supports TXs with 1-2 outputs (sweep TX OR spend+change TX):
+    if len(psbt_obj.psbt_outs) > 2:
+        raise PSBTError(
+            main_text="Too Many Outputs",
+            informative_text=f"Multiwallet does not support batching, and your transaction has {len(psbt_obj.psbt_outs)} outputs.",
+            detailed_text="Please construct a transaction with <= 2 outputs.",
+        )
+
+    spend_addr, output_spend_sats = "", 0
+    outputs_desc = []
+    for cnt, psbt_out in enumerate(psbt_obj.psbt_outs):
+        psbt_out.validate()  # redundant but explicit
+
+        output_desc = {
+            "sats": psbt_out.tx_out.amount,
+            "addr_type": psbt_out.tx_out.script_pubkey.__class__.__name__.rstrip(
+                "ScriptPubKey"
+            ),
+        }
+
+        quorum_m = None
+        if psbt_out.witness_script:
+            quorum_m, output_desc["addr"], _ = _get_witness_script_info(
+                witness_script=psbt_out.witness_script,
+                is_testnet=is_testnet,
+                cache=witness_script_cache,
+            )
+        else:
+            output_desc["addr"] = psbt_out.tx_out.script_pubkey.address(
+                testnet=is_testnet
+            )
+
+        if psbt_out.named_pubs:
+            # Validate below that this is correct and abort otherwise
+            output_desc["is_change"] = True
+
+            root_xfp_hexes = []  # for calculating msig fingerprint
+            for _, details in psbt_out.named_pubs.items():
+                root_xfp_hexes.append(details.root_fingerprint.hex())
+
+            # Determine quroum_m (and that it hasn't changed between inputs)
+            if quorum_m is None:
+                raise PSBTError(
+                    main_text="Non-p2wsh Change Output",
+                    informative_text="This transaction may be trying to trick you into sending change to a third party.",
+                    detailed_text=f"Witness script for output #{cnt} is not p2wsh: {psbt_out}",
+                )
+
+            output_msig_digest = _get_msig_digest(
+                quorum_m=quorum_m,
+                root_xfp_hexes=root_xfp_hexes,
+                cache=msig_digest_cache,
+            )
+            if output_msig_digest != inputs_desc[0]["msig_digest"]:
+                raise PSBTError(
+                    main_text="Invalid Change Detected",
+                    informative_text=f"Output #{cnt} is claiming to be change but has different multisig wallet(s)! Do a sweep transaction (1-output) if you want this wallet to cosign.",
+                    detailed_text=f"For developers: {outputs_desc}",
+                )
+        else:
+            output_desc["is_change"] = False
+            spend_addr = output_desc["addr"]
+            output_spend_sats = output_desc["sats"]
+
+        outputs_desc.append(output_desc)
+
+    # Sanity check
+    if len(outputs_desc) != len(psbt_obj.psbt_outs):
+        raise PSBTError(
+            main_text="PSBT Parse Error",
+            informative_text=f"{len(outputs_desc)} outputs in TX summary doesn't match {len(psbt_obj.psbt_outs)} outputs in PSBT.",
+        )
+
+    # Confirm if 2 outputs we only have 1 change and 1 spend (can't be 2 changes or 2 spends)
+    if len(outputs_desc) == 2:
+        if all(x["is_change"] == outputs_desc[0]["is_change"] for x in outputs_desc):
+            raise PSBTError(
+                main_text="Change-Only Transaction with 2 Outputs",
+                informative_text="Transactions with 2 outputs that are BOTH change are not allowed, as only experts can properly validate them. Please construct a transaction with fewer outputs.",
+                detailed_text=f"For developers: {outputs_desc}",
+            )
+
+    tx_summary = " ".join(
+        [
+            inputs_desc[0]["quorum"],
+            "PSBT sends",
+            _format_satoshis(output_spend_sats, in_btc=units == "btc"),
+            "to",
+            spend_addr,
+            "with a fee of",
+            _format_satoshis(tx_fee_sats, in_btc=units == "btc"),
+            f"({round(tx_fee_sats / total_input_sats * 100, 2)}% of spend)",
+        ]
+    )
+
+    return {
+        "inputs_desc": inputs_desc,
+        "outputs_desc": outputs_desc,
+        "tx_summary": tx_summary,
+        "tx_fee_sats": tx_fee_sats,
+        "is_testnet": is_testnet,
+    }
+
+
+def _get_detailed_view(psbt_obj, inputs_desc, outputs_desc):
+    to_print = []
+    to_print.append("DETAILED VIEW")
+    to_print.append(f"TXID: {psbt_obj.tx_obj.id()}")
+    to_print.append(f"Network: {'Testnet' if psbt_obj.tx_obj.testnet else 'Mainnet'}")
+    to_print.append("-" * 80)
+    to_print.append(f"{len(inputs_desc)} Input(s):")
+    for cnt, input_desc in enumerate(inputs_desc):
+        to_print.append(f"  input #{cnt}")
+        for k in input_desc:
+            to_print.append(f"    {k}: {input_desc[k]}")
+    to_print.append("-" * 80)
+    to_print.append(f"{len(outputs_desc)} Output(s):")
+    for cnt, output_desc in enumerate(outputs_desc):
+        to_print.append(f"  output #{cnt}")
+        for k in output_desc:
+            to_print.append(f"    {k}: {output_desc[k]}")
+    return "\n".join(to_print)
+
+
+def _get_hd_priv_from_seed_phrase(seed_phrase, is_testnet, key_cache=None):
+    if not seed_phrase:
+        raise PSBTError(
+            main_text="No Seed Phrase Supplied",
+            informative_text="Cannot sign transaction without seed phrase",
+        )
+
+    seed_phrase_num = len(seed_phrase.split())
+    if seed_phrase_num not in (12, 15, 18, 21, 24):
+        raise PSBTError(
+            main_text="Enter 24 word seed-phrase",
+            informative_text=f"You entered {seed_phrase_num} words",
+        )
+
+    try:
+        if key_cache is not None:
+            return key_cache.get_or_derive(seed_phrase, is_testnet=is_testnet)
+        with span("hd.from_mnemonic"):
+            return HDPrivateKey.from_mnemonic(seed_phrase, testnet=is_testnet)
+    except Exception as e:
+        raise PSBTError(
+            main_text="Invalid BIP39 Seed Phrase",
+            informative_text="Transaction NOT signed",
+            detailed_text=str(e),
+        )
+
+
+def _get_root_paths(psbt_obj, inputs_desc, hd_priv):
+    # Returns the set of BIP32 paths (from hd_priv) needed to sign psbt_obj
+    root_paths = set()
+    hd_priv_fingerprint = hd_priv.fingerprint()
+    for cnt, psbt_in in enumerate(psbt_obj.psbt_ins):
+        # Redundant safety check:
+        bad_txhash = inputs_desc[cnt]["prev_txhash"] != psbt_in.tx_in.prev_tx.hex()
+        bad_idx = inputs_desc[cnt]["prev_idx"] != psbt_in.tx_in.prev_index
+        if bad_txhash or bad_idx:
+            raise PSBTError(
+                main_text="PSBT Parse Error",
+                informative_text="Transaction NOT signed",
+                detailed_text=f"For developers: Input #{cnt} prev_txhash or prev_idx mismatch: \n{psbt_obj.serialize_base64()}",
+            )
+
+        for _, details in psbt_in.named_pubs.items():
+            if details.root_fingerprint == hd_priv_fingerprint:
+                root_paths.add(details.root_path)
+
+    if not root_paths:
+        raise PSBTError(
+            main_text="Wrong Seed",
+            informative_text="Seed supplied does not correspond to transaction input(s). Does it belong to another wallet?",
+        )
+
+    return root_paths
+
+
+def _get_sighashes(psbt_obj, private_keys):
+    """
+    Returns [(input_index, private_key, z), ...] for every signature
+    psbt_obj.sign_with_private_keys(private_keys) would make, in the same order.
+    Returns None if any of them isn't a segwit (BIP143) signature.
+    """
+    to_return = []
+    for private_key in private_keys:
+        sec = private_key.point.sec()
+        for cnt, psbt_in in enumerate(psbt_obj.psbt_ins):
+            if not psbt_in.named_pubs.get(sec):
+                continue
+            if not psbt_in.use_segwit_signature():
+                return None
+            z = psbt_obj.tx_obj.sig_hash_bip143(
+                cnt, psbt_in.redeem_script, psbt_in.witness_script
+            )
+            to_return.append((cnt, private_key, z))
+    return to_return
+
+
+# Per-process state for signature pool workers, set by _init_sighash_worker
+_SIGHASH_WORKER_STATE = {}
+
+
+def _init_sighash_worker(secrets_by_sec):
+    # Keys are sent as ints and rebuilt lazily (see _init_sign_worker)
+    _SIGHASH_WORKER_STATE.update(secrets_by_sec=secrets_by_sec, private_keys_by_sec={})
+
+
+def _sign_sighash(task):
+    # Pool task: (sec, z) -> DER signature + SIGHASH_ALL
+    sec, z = task
+    state = _SIGHASH_WORKER_STATE
+    if sec not in state["private_keys_by_sec"]:
+        state["private_keys_by_sec"][sec] = PrivateKey(
+            secret=state["secrets_by_sec"][sec]
+        )
+    return state["private_keys_by_sec"][sec].sign(z).der() + SIGHASH_ALL
+
+
+def _sign_with_private_keys_parallel(psbt_obj, private_keys, workers):
+    """
+    Same result as psbt_obj.sign_with_private_keys(private_keys) (bit for bit,
+    ECDSA signatures here are deterministic), with the ECDSA signing spread across
+    a process pool.
+
+    BIP143 sighashes are computed here (they need the whole transaction), only
+    (pubkey, sighash) pairs are sent to the workers. Returns False if there was
+    nothing to sign, None if an input needs a non-segwit signature.
+    """
+    sighashes = _get_sighashes(psbt_obj=psbt_obj, private_keys=private_keys)
+    if not sighashes:
+        return None if sighashes is None else False
+
+    secrets_by_sec = {x.point.sec(): x.secret for x in private_keys}
+    to_sign = [(private_key.point.sec(), z) for _, private_key, z in sighashes]
+    with multiprocessing.Pool(
+        processes=min(workers, len(to_sign)),
+        initializer=_init_sighash_worker,
+        initargs=(secrets_by_sec,),
+    ) as pool:
+        # imap returns results in submission order
+        sigs = list(
+            pool.imap(
+                _sign_sighash,
+                to_sign,
+                chunksize=max(1, len(to_sign) // (workers * 4)),
+            )
+        )
+
+    # Same insertion order as sign_with_private_keys
+    for (cnt, private_key, _), sig in zip(sighashes, sigs):
+        psbt_obj.psbt_ins[cnt].sigs[private_key.point.sec()] = sig
+    return True
+
+
+@timed("psbt.sign_with_private_keys")
+def _sign_with_private_keys(psbt_obj, private_keys, workers=1):
+    try:
+        was_signed = None
+        if workers > 1 and len(psbt_obj.psbt_ins) >= PARALLEL_SIGN_MIN_INPUTS:
+            was_signed = _sign_with_private_keys_parallel(
+                psbt_obj=psbt_obj, private_keys=private_keys, workers=workers
+            )
+        if was_signed is None:
+            was_signed = psbt_obj.sign_with_private_keys(private_keys)
+    except Exception as e:
+        raise PSBTError(
+            main_text="Transaction Not Signed",
+            informative_text="There was an error during signing.",
+            detailed_text=f"For developers: {e}",
+        )
+
+    if was_signed is not True:
+        raise PSBTError(
+            main_text="Transaction Not Signed",
+            informative_text="Couldn't find private key to sign with",
+            detailed_text="This should've been checked earlier and should not be possible!",
+        )
+
+
+def sign_psbt(psbt_obj, inputs_desc, seed_phrase, key_cache=None, workers=1):
+    """
+    Sign every input of a PSBT (already validated with describe_psbt) that belongs
+    to seed_phrase. Signatures are added to psbt_obj, which is also returned.
+
+    key_cache is an optional keycache.MasterKeyCache, to skip PBKDF2 when the same
+    seed phrase signs again.
+
+    workers > 1 signs the inputs of large PSBTs (PARALLEL_SIGN_MIN_INPUTS+) across
+    a process pool, workers=None uses every available core.
+    """
+    if workers is None:
+        workers = get_default_workers()
+
+    hd_priv = _get_hd_priv_from_seed_phrase(
+        seed_phrase=seed_phrase,
+        is_testnet=psbt_obj.tx_obj.testnet,
+        key_cache=key_cache,
+    )
+
+    # Derive list of child private keys we'll use to sign the TX
+    root_paths = _get_root_paths(
+        psbt_obj=psbt_obj, inputs_desc=inputs_desc, hd_priv=hd_priv
+    )
+    derivation_trie = DerivationTrie(hd_priv)
+    private_keys = [
+        derivation_trie.traverse(root_path).private_key for root_path in root_paths
+    ]
+
+    _sign_with_private_keys(
+        psbt_obj=psbt_obj, private_keys=private_keys, workers=workers
+    )
+    return psbt_obj
+
+
+def split_psbts(text):
+    """
+    Split pasted text into base64 PSBTs, one per "cHNidP8" (base64 of the
+    b"psbt\xff" magic). Line-wrapped PSBTs are joined back together.
+    """
+    to_return = []
+    for chunk in text.split():
+        if chunk.startswith(PSBT_BASE64_PREFIX) or not to_return:
+            to_return.append(chunk)
+        else:
+            to_return[-1] += chunk
+    return to_return
+
+
+# Per-process state for batch signing pool workers, set by _init_sign_worker
+_SIGN_WORKER_STATE = {}
+
+
+def _init_sign_worker(secrets_by_root_path):
+    # Child keys are sent as ints (PrivateKey objects aren't guaranteed to pickle
+    # with libsec) and rebuilt lazily, only for paths this worker needs
+    _SIGN_WORKER_STATE.update(
+        secrets_by_root_path=secrets_by_root_path, private_keys_by_root_path={}
+    )
+
+
+def _sign_psbt_task(task):
+    # Pool task: returns (signed_psbt_bytes, None) or (None, (main, informative, detailed))
+    psbt_bytes, is_testnet, root_paths = task
+    state = _SIGN_WORKER_STATE
+    private_keys = []
+    for root_path in root_paths:
+        if root_path not in state["private_keys_by_root_path"]:
+            state["private_keys_by_root_path"][root_path] = PrivateKey(
+                secret=state["secrets_by_root_path"][root_path]
+            )
+        private_keys.append(state["private_keys_by_root_path"][root_path])
+
+    try:
+        psbt_obj = PSBT.parse(BytesIO(psbt_bytes), testnet=is_testnet)
+        _sign_with_private_keys(psbt_obj=psbt_obj, private_keys=private_keys)
+    except PSBTError as e:
+        return None, (e.main_text, e.informative_text, e.detailed_text)
+    return psbt_obj.serialize(), None
+
+
+def sign_psbts(
+    psbt_strs, seed_phrase, testnet=None, units="sats", workers=1, key_cache=None
+):
+    """
+    Validate and sign a batch of PSBTs with one seed phrase.
+
+    psbt_strs are base64 PSBTs, and/or paths of .psbt files as pathlib.Path's
+    (see parse_psbt_file).
+
+    The seed phrase is stretched once and each child key is derived once for the
+    whole batch. workers > 1 signs the PSBTs across a process pool (workers=None
+    uses every available core), or the inputs of a single large PSBT (see
+    sign_psbt).
+
+    Returns a list with a dict per PSBT, in order:
+      psbt_obj: the parsed PSBT (unsigned), None if it couldn't be parsed
+      psbt_desc: describe_psbt() results, None if it didn't validate
+      signed_b64: the signed PSBT, None if it wasn't signed
+      error: a PSBTError if this PSBT failed, otherwise None
+
+    Seed phrase problems affect every PSBT and are raised as a PSBTError.
+    """
+    if workers is None:
+        workers = get_default_workers()
+
+    results = []
+    for psbt_src in psbt_strs:
+        result = {"psbt_obj": None, "psbt_desc": None, "signed_b64": None}
+        try:
+            result["psbt_obj"] = _parse_psbt_source(psbt_src=psbt_src, testnet=testnet)
+            result["psbt_desc"] = describe_psbt(
+                psbt_obj=result["psbt_obj"], units=units
+            )
+            result["error"] = None
+        except PSBTError as e:
+            result["error"] = e
+        results.append(result)
+
+    to_sign = [x for x in results if x["error"] is None]
+    if not to_sign:
+        return results
+
+    # The network only changes xprv version bytes, not the keys themselves
+    hd_priv = _get_hd_priv_from_seed_phrase(
+        seed_phrase=seed_phrase,
+        is_testnet=to_sign[0]["psbt_obj"].tx_obj.testnet,
+        key_cache=key_cache,
+    )
+
+    # Child keys (and their common prefixes) are shared across PSBTs
+    derivation_trie = DerivationTrie(hd_priv)
+    private_keys_by_root_path, tasks = {}, []
+    for result in to_sign:
+        try:
+            root_paths = _get_root_paths(
+                psbt_obj=result["psbt_obj"],
+                inputs_desc=result["psbt_desc"]["inputs_desc"],
+                hd_priv=hd_priv,
+            )
+        except PSBTError as e:
+            result["error"] = e
+            continue
+        for root_path in root_paths:
+            if root_path not in private_keys_by_root_path:
+                private_keys_by_root_path[root_path] = derivation_trie.traverse(
+                    root_path
+                ).private_key
+        tasks.append((result, sorted(root_paths)))
+
+    if workers > 1 and len(tasks) > 1:
+        secrets_by_root_path = {
+            k: v.secret for k, v in private_keys_by_root_path.items()
+        }
+        with multiprocessing.Pool(
+            processes=min(workers, len(tasks)),
+            initializer=_init_sign_worker,
+            initargs=(secrets_by_root_path,),
+        ) as pool:
+            signed = pool.imap(
+                _sign_psbt_task,
+                [
+                    (
+                        result["psbt_obj"].serialize(),
+                        result["psbt_obj"].tx_obj.testnet,
+                        root_paths,
+                    )
+                    for result, root_paths in tasks
+                ],
+            )
+            for (result, _), (signed_bytes, err_texts) in zip(tasks, signed):
+                if signed_bytes:
+                    result["signed_b64"] = base64.b64encode(signed_bytes).decode()
+                if err_texts:
+                    result["error"] = PSBTError(*err_texts)
+        return results
+
+    for result, root_paths in tasks:
+        # Sign a copy, psbt_obj stays unsigned like in the parallel case
+        psbt_obj = PSBT.parse(
+            BytesIO(result["psbt_obj"].serialize()),
+            testnet=result["psbt_obj"].tx_obj.testnet,
+        )
+        try:
+            _sign_with_private_keys(
+                psbt_obj=psbt_obj,
+                private_keys=[private_keys_by_root_path[x] for x in root_paths],
+                workers=workers,
+            )
+        except PSBTError as e:
+            result["error"] = e
+            continue
+        result["signed_b64"] = psbt_obj.serialize_base64()
+
+    return results
+
+
+def get_batch_summary(names, results):
+    """
+    Plain text table (one row per PSBT) for the results of sign_psbts.
+    """
+    name_width = max([len("PSBT")] + [len(x) for x in names])
+    rows = [f"{'PSBT':<{name_width}}  {'Status':<8}  Summary"]
+    for name, result in zip(names, results):
+        if result["error"] is not None:
+            status = "ERROR"
+            summary = result["error"].main_text
+            if result["error"].informative_text:
+                summary += f": {result['error'].informative_text}"
+        else:
+            status = "SIGNED" if result["signed_b64"] else "VALID"
+            summary = result["psbt_desc"]["tx_summary"]
+        rows.append(f"{name:<{name_width}}  {status:<8}  {summary}")
+    return "\n".join(rows)
@@ -0,0 +1,200 @@
+#! /usr/bin/env bash
+
+# Decode QR codes (PSBTs, wallet descriptors, animated multipart QRs) from image
+# files, like photos of a screen or the frames of an animated QR saved to a folder
+#
+# Needs an optional QR reader on top of Pillow, either of:
+#   pip install zxing-cpp  (self-contained)
+#   pip install pyzbar     (also needs the zbar library, e.g. apt-get install libzbar0)
+
+import base64
+import multiprocessing
+import os
+
+from multiwallet_core.derivation import get_default_workers
+from multiwallet_core.multipart_qr import (
+    MultipartQRDecoder,
+    MultipartQRError,
+    _parse_part,
+    is_multipart_qr_part,
+)
+from multiwallet_core.psbt import PSBT_MAGIC
+
+QR_IMAGE_EXTENSIONS = (
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".bmp",
+    ".gif",
+    ".tif",
+    ".tiff",
+    ".webp",
+)
+
+
+class QRDecodeError(Exception):
+    pass
+
+
+def is_qr_image_path(path):
+    return os.path.splitext(str(path))[1].lower() in QR_IMAGE_EXTENSIONS
+
+
+def get_qr_image_paths(paths):
+    """
+    Image files in paths, with folders expanded to the images in them (sorted).
+    """
+    to_return = []
+    for path in paths:
+        if os.path.isdir(path):
+            to_return.extend(
+                os.path.join(path, x)
+                for x in sorted(os.listdir(path))
+                if is_qr_image_path(x)
+            )
+        else:
+            to_return.append(path)
+    return to_return
+
+
+def _read_qr_codes_zxing(img):
+    import zxingcpp
+
+    results = zxingcpp.read_barcodes(img, formats=zxingcpp.BarcodeFormat.QRCode)
+    # Older versions only have the text
+    return [getattr(x, "bytes", None) or x.text.encode() for x in results]
+
+
+def _read_qr_codes_pyzbar(img):
+    from pyzbar import pyzbar
+
+    return [x.data for x in pyzbar.decode(img, symbols=[pyzbar.ZBarSymbol.QRCODE])]
+
+
+def _get_qr_reader():
+    # Returns a function that reads the QR codes in a PIL image (as bytes)
+    try:
+        import zxingcpp  # noqa: F401
+
+        return _read_qr_codes_zxing
+    except ImportError:
+        pass
+    try:
+        # Also an ImportError if the zbar library itself is missing
+        from pyzbar import pyzbar  # noqa: F401
+
+        return _read_qr_codes_pyzbar
+    except ImportError:
+        raise QRDecodeError(
+            "Decoding QR images needs zxing-cpp or pyzbar (pip install zxing-cpp)"
+        )
+
+
+def _get_payload(data):
+    # Binary PSBTs are converted to base64, like the ones pasted in
+    if data.startswith(PSBT_MAGIC):
+        return base64.b64encode(data).decode()
+    return data.decode("utf-8", errors="replace").strip()
+
+
+_QR_WORKER_STATE = {}
+
+
+def _init_qr_worker():
+    _QR_WORKER_STATE["read_qr_codes"] = _get_qr_reader()
+
+
+def _decode_qr_image(path):
+    """
+    Pool task: returns (path, [payload, ...], error), every frame of an animated
+    image (GIF/TIFF/WebP) is read.
+    """
+    # Deferred, Pillow is only needed here
+    from PIL import Image
+
+    read_qr_codes = _QR_WORKER_STATE["read_qr_codes"]
+    payloads = []
+    try:
+        with Image.open(path) as img:
+            for frame in range(getattr(img, "n_frames", 1)):
+                img.seek(frame)
+                for data in read_qr_codes(img.convert("L")):
+                    payloads.append(_get_payload(data))
+    except Exception as e:
+        return path, [], f"Could not read image: {e}"
+    if not payloads:
+        return path, [], "No QR code found"
+    return path, payloads, None
+
+
+def decode_qr_images(paths, workers=1):
+    """
+    Decodes the QR codes in image files (or folders of them, like the saved
+    frames of an animated QR), spread across workers processes (None uses every
+    available core).
+
+    Parts of animated QRs are reassembled in whatever order the images come in.
+    Returns a dict with:
+      payloads: the text of each QR (or complete animated QR), in the order
+        first seen and without duplicates
+      incomplete: the fraction decoded of each animated QR missing parts
+      errors: [(path, error), ...] for images that couldn't be read
+    """
+    if workers is None:
+        workers = get_default_workers()
+
+    paths = get_qr_image_paths(paths)
+    # Fail before starting any workers if there's no QR reader
+    _get_qr_reader()
+
+    if workers > 1 and len(paths) > 1:
+        pool = multiprocessing.Pool(
+            processes=min(workers, len(paths)), initializer=_init_qr_worker
+        )
+        results = pool.imap(
+            _decode_qr_image,
+            paths,
+            chunksize=max(1, len(paths) // (workers * 4)),
+        )
+    else:
+        pool = None
+        _init_qr_worker()
+        results = map(_decode_qr_image, paths)
+
+    # A payload or a MultipartQRDecoder for each QR, in the order first seen
+    payloads, errors = [], []
+    # {(num_fragments, message_len, checksum): MultipartQRDecoder}
+    decoders = {}
+    try:
+        for path, path_payloads, error in results:
+            if error:
+                errors.append((path, error))
+            for payload in path_payloads:
+                if not is_multipart_qr_part(payload):
+                    if payload not in payloads:
+                        payloads.append(payload)
+                    continue
+                try:
+                    header = _parse_part(payload)[1]
+                    if header not in decoders:
+                        decoders[header] = MultipartQRDecoder()
+                        payloads.append(decoders[header])
+                    decoders[header].receive_part(payload)
+                except MultipartQRError as e:
+                    errors.append((path, str(e)))
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    to_return = {"payloads": [], "incomplete": [], "errors": errors}
+    for payload in payloads:
+        if not isinstance(payload, MultipartQRDecoder):
+            to_return["payloads"].append(payload)
+        elif not payload.is_complete():
+            to_return["incomplete"].append(payload.get_progress())
+        else:
+            try:
+                to_return["payloads"].append(_get_payload(payload.get_message()))
+            except MultipartQRError as e:
+                errors.append(("animated QR", str(e)))
+    return to_return
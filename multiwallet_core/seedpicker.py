@@ -0,0 +1,166 @@
+#! /usr/bin/env bash
+
+# Seedpicker: calculate the last (checksum) word for a hand-picked seed phrase
+
+import multiprocessing
+
+from hashlib import sha256
+
+from buidl.hd import HDPrivateKey
+from buidl.mnemonic import WORD_LOOKUP, WORD_LIST
+
+from multiwallet_core.derivation import get_default_workers
+from multiwallet_core.metrics import span
+
+# Number of words a user picks (the last word is calculated for them)
+VALID_FIRST_WORDS_LENGTHS = (11, 14, 17, 20, 23)
+
+
+def _get_invalid_words(first_words):
+    # Returns a list of [word_position, word] for words not in the BIP39 wordlist
+    to_return = []
+    for cnt, word in enumerate(first_words.split()):
+        if word not in WORD_LOOKUP:
+            to_return.append([cnt + 1, word])
+    return to_return
+
+
+def _get_all_valid_checksum_words(first_words, first_match=True):
+    """
+    Returns (valid_last_words, err_str) for the first 11/14/17/20/23 words of a
+    BIP39 mnemonic, in WORD_LIST order.
+
+    The first words are decoded to entropy bits once, then each possible last word
+    is checked by hashing its entropy completion (no PBKDF2 or BIP32 per candidate).
+    """
+    # TODO: move to buidl library
+    words = first_words.split()
+    if len(words) not in VALID_FIRST_WORDS_LENGTHS:
+        return [], ""
+
+    first_bits = 0
+    for word in words:
+        try:
+            first_bits = (first_bits << 11) | WORD_LOOKUP[word]
+        except KeyError as e:
+            # We have a word in first_words that is not in WORD_LIST
+            return [], "Invalid BIP39 Word: {}".format(e.args[0])
+
+    # The last word is (11 - checksum_bits) bits of entropy + checksum_bits of checksum
+    checksum_bits = (len(words) + 1) // 3
+    num_entropy_bytes = checksum_bits * 4
+    completion_bits = 11 - checksum_bits
+
+    to_return = []
+    for completion in range(1 << completion_bits):
+        entropy = (first_bits << completion_bits) | completion
+        checksum = sha256(entropy.to_bytes(num_entropy_bytes, "big")).digest()[0] >> (
+            8 - checksum_bits
+        )
+        to_return.append(WORD_LIST[(completion << checksum_bits) | checksum])
+        if first_match:
+            break
+
+    return to_return, ""
+
+
+def _get_path_and_slip132_version(is_testnet):
+    # https://github.com/satoshilabs/slips/blob/master/slip-0132.md
+    if is_testnet:
+        return "m/48'/1'/0'/2'", "02575483"
+    # Mainnet
+    return "m/48'/0'/0'/2'", "02aa7ed3"
+
+
+def _get_key_origin(hd_priv, is_testnet, derivation_trie=None):
+    # Returns (fingerprint_hex, path, SLIP132-xpub)
+    # Pass a keycache.DerivationTrie for hd_priv to reuse m/48' between networks,
+    # a single derivation has nothing to reuse
+    path, slip132_version_bytes = _get_path_and_slip132_version(is_testnet)
+    hd = hd_priv if derivation_trie is None else derivation_trie
+    return (
+        hd_priv.fingerprint().hex(),
+        path,
+        hd.traverse(path).xpub(version=bytes.fromhex(slip132_version_bytes)),
+    )
+
+
+def _get_pubkey_info(hd_priv, is_testnet, derivation_trie=None):
+    """
+    Returns the key record ([fingerprint/path]SLIP132-xpub) to export for multisig.
+    """
+    xfp, path, xpub = _get_key_origin(
+        hd_priv=hd_priv, is_testnet=is_testnet, derivation_trie=derivation_trie
+    )
+    return "[{}{}]{}".format(xfp, path.replace("m", "").replace("'", "h"), xpub)
+
+
+def _get_batch_key_origin(args):
+    # Pool task: the PBKDF2 + BIP32 part of pick_last_words for one phrase
+    mnemonic, is_testnet = args
+    with span("hd.from_mnemonic"):
+        hd_priv = HDPrivateKey.from_mnemonic(mnemonic)
+    return _get_key_origin(hd_priv=hd_priv, is_testnet=is_testnet)
+
+
+def pick_last_words(first_words_list, is_testnet, workers=1):
+    """
+    Batch version of the Seedpicker tab.
+
+    Yields a dict per entry of first_words_list, in order, with the last_word,
+    fingerprint, path and SLIP132 xpub, or an error (and no key info) for phrases
+    that can't be completed.
+
+    The checksum words are all calculated up front in this process (one hash per
+    phrase), then the slow PBKDF2/BIP32 step is spread across workers processes
+    (workers=None uses every available core).
+    """
+    if workers is None:
+        workers = get_default_workers()
+
+    results, tasks = [], []
+    for first_words in first_words_list:
+        first_words = " ".join(first_words.split())
+        result = {"first_words": first_words}
+        results.append(result)
+
+        fw_num = len(first_words.split())
+        if fw_num not in VALID_FIRST_WORDS_LENGTHS:
+            result["error"] = f"Seed phrase must be 23 words, got {fw_num}"
+            continue
+
+        invalid_words = _get_invalid_words(first_words)
+        if invalid_words:
+            result["error"] = "Invalid BIP39 word(s): " + ", ".join(
+                f"#{x[0]} {x[1]}" for x in invalid_words
+            )
+            continue
+
+        valid_checksum_words, err_str = _get_all_valid_checksum_words(
+            first_words, first_match=True
+        )
+        if err_str:
+            result["error"] = err_str
+            continue
+        result["last_word"] = valid_checksum_words[0]
+        tasks.append((first_words + " " + result["last_word"], is_testnet))
+
+    if workers > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(processes=min(workers, len(tasks)))
+        key_origins = pool.imap(
+            _get_batch_key_origin,
+            tasks,
+            chunksize=max(1, len(tasks) // (workers * 4)),
+        )
+    else:
+        pool = None
+        key_origins = map(_get_batch_key_origin, tasks)
+
+    try:
+        for result in results:
+            if "last_word" in result:
+                result["xfp"], result["path"], result["xpub"] = next(key_origins)
+            yield result
+    finally:
+        if pool is not None:
+            pool.terminate()
@@ -0,0 +1,197 @@
+#! /usr/bin/env bash
+
+# On-disk cache of derived witness script hashes
+#
+# File layout (all integers little-endian):
+#   header: magic (4 bytes) | version (uint16) | record size (uint16) | descriptor checksum (32 bytes)
+#   records: index (uint32) | sha256 of the witness script (32 bytes) | record checksum (8 bytes)
+#
+# Record n is always index n, so any cached range is served by offset arithmetic on
+# an mmap of the file. Records are only ever appended.
+#
+# The record checksum is a truncated sha256 of the descriptor checksum, index and
+# witness script hash, so a flipped bit is an error instead of a valid looking
+# address nobody can spend from. Stores from an older version are started over
+# (it's only a cache).
+
+import mmap
+import os
+import struct
+
+from buidl.helper import sha256
+
+STORE_MAGIC = b"MWDS"
+STORE_VERSION = 2
+HEADER_STRUCT = struct.Struct("<4sHH32s")
+RECORD_STRUCT = struct.Struct("<I32s8s")
+
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser("~"), ".multiwallet", "derivations")
+
+
+class DerivationStoreError(Exception):
+    pass
+
+
+def get_descriptor_checksum(pubkeys_info):
+    """
+    sha256 of everything that determines a descriptor's addresses.
+
+    Cosigner order is irrelevant for sortedmulti, so the xpubs are sorted first.
+    """
+    xpub_parts = sorted(
+        "{}/{}".format(x["xpub"], x["idx"]) for x in pubkeys_info["pubkey_dicts"]
+    )
+    to_hash = "{}-of-{}:{}:{}".format(
+        pubkeys_info["quorum_m"],
+        pubkeys_info["quorum_n"],
+        "testnet" if pubkeys_info["is_testnet"] else "mainnet",
+        ",".join(xpub_parts),
+    )
+    return sha256(to_hash.encode())
+
+
+def _get_record_checksum(descriptor_checksum, index, witness_script_hash):
+    return sha256(descriptor_checksum + struct.pack("<I", index) + witness_script_hash)[
+        :8
+    ]
+
+
+def _is_missing_or_older_store(path):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return True
+    with open(path, "rb") as f:
+        header = f.read(HEADER_STRUCT.size)
+    if len(header) < HEADER_STRUCT.size:
+        return False
+    magic, version, _, _ = HEADER_STRUCT.unpack(header)
+    return magic == STORE_MAGIC and version < STORE_VERSION
+
+
+def get_default_store_path(descriptor_checksum, store_dir=DEFAULT_STORE_DIR):
+    return os.path.join(store_dir, "{}.mwds".format(descriptor_checksum.hex()))
+
+
+class DerivationStore:
+    """
+    Append-only store of (index, witness script hash) records for one descriptor.
+
+    Raises DerivationStoreError if the file belongs to a different descriptor or is
+    corrupted (bad header, truncated record, a record at the wrong position or with
+    a bad checksum).
+    """
+
+    def __init__(self, path, descriptor_checksum):
+        self.path = path
+        self.descriptor_checksum = descriptor_checksum
+
+        if _is_missing_or_older_store(path):
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(
+                    HEADER_STRUCT.pack(
+                        STORE_MAGIC,
+                        STORE_VERSION,
+                        RECORD_STRUCT.size,
+                        descriptor_checksum,
+                    )
+                )
+
+        self._file = open(path, "r+b")
+        self._mmap = None
+        try:
+            self._remap()
+            self._validate()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return (len(self._mmap) - HEADER_STRUCT.size) // RECORD_STRUCT.size
+
+    def _remap(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _validate(self):
+        if len(self._mmap) < HEADER_STRUCT.size:
+            raise DerivationStoreError(f"Truncated header in {self.path}")
+
+        magic, version, record_size, checksum = HEADER_STRUCT.unpack_from(self._mmap, 0)
+        if magic != STORE_MAGIC:
+            raise DerivationStoreError(f"{self.path} is not a derivation store")
+        if version != STORE_VERSION or record_size != RECORD_STRUCT.size:
+            raise DerivationStoreError(
+                f"Unsupported derivation store version {version} in {self.path}"
+            )
+        if checksum != self.descriptor_checksum:
+            raise DerivationStoreError(
+                f"{self.path} belongs to a different wallet descriptor"
+            )
+
+        if (len(self._mmap) - HEADER_STRUCT.size) % RECORD_STRUCT.size:
+            raise DerivationStoreError(f"Truncated record in {self.path}")
+
+        # Spot check the ends, every other record is checked as it's read
+        if len(self):
+            self.get_witness_script_hash(0)
+            self.get_witness_script_hash(len(self) - 1)
+
+    def get_witness_script_hash(self, index):
+        stored_index, witness_script_hash, checksum = RECORD_STRUCT.unpack_from(
+            self._mmap, HEADER_STRUCT.size + index * RECORD_STRUCT.size
+        )
+        if stored_index != index:
+            raise DerivationStoreError(
+                f"Corrupted record in {self.path}: expected index {index} but found {stored_index}"
+            )
+        if checksum != _get_record_checksum(
+            self.descriptor_checksum, index, witness_script_hash
+        ):
+            raise DerivationStoreError(
+                f"Corrupted record in {self.path}: bad checksum for index {index}"
+            )
+        return witness_script_hash
+
+    def append(self, records):
+        """
+        records is a list of (index, witness_script_hash) that must continue on from
+        the last stored index.
+        """
+        if not records:
+            return
+        expected_index = len(self)
+        to_write = []
+        for index, witness_script_hash in records:
+            if index != expected_index:
+                raise DerivationStoreError(
+                    f"Cannot append index {index} to {self.path}, next index is {expected_index}"
+                )
+            to_write.append(
+                RECORD_STRUCT.pack(
+                    index,
+                    witness_script_hash,
+                    _get_record_checksum(
+                        self.descriptor_checksum, index, witness_script_hash
+                    ),
+                )
+            )
+            expected_index += 1
+
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(b"".join(to_write))
+        self._file.flush()
+        self._remap()
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if not self._file.closed:
+            self._file.close()
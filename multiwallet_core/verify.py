@@ -0,0 +1,175 @@
+#! /usr/bin/env bash
+
+# "Is this address mine?" lookups against a descriptor's derived addresses
+
+import math
+
+from buidl.helper import sha256
+
+from multiwallet_core.derivation import _get_branch_pubkey_obj, get_addresses
+from multiwallet_core.store import (
+    DerivationStore,
+    get_default_store_path,
+    get_descriptor_checksum,
+)
+
+RECEIVE_BRANCH = 0
+CHANGE_BRANCH = 1
+BRANCH_NAMES = {RECEIVE_BRANCH: "receive", CHANGE_BRANCH: "change"}
+
+
+class BloomFilter:
+    """
+    Minimal Bloom filter using double hashing over a sha256 digest.
+
+    No false negatives, and false positives at roughly error_rate once capacity
+    items have been added.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(1, capacity)
+        self.num_bits = max(
+            8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        )
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _bit_positions(self, item):
+        digest = sha256(item.encode())
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little")
+        for cnt in range(self.num_hashes):
+            yield (h1 + cnt * h2) % self.num_bits
+
+    def add(self, item):
+        for position in self._bit_positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._bit_positions(item)
+        )
+
+
+def _get_pubkey_dicts_for_branch(pubkey_dicts, branch):
+    # Same cosigners, different last path element (/0/* receive vs /1/* change)
+    to_return = []
+    for pubkey_dict in pubkey_dicts:
+        branch_dict = dict(pubkey_dict)
+        branch_dict["idx"] = branch
+        branch_dict["child_pubkey_obj"] = _get_branch_pubkey_obj(
+            pubkey_dict["xpub"], branch
+        )
+        to_return.append(branch_dict)
+    return to_return
+
+
+class AddressIndex:
+    """
+    Hash index of the first N receive and change addresses of a descriptor.
+
+    Build it once with AddressIndex.build(), after which lookup() is O(1).
+    """
+
+    def __init__(self, use_bloom_filter=False, capacity=0):
+        self.addresses = {}
+        if use_bloom_filter:
+            self.bloom_filter = BloomFilter(capacity=capacity)
+        else:
+            self.bloom_filter = None
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def add(self, address, branch, index):
+        self.addresses[address] = (branch, index)
+        if self.bloom_filter is not None:
+            self.bloom_filter.add(address)
+
+    def lookup(self, address):
+        """
+        Returns (branch, index) or None if the address isn't in the index.
+        """
+        # bech32 is case insensitive but we always derive lowercase
+        address = address.strip().lower()
+        if self.bloom_filter is not None and address not in self.bloom_filter:
+            return None
+        return self.addresses.get(address)
+
+    @classmethod
+    def build(
+        cls,
+        pubkeys_info,
+        limit,
+        workers=1,
+        use_bloom_filter=False,
+        store_dir=None,
+        progress_callback=None,
+    ):
+        """
+        Derive the first limit receive and change addresses for pubkeys_info (from
+        _get_pubkeys_info_from_descriptor) and index them.
+
+        store_dir is an optional directory of DerivationStore files to read from/add to.
+        progress_callback is called with the number of addresses indexed so far.
+        """
+        address_index = cls(use_bloom_filter=use_bloom_filter, capacity=2 * limit)
+        for branch in (RECEIVE_BRANCH, CHANGE_BRANCH):
+            branch_info = dict(pubkeys_info)
+            branch_info["pubkey_dicts"] = _get_pubkey_dicts_for_branch(
+                pubkeys_info["pubkey_dicts"], branch
+            )
+            store = None
+            if store_dir:
+                descriptor_checksum = get_descriptor_checksum(branch_info)
+                store = DerivationStore(
+                    path=get_default_store_path(
+                        descriptor_checksum=descriptor_checksum, store_dir=store_dir
+                    ),
+                    descriptor_checksum=descriptor_checksum,
+                )
+            try:
+                for index, address in get_addresses(
+                    pubkey_dicts=branch_info["pubkey_dicts"],
+                    quorum_m=branch_info["quorum_m"],
+                    quorum_n=branch_info["quorum_n"],
+                    limit=limit,
+                    offset=0,
+                    is_testnet=branch_info["is_testnet"],
+                    workers=workers,
+                    store=store,
+                ):
+                    address_index.add(address=address, branch=branch, index=index)
+                    if progress_callback:
+                        progress_callback(len(address_index))
+            finally:
+                if store is not None:
+                    store.close()
+        return address_index
+
+
+# Header columns of CSV exports, e.g. `multiwallet derive --format csv`
+CSV_HEADER_WORDS = ("index", "address")
+
+
+def _parse_addresses(text):
+    # One address per line, but also tolerate commas/whitespace (e.g. CSV exports),
+    # skipping what can't be an address (index columns and header words)
+    return [
+        x
+        for x in text.replace(",", " ").split()
+        if not x.isdigit() and x.lower() not in CSV_HEADER_WORDS
+    ]
+
+
+def verify_addresses(address_index, addresses):
+    """
+    Yields (address, branch, index) with branch and index set to None if not found.
+    """
+    for address in addresses:
+        result = address_index.lookup(address)
+        if result:
+            yield address, result[0], result[1]
+        else:
+            yield address, None, None
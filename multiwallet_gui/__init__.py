@@ -1,3 +1,8 @@
 #! /usr/bin/env bash
 
 from multiwallet_gui import *  # noqa: F401, F403
+
+# First, so --profile-startup can time the imports that follow
+from multiwallet_gui.startup_profile import _maybe_start_startup_profile
+
+_maybe_start_startup_profile()
@@ -7,6 +7,8 @@ from PyQt5.QtWidgets import (
     QWidget,
 )
 
+from multiwallet_gui.tabs import ABOUT_HOVER, ABOUT_TITLE
+
 ABOUT_COPY = """
 <h2>
   Welcome to Multiwallet
@@ -44,8 +46,8 @@ ABOUT_COPY = """
 
 
 class AboutTab(QWidget):
-    TITLE = "About"
-    HOVER = "Info about Multiwallet GUI"
+    TITLE = ABOUT_TITLE
+    HOVER = ABOUT_HOVER
 
     def __init__(self):
         super().__init__()
@@ -1,18 +1,31 @@
 #! /usr/bin/env bash
 
 import sys
+import time
 
+# Before anything else, so --profile-startup sees every import when this is run
+# as a script (or frozen)
+import multiwallet_gui  # noqa: F401
+
+from PyQt5.QtCore import QEvent, QObject
+from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import (
     QApplication,
     QDialog,
+    QShortcut,
     QTabWidget,
     QVBoxLayout,
+    QWidget,
 )
 
-from multiwallet_gui.about import AboutTab
-from multiwallet_gui.receive import ReceiveTab
-from multiwallet_gui.seedpicker import SeedpickerTab
-from multiwallet_gui.send import SendTab
+from multiwallet_gui.startup_profile import (
+    FIRST_SHOW_PHASE,
+    add_startup_phase,
+    is_profiling_startup,
+    startup_phase,
+    write_startup_profile,
+)
+from multiwallet_gui.tabs import TABS
 
 
 class MultiwalletApp(QDialog):
@@ -27,27 +40,84 @@ class MultiwalletApp(QDialog):
 
         self.tab_widget = QTabWidget()
 
-        # Initialize tab screen
-        self.about_tab = AboutTab()
-        self.seedpicker_tab = SeedpickerTab()
-        self.receive_tab = ReceiveTab()
-        self.send_tab = SendTab()
+        # Each tab starts as an empty placeholder, and is built (importing its
+        # module) the first time it's selected so the window shows quickly
+        self.tab_placeholders = []
+        for cnt, tab_info in enumerate(TABS):
+            setattr(self, tab_info["attr"], None)
+            placeholder = QWidget()
+            placeholder_layout = QVBoxLayout(placeholder)
+            placeholder_layout.setContentsMargins(0, 0, 0, 0)
+            self.tab_placeholders.append(placeholder)
+            self.tab_widget.addTab(placeholder, tab_info["title"])
+            self.tab_widget.setTabToolTip(cnt, tab_info["hover"])
 
-        # Add tabs
-        for cnt, tab in enumerate(
-            [self.about_tab, self.seedpicker_tab, self.receive_tab, self.send_tab]
-        ):
-            self.tab_widget.addTab(tab, tab.TITLE)
-            self.tab_widget.setTabToolTip(cnt, tab.HOVER)
+        self.build_tab(self.tab_widget.currentIndex())
+        self.tab_widget.currentChanged.connect(self.build_tab)
 
         # Add tabs to widget
         self.layout.addWidget(self.tab_widget)
         self.setLayout(self.layout)
 
+        # Hidden diagnostics panel (timings of the expensive operations)
+        self.diagnostics_dialog = None
+        self.diagnostics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        self.diagnostics_shortcut.activated.connect(self.show_diagnostics)
+
+    def build_tab(self, index):
+        # No-op if it's already built
+        tab_info = TABS[index]
+        if getattr(self, tab_info["attr"]) is not None:
+            return
+        with startup_phase(f"{tab_info['title']} tab import"):
+            tab_class = tab_info["get_class"]()
+        with startup_phase(f"{tab_info['title']} tab __init__"):
+            tab = tab_class()
+        setattr(self, tab_info["attr"], tab)
+        self.tab_placeholders[index].layout().addWidget(tab)
+        if self.isVisible():
+            # Built after startup, update the report with it
+            write_startup_profile()
+
+    def show_diagnostics(self):
+        if self.diagnostics_dialog is None:
+            # Deferred like the tabs, it's rarely opened
+            from multiwallet_gui.diagnostics import DiagnosticsDialog
+
+            self.diagnostics_dialog = DiagnosticsDialog(parent=self)
+        self.diagnostics_dialog.show()
+        self.diagnostics_dialog.raise_()
+
+
+class _FirstPaintFilter(QObject):
+    # --profile-startup: times show() until the first paint, then writes the report
+    def __init__(self, started_at, parent):
+        super().__init__(parent)
+        self.started_at = started_at
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            obj.removeEventFilter(self)
+            add_startup_phase(FIRST_SHOW_PHASE, self.started_at)
+            write_startup_profile()
+        return False
+
 
 def main():
-    qapp = QApplication(sys.argv)
-    my_app = MultiwalletApp()
+    # Needed for process pools in the PyInstaller bundle (multiprocessing is only
+    # imported there, it's slow to import and otherwise only needed once signing)
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+
+        multiprocessing.freeze_support()
+    with startup_phase("QApplication"):
+        qapp = QApplication(sys.argv)
+    with startup_phase("MultiwalletApp.__init__"):
+        my_app = MultiwalletApp()
+    if is_profiling_startup():
+        my_app.installEventFilter(
+            _FirstPaintFilter(started_at=time.perf_counter(), parent=my_app)
+        )
     my_app.show()
     qapp.exec()
 
@@ -0,0 +1,184 @@
+#! /usr/bin/env bash
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFontDatabase
+from PyQt5.QtWidgets import (
+    QCheckBox,
+    QDialog,
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QPlainTextEdit,
+    QPushButton,
+    QVBoxLayout,
+)
+
+from multiwallet_gui.helper import _msgbox_err
+from multiwallet_core.action_profile import (
+    arm_action_profile,
+    disarm_action_profile,
+    get_last_action_profile,
+    is_action_profile_armed,
+    is_action_profile_running,
+)
+from multiwallet_core.helper import _is_libsec_enabled
+from multiwallet_core.metrics import (
+    disable_metrics,
+    enable_metrics,
+    format_metrics_summary,
+    get_metrics_jsonl_path,
+    get_metrics_summary,
+    is_metrics_enabled,
+)
+
+
+class DiagnosticsDialog(QDialog):
+    """
+    Hidden panel (Ctrl+Shift+D) with timings of the expensive operations (see
+    multiwallet_core.metrics), refreshed while it's open, and a toggle to profile
+    the next Derive/Sign (see multiwallet_core.action_profile).
+    """
+
+    REFRESH_MS = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Multiwallet Diagnostics")
+        self.setMinimumWidth(760)
+        self.setMinimumHeight(400)
+
+        vbox = QVBoxLayout(self)
+
+        if _is_libsec_enabled():
+            libsec_text = "libsec: <b>installed</b>"
+        else:
+            libsec_text = "libsec: <b>not installed</b> (EC math is ~100x slower)"
+        self.libsecLabel = QLabel(libsec_text)
+
+        self.enabledCheckbox = QCheckBox("Collect timings")
+        self.enabledCheckbox.setToolTip(
+            "Time descriptor parsing, address derivation, seed stretching, key derivation, signing and QR rendering."
+            "<br/><br/>"
+            "Unchecking this drops the timings collected so far."
+        )
+        self.enabledCheckbox.setChecked(is_metrics_enabled())
+        self.enabledCheckbox.toggled.connect(self.toggle_metrics)
+
+        self.logButton = QPushButton("Log to JSONL File...")
+        self.logButton.setToolTip(
+            "Also append every timing to a file, one JSON object per line."
+        )
+        self.logButton.clicked.connect(self.choose_log_file)
+
+        hbox = QHBoxLayout()
+        for widget in self.libsecLabel, self.enabledCheckbox, self.logButton:
+            hbox.addWidget(widget)
+
+        self.logLabel = QLabel("")
+
+        self.profileCheckbox = QCheckBox("Profile next Derive or Sign")
+        self.profileCheckbox.setToolTip(
+            "Run the next <i>Derive</i> (Receive) or <i>Sign</i>/<i>Decode</i> (Send) under cProfile and tracemalloc, "
+            "and save a .pstats file and a report of the top allocations."
+            "<br/><br/>"
+            "They only contain code locations, call counts, times and sizes, never your seed, keys, PSBTs or addresses, so they are safe to share."
+            "<br/><br/>"
+            "Set <i>Workers</i> to 1 to include address derivation, work in other processes isn't profiled. It runs slower while profiling."
+        )
+        self.profileCheckbox.setChecked(is_action_profile_armed())
+        self.profileCheckbox.toggled.connect(self.toggle_action_profile)
+        self.profileLabel = QLabel("")
+        self.profileLabel.setTextInteractionFlags(Qt.TextSelectableByMouse)
+
+        self.summaryROEdit = QPlainTextEdit("")
+        self.summaryROEdit.setReadOnly(True)
+        self.summaryROEdit.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+
+        vbox.addLayout(hbox)
+        vbox.addWidget(self.logLabel)
+        vbox.addWidget(self.profileCheckbox)
+        vbox.addWidget(self.profileLabel)
+        vbox.addWidget(self.summaryROEdit)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def toggle_metrics(self, checked):
+        if checked:
+            enable_metrics()
+        else:
+            disable_metrics()
+        self.refresh()
+
+    def toggle_action_profile(self, checked):
+        if checked:
+            arm_action_profile()
+        else:
+            disarm_action_profile()
+        self.refresh()
+
+    def choose_log_file(self):
+        filename, _ = QFileDialog.getSaveFileName(
+            self,
+            "Log Timings To",
+            "multiwallet-metrics.jsonl",
+            "JSON Lines (*.jsonl);;All Files (*)",
+        )
+        if not filename:
+            return
+        try:
+            enable_metrics(jsonl_path=filename)
+        except OSError as e:
+            return _msgbox_err(
+                main_text="Could not open log file",
+                informative_text=str(e),
+            )
+        # Checking it again is a no-op for enable_metrics()
+        self.enabledCheckbox.setChecked(True)
+        self.refresh()
+
+    def _refresh_action_profile(self):
+        # Unchecks itself once the action starts
+        self.profileCheckbox.setChecked(is_action_profile_armed())
+        last_result = get_last_action_profile()
+        if is_action_profile_running():
+            self.profileLabel.setText("Profiling...")
+        elif is_action_profile_armed():
+            self.profileLabel.setText("Waiting for the next Derive or Sign")
+        elif last_result is None:
+            self.profileLabel.setText("")
+        elif last_result["error"]:
+            self.profileLabel.setText(
+                f"Could not save the profile of {last_result['action']}: {last_result['error']}"
+            )
+        else:
+            paths = [last_result["pstats_path"], last_result["allocations_path"]]
+            lines = [f"Profile of {last_result['action']} saved to:"]
+            lines.extend(x for x in paths if x)
+            self.profileLabel.setText("\n".join(lines))
+
+    def refresh(self):
+        jsonl_path = get_metrics_jsonl_path()
+        self.logLabel.setText(f"Logging to {jsonl_path}" if jsonl_path else "")
+        self._refresh_action_profile()
+        if not is_metrics_enabled():
+            self.summaryROEdit.setPlainText(
+                "Check Collect timings, then use the app as usual."
+            )
+            return
+        # Keep the scroll position while it refreshes
+        scroll_bar = self.summaryROEdit.verticalScrollBar()
+        scroll_position = scroll_bar.value()
+        self.summaryROEdit.setPlainText(format_metrics_summary(get_metrics_summary()))
+        scroll_bar.setValue(scroll_position)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
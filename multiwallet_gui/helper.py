@@ -1,9 +1,20 @@
 import qrcode
 import re
 
-from io import BytesIO
-from PyQt5.QtWidgets import QMessageBox, QDialog, QVBoxLayout, QLabel
-from PyQt5.QtGui import QPixmap, QIcon
+from functools import lru_cache
+from multiwallet_core.metrics import timed
+from multiwallet_core.multipart_qr import DEFAULT_FRAGMENT_LEN, MultipartQREncoder
+from multiwallet_core.qr_decode import QR_IMAGE_EXTENSIONS, decode_qr_images
+from PyQt5.QtCore import QObject, QRunnable, Qt, QTimer, pyqtSignal
+from PyQt5.QtWidgets import (
+    QMessageBox,
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QSpinBox,
+)
+from PyQt5.QtGui import QImage, QPixmap, QIcon
 
 
 def strip_html(data):
@@ -16,25 +27,62 @@ def create_qr_icon():
     return QIcon("multiwallet_gui/images/qr.png")
 
 
+# Same as qrcode.make()
+QR_BOX_SIZE = 10
+
+# bytes(row) of a QR matrix is 1 for dark modules, as 8-bit grayscale that's black
+_QR_GRAYSCALE = bytes([255, 0]) + bytes(254)
+
+# QR encoding a signed PSBT is slow, keep the last few texts' matrices around
+QR_MATRIX_CACHE_SIZE = 8
+
+# Longer texts don't fit in one QR (~2,300 base64 chars at the default error
+# correction), they need an animated QR (qr_dialog(animated=True))
+QR_MAX_STATIC_LEN = 2_000
+QR_ANIMATED_FPS = 8
+# Picking the best mask is most of the cost of a QR, animations render hundreds of
+# frames so they use a fixed one (any mask scans, it's only less optimal)
+QR_ANIMATED_MASK_PATTERN = 0
+
+
+def _make_qr_matrix(text, mask_pattern=None):
+    # Tuple of rows (True for dark modules), including the quiet zone border
+    qr = qrcode.QRCode(mask_pattern=mask_pattern)
+    qr.add_data(text)
+    qr.make(fit=True)
+    return tuple(tuple(row) for row in qr.get_matrix())
+
+
+# Animation frames call _make_qr_matrix() directly so they don't evict these
+_get_qr_matrix = lru_cache(maxsize=QR_MATRIX_CACHE_SIZE)(_make_qr_matrix)
+
+
+def _create_qt_image_qr(matrix, box_size=QR_BOX_SIZE):
+    size = len(matrix)
+    # One byte per module, handed to QImage as is (no image codecs involved)
+    buf = b"".join(bytes(row) for row in matrix).translate(_QR_GRAYSCALE)
+    img = QImage(buf, size, size, size, QImage.Format_Grayscale8)
+    if box_size == 1:
+        # Copy it out of buf
+        return img.copy()
+    # Whole pixels per module (nearest neighbour) so edges stay sharp, this also
+    # copies the image out of buf
+    return img.scaled(
+        size * box_size,
+        size * box_size,
+        Qt.IgnoreAspectRatio,
+        Qt.FastTransformation,
+    )
+
+
+@timed("qr.create_qt_pixmap_qr")
 def create_qt_pixmap_qr(text):
     """
     How to use this:
       label.setText("")
       label.setPixmap(create_qt_pixmap_qr(text="foo"))
-
-    https://stackoverflow.com/a/58251630/1754586
     """
-    buf = BytesIO()
-    img = qrcode.make(text)
-    img.save(buf, "PNG")
-    qt_pixmap = QPixmap()
-    qt_pixmap.loadFromData(buf.getvalue(), "PNG")
-    return qt_pixmap
-
-
-def _clean_submisission(string):
-    # TODO: more advanced regex
-    return string.replace("  ", " ").strip()
+    return QPixmap.fromImage(_create_qt_image_qr(_get_qr_matrix(text)))
 
 
 def _msgbox_err(main_text=None, informative_text=None, detailed_text=None):
@@ -51,6 +99,50 @@ def _msgbox_err(main_text=None, informative_text=None, detailed_text=None):
     msg.exec_()
 
 
+QR_IMAGE_FILE_FILTER = "Images ({});;All Files (*)".format(
+    " ".join("*" + x for x in QR_IMAGE_EXTENSIONS)
+)
+
+
+class DecodeQRImagesSignals(QObject):
+    # QRunnable is not a QObject, so it needs a helper to emit signals
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+
+class DecodeQRImagesWorker(QRunnable):
+    """
+    Decode QR codes from image files (or folders of animated QR frames) off the
+    GUI thread, see multiwallet_core.qr_decode.
+
+    Emits finished with the result of decode_qr_images, or error.
+    """
+
+    def __init__(self, paths, workers=1):
+        super().__init__()
+        self.paths = paths
+        self.workers = workers
+        self.signals = DecodeQRImagesSignals()
+
+    def run(self):
+        try:
+            result = decode_qr_images(paths=self.paths, workers=self.workers)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+
+def get_qr_decode_problems(result):
+    # Text of the errors in a decode_qr_images result (for detailed_text)
+    lines = [f"{path}: {error}" for path, error in result["errors"]]
+    for progress in result["incomplete"]:
+        lines.append(
+            f"Animated QR only {progress:.0%} decoded, some of its frames are missing"
+        )
+    return "\n".join(lines)
+
+
 class QRPopup(QDialog):
     def __init__(self, qr_text, window_title, window_height):
         super().__init__()
@@ -62,6 +154,8 @@ class QRPopup(QDialog):
         self.setMaximumWidth(16777215)
 
         self.qr_text = qr_text
+        # Rendered once, resizing only rescales it
+        self.qr_pixmap = create_qt_pixmap_qr(text=qr_text)
 
         self.vbox = QVBoxLayout()
 
@@ -80,19 +174,135 @@ class QRPopup(QDialog):
         if height_to_use is None:
             height_to_use = self.height() * 0.9
 
-        self.pixmap = create_qt_pixmap_qr(text=self.qr_text).scaledToHeight(
-            height_to_use
-        )
+        self.pixmap = self.qr_pixmap.scaledToHeight(int(height_to_use))
         self.labelImage.setPixmap(self.pixmap)
 
     def resizeEvent(self, event):
-        self.pixmap = self._set_pixmap()
+        self._set_pixmap()
 
 
-def qr_dialog(qwidget, qr_text, window_title):
+class AnimatedQRPopup(QDialog):
+    """
+    Shows qr_text as an animated QR (see multiwallet_core.multipart_qr), looping
+    over its parts at a configurable frame rate and frame size.
+
+    Every frame is rendered once up front at one pixel per module, each tick
+    only scales the frame being shown.
+    """
+
+    def __init__(
+        self,
+        qr_text,
+        window_title,
+        window_height,
+        fps=QR_ANIMATED_FPS,
+        fragment_len=DEFAULT_FRAGMENT_LEN,
+    ):
+        super().__init__()
+
+        self.setWindowTitle(window_title)
+
+        self.setMaximumHeight(16777215)
+        self.setMaximumWidth(16777215)
+
+        self.qr_text = qr_text
+        self.window_height = window_height
+        self.frames = []
+        self.frame_index = 0
+
+        self.vbox = QVBoxLayout()
+
+        self.labelImage = QLabel()
+        self.labelImage.setMaximumHeight(16777215)
+        self.labelImage.setMaximumWidth(16777215)
+        self.labelImage.setAlignment(Qt.AlignCenter)
+
+        self.labelFrame = QLabel()
+        self.labelFrame.setToolTip(
+            "Scan every frame with a Multiwallet animated QR reader, frames can be caught in any order."
+        )
+
+        self.fpsSpinBox = QSpinBox()
+        self.fpsSpinBox.setRange(1, 30)
+        self.fpsSpinBox.setSuffix(" frames/sec")
+        self.fpsSpinBox.setValue(fps)
+        self.fpsSpinBox.valueChanged.connect(self._set_fps)
+
+        self.fragmentSpinBox = QSpinBox()
+        self.fragmentSpinBox.setRange(50, 1000)
+        self.fragmentSpinBox.setSingleStep(50)
+        self.fragmentSpinBox.setSuffix(" bytes/frame")
+        self.fragmentSpinBox.setToolTip("Smaller frames are easier to scan")
+        self.fragmentSpinBox.setValue(fragment_len)
+        # Only re-render once editing is done, not on every keystroke
+        self.fragmentSpinBox.setKeyboardTracking(False)
+        self.fragmentSpinBox.valueChanged.connect(self._render_frames)
+
+        hbox = QHBoxLayout()
+        hbox.addWidget(self.labelFrame)
+        hbox.addStretch()
+        hbox.addWidget(self.fpsSpinBox)
+        hbox.addWidget(self.fragmentSpinBox)
+
+        self.vbox.addWidget(self.labelImage)
+        self.vbox.addLayout(hbox)
+        self.setLayout(self.vbox)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._show_next_frame)
+
+        self._render_frames(fragment_len)
+        self._set_fps(fps)
+
+        self.show()
+
+    def _render_frames(self, fragment_len):
+        encoder = MultipartQREncoder(self.qr_text, fragment_len=fragment_len)
+        self.frames = [
+            QPixmap.fromImage(
+                _create_qt_image_qr(
+                    _make_qr_matrix(part, mask_pattern=QR_ANIMATED_MASK_PATTERN),
+                    box_size=1,
+                )
+            )
+            for part in encoder.get_animation_parts()
+        ]
+        self.frame_index = 0
+        self._show_frame()
+
+    def _set_fps(self, fps):
+        self.timer.start(int(1000 / fps))
+
+    def _show_frame(self):
+        # Leaves room for the controls below the QR
+        if self.isVisible():
+            height_to_use = self.height() * 0.8
+        else:
+            height_to_use = self.window_height * 0.8
+
+        frame = self.frames[self.frame_index]
+        self.labelImage.setPixmap(frame.scaledToHeight(int(height_to_use)))
+        self.labelFrame.setText(f"Frame {self.frame_index + 1} of {len(self.frames)}")
+
+    def _show_next_frame(self):
+        self.frame_index = (self.frame_index + 1) % len(self.frames)
+        self._show_frame()
+
+    def resizeEvent(self, event):
+        self._show_frame()
+
+    def done(self, result):
+        self.timer.stop()
+        super().done(result)
+
+
+def qr_dialog(qwidget, qr_text, window_title, animated=False):
+    # Animated QRs need a reader for Multiwallet's own format, so they're only
+    # shown when asked for
     # set to 90% of max size: https://stackoverflow.com/questions/35887237/current-screen-size-in-python3-with-pyqt5
     window_height = qwidget.screen().size().height() * 0.9
-    dialog = QRPopup(
+    popup_class = AnimatedQRPopup if animated else QRPopup
+    dialog = popup_class(
         qr_text=qr_text,
         window_title=strip_html(window_title),
         window_height=window_height,
@@ -100,16 +310,6 @@ def qr_dialog(qwidget, qr_text, window_title):
     return dialog.exec_()
 
 
-def _is_libsec_enabled():
-    # TODO: move to buidl
-    try:
-        from buidl import cecc  # noqa: F401
-
-        return True
-    except ModuleNotFoundError:
-        return False
-
-
 BITCOIN_NETWORK_TOOLTIP = (
     "Testnet is a great tool for practicing, as Testnet coins have no monetary value. "
     "We recommend new users do a dry-run on Testnet before receiving real bitcoins."
@@ -1,114 +1,187 @@
 #! /usr/bin/env bash
 
-import re
+import json
+import time
+
+from contextlib import closing
 
 from PyQt5.QtWidgets import (
-    QApplication,
+    QCheckBox,
+    QFileDialog,
     QHBoxLayout,
     QVBoxLayout,
     QWidget,
     QLabel,
     QPlainTextEdit,
+    QProgressBar,
     QPushButton,
     QSpinBox,
 )
-from PyQt5.QtCore import Qt
-
-from multiwallet_gui.helper import _clean_submisission, _msgbox_err, _is_libsec_enabled
-
-from buidl.hd import HDPublicKey
-from buidl.helper import sha256
-from buidl.op import OP_CODE_NAMES_LOOKUP
-from buidl.script import P2WSHScriptPubKey, WitnessScript
-
-
-# TODO: package with libsec
-
-
-def _re_pubkey_info_from_descriptor_fragment(fragment):
-    xfp, path, xpub, idx = re.match(
-        "\[([0-9a-f]+)\*?(.*?)\]([0-9A-Za-z]+).*([0-9]+?)",  # noqa: W605
-        fragment,
-    ).groups()
-    return {
-        "xfp": xfp,
-        "path": path.replace("\\/", "/").lstrip("/"),
-        "xpub": xpub,
-        "idx": int(idx),
-    }
-
-
-def _get_pubkeys_info_from_descriptor(descriptor):
-    re_results = re.findall("wsh\(sortedmulti\((.*)\)\)", descriptor)  # noqa: W605
-    parts = re_results[0].split(",")
-    quorum_m = int(parts.pop(0))
-    quorum_n = len(parts)  # remaining entries are pubkeys with fingerprint/path
-    assert 0 < quorum_m <= quorum_n
-
-    pubkey_dicts = []
-    for fragment in parts:
-        pubkey_info = _re_pubkey_info_from_descriptor_fragment(fragment=fragment)
-        parent_pubkey_obj = HDPublicKey.parse(pubkey_info["xpub"])
-        pubkey_info["parent_pubkey_obj"] = parent_pubkey_obj
-        pubkey_info["child_pubkey_obj"] = parent_pubkey_obj.child(
-            index=pubkey_info["idx"]
-        )
-        pubkey_dicts.append(pubkey_info)
-
-    # safety check
-    all_pubkeys = [x["xpub"] for x in pubkey_dicts]
-    assert (
-        len(set([x[:4] for x in all_pubkeys])) == 1
-    ), "ERROR: multiple conflicting networks in pubkeys: {}".format(all_pubkeys)
-
-    xpub_prefix = all_pubkeys[0][:4]
-    if xpub_prefix == "tpub":
-        is_testnet = True
-    elif xpub_prefix == "xpub":
-        is_testnet = False
-    else:
-        raise Exception(f"Invalid xpub prefix: {xpub_prefix}")
-
-    return {
-        "is_testnet": is_testnet,
-        "quorum_m": quorum_m,
-        "quorum_n": quorum_n,
-        "pubkey_dicts": pubkey_dicts,
-    }
-
-
-def _get_address(pubkey_dicts, quorum_m, quorum_n, index, is_testnet):
-    sec_hexes_to_use = []
-    for pubkey_dict in pubkey_dicts:
-        leaf_xpub = pubkey_dict["child_pubkey_obj"].child(index=index)
-        sec_hexes_to_use.append(leaf_xpub.sec().hex())
-
-    commands = [OP_CODE_NAMES_LOOKUP["OP_{}".format(quorum_m)]]
-    commands.extend([bytes.fromhex(x) for x in sorted(sec_hexes_to_use)])  # BIP67
-    commands.append(OP_CODE_NAMES_LOOKUP["OP_{}".format(quorum_n)])
-    commands.append(OP_CODE_NAMES_LOOKUP["OP_CHECKMULTISIG"])
-    witness_script = WitnessScript(commands)
-    redeem_script = P2WSHScriptPubKey(sha256(witness_script.raw_serialize()))
-    return redeem_script.address(testnet=is_testnet)
-
-
-def get_addresses(pubkey_dicts, quorum_m, quorum_n, limit, offset, is_testnet):
-    # Use generator for iterative display
-    for cnt in range(limit):
-        index = cnt + offset
-        address = _get_address(
-            pubkey_dicts=pubkey_dicts,
-            quorum_m=quorum_m,
-            quorum_n=quorum_n,
-            index=index,
-            is_testnet=is_testnet,
-        )
-        yield index, address
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+
+from multiwallet_gui.helper import (
+    QR_IMAGE_FILE_FILTER,
+    DecodeQRImagesWorker,
+    get_qr_decode_problems,
+    _msgbox_err,
+)
+from multiwallet_gui.tabs import RECEIVE_HOVER, RECEIVE_TITLE
+from multiwallet_core.action_profile import (
+    finish_action_profile,
+    profile_thread,
+    start_action_profile,
+)
+from multiwallet_core.derivation import (
+    PARALLEL_DERIVE_MIN_ADDRESSES,
+    _get_pubkeys_info_from_descriptor,
+    get_addresses,
+    get_default_workers,
+)
+from multiwallet_core.helper import _clean_submisission, _is_libsec_enabled
+from multiwallet_core.store import (
+    DEFAULT_STORE_DIR,
+    DerivationStore,
+    get_default_store_path,
+    get_descriptor_checksum,
+)
+from multiwallet_core.verify import (
+    BRANCH_NAMES,
+    AddressIndex,
+    _parse_addresses,
+    verify_addresses,
+)
+
+
+class DeriveAddressesSignals(QObject):
+    # QRunnable is not a QObject, so it needs a helper to emit signals
+    chunk = pyqtSignal(list)
+    progress = pyqtSignal(int)
+    error = pyqtSignal(str)
+    finished = pyqtSignal(bool)
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class DeriveAddressesWorker(QRunnable):
+    """
+    Derive addresses off the GUI thread and send them back in chunks.
+
+    A chunk is emitted once it has CHUNK_SIZE results or once FLUSH_SECONDS have passed
+    (whichever comes first), so repaints scale with the number of chunks and slow
+    (non-libsec) derivation still streams to the screen.
+    """
+
+    CHUNK_SIZE = 250
+    FLUSH_SECONDS = 0.25
+
+    def __init__(self, pubkeys_info, limit, offset, workers=1, store_path=None):
+        super().__init__()
+        self.pubkeys_info = pubkeys_info
+        self.limit = limit
+        self.offset = offset
+        self.workers = workers
+        self.store_path = store_path
+        self.is_cancelled = False
+        self.signals = DeriveAddressesSignals()
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def run(self):
+        # finished is emitted after profile_thread() so this thread's profile is in
+        # by the time derivation_finished saves it
+        with profile_thread():
+            chunk, last_flush = [], time.monotonic()
+            store = None
+            try:
+                if self.store_path:
+                    store = DerivationStore(
+                        path=self.store_path,
+                        descriptor_checksum=get_descriptor_checksum(self.pubkeys_info),
+                    )
+                # closing() makes sure any pending store records get written on cancel
+                with closing(
+                    get_addresses(
+                        pubkey_dicts=self.pubkeys_info["pubkey_dicts"],
+                        quorum_m=self.pubkeys_info["quorum_m"],
+                        quorum_n=self.pubkeys_info["quorum_n"],
+                        limit=self.limit,
+                        offset=self.offset,
+                        is_testnet=self.pubkeys_info["is_testnet"],
+                        workers=self.workers,
+                        store=store,
+                    )
+                ) as addresses:
+                    for index, address in addresses:
+                        if self.is_cancelled:
+                            break
+                        chunk.append(f"#{index}: {address}")
+                        is_stale = time.monotonic() - last_flush >= self.FLUSH_SECONDS
+                        if len(chunk) >= self.CHUNK_SIZE or is_stale:
+                            self.signals.chunk.emit(chunk)
+                            chunk, last_flush = [], time.monotonic()
+                if chunk:
+                    self.signals.chunk.emit(chunk)
+            except Exception as e:
+                self.signals.error.emit(str(e))
+            finally:
+                if store is not None:
+                    store.close()
+        self.signals.finished.emit(self.is_cancelled)
+
+
+class VerifyAddressesWorker(QRunnable):
+    """
+    Build an AddressIndex off the GUI thread and look up each address in it.
+
+    Emits progress while indexing and then a single chunk of (address, branch, index).
+    """
+
+    PROGRESS_EVERY = 100
+
+    def __init__(self, pubkeys_info, addresses, limit, workers=1, store_dir=None):
+        super().__init__()
+        self.pubkeys_info = pubkeys_info
+        self.addresses = addresses
+        self.limit = limit
+        self.workers = workers
+        self.store_dir = store_dir
+        self.is_cancelled = False
+        self.signals = DeriveAddressesSignals()
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def _progress_callback(self, num_indexed):
+        if self.is_cancelled:
+            raise _Cancelled
+        if num_indexed % self.PROGRESS_EVERY == 0:
+            self.signals.progress.emit(num_indexed)
+
+    def run(self):
+        try:
+            address_index = AddressIndex.build(
+                pubkeys_info=self.pubkeys_info,
+                limit=self.limit,
+                workers=self.workers,
+                store_dir=self.store_dir,
+                progress_callback=self._progress_callback,
+            )
+            self.signals.chunk.emit(
+                list(verify_addresses(address_index, self.addresses))
+            )
+        except _Cancelled:
+            pass
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        self.signals.finished.emit(self.is_cancelled)
 
 
 class ReceiveTab(QWidget):
-    TITLE = "Receive"
-    HOVER = "Verify your bitcoin addresses belong to you qourum."
+    TITLE = RECEIVE_TITLE
+    HOVER = RECEIVE_HOVER
 
     def __init__(self):
         super().__init__()
@@ -125,6 +198,13 @@ class ReceiveTab(QWidget):
             "Something like this:\n\nwsh(sortedmulti(2,[deadbeef/48h/1h/0h/2h]xpub.../0/*,"
         )
 
+        self.descriptorQRImageButton = QPushButton("Scan QR Image(s)...")
+        self.descriptorQRImageButton.setToolTip(
+            "Decode the wallet descriptor from pictures of its QR code (or every frame of an animated QR)."
+        )
+        self.descriptorQRImageButton.clicked.connect(self.load_descriptor_qr_images)
+        self.qr_worker = None
+
         self.addresses_label = QLabel("<b>Addresses to Derive</b>")
         self.addresses_label.setToolTip(
             "Address derivation without libsecp256k1 installed is slow, you may want to be targetted about which addresses to derive."
@@ -144,19 +224,67 @@ class ReceiveTab(QWidget):
         self.offset_box.setValue(0)
         self.offset_box.setMinimum(0)
 
+        self.workers_label = QLabel("<b>Workers</b>")
+        self.workers_label.setToolTip(
+            "The number of CPU cores to derive addresses with (each one derives a separate range of addresses)."
+            "<br/><br/>"
+            f"Fewer than {PARALLEL_DERIVE_MIN_ADDRESSES} addresses are always derived on one core."
+        )
+        self.workers_box = QSpinBox()
+        self.workers_box.setRange(1, get_default_workers())
+        self.workers_box.setValue(get_default_workers())
+
         for widget in (
             self.limit_label,
             self.limit_box,
             self.offset_label,
             self.offset_box,
+            self.workers_label,
+            self.workers_box,
         ):
             hbox.addWidget(widget)
 
+        self.storeCheckbox = QCheckBox("Save to disk")
+        self.storeCheckbox.setToolTip(
+            "Keep derived addresses in a cache file for this wallet, so that deriving them again is nearly instant."
+            f"<br/><br/>Files are saved in {DEFAULT_STORE_DIR}"
+        )
+        self.storeCheckbox.setChecked(False)
+        hbox.addWidget(self.storeCheckbox)
+
         hbox.setAlignment(Qt.AlignCenter)
 
         self.descriptorSubmitButton = QPushButton("Derive Addresses")
         self.descriptorSubmitButton.clicked.connect(self.process_submit)
 
+        self.progressBar = QProgressBar()
+        self.progressBar.setHidden(True)
+
+        self.cancelButton = QPushButton("Cancel")
+        self.cancelButton.setToolTip("Stop deriving (or verifying) addresses.")
+        self.cancelButton.setHidden(True)
+        self.cancelButton.clicked.connect(self.cancel_submit)
+
+        self.verifyLabel = QLabel("<b>Addresses to Verify</b> (optional)")
+        self.verifyLabel.setToolTip(
+            "Check whether addresses (one per line) belong to this wallet."
+            "<br/><br/>"
+            "The first <i>Limit</i> receive and change addresses are searched."
+        )
+        self.verifyEdit = QPlainTextEdit("")
+        self.verifyEdit.setPlaceholderText("tb1q...\ntb1q...")
+
+        verify_hbox = QHBoxLayout()
+        self.verifyFileButton = QPushButton("Load File")
+        self.verifyFileButton.setToolTip("Load addresses to verify from a text file.")
+        self.verifyFileButton.clicked.connect(self.load_verify_file)
+        self.verifySubmitButton = QPushButton("Verify Addresses")
+        self.verifySubmitButton.clicked.connect(self.process_verify)
+        for widget in self.verifyFileButton, self.verifySubmitButton:
+            verify_hbox.addWidget(widget)
+
+        self.worker = None
+
         self.addrResultsLabel = QLabel("")
         self.addrResultsLabel.setToolTip(
             "These bitcoin addresses belong to the quorum of extended public keys above."
@@ -167,13 +295,24 @@ class ReceiveTab(QWidget):
         self.addrResultsROEdit.setReadOnly(True)
         self.addrResultsROEdit.setHidden(True)
 
-        for widget in self.descriptorLabel, self.descriptorEdit, self.addresses_label:
+        for widget in (
+            self.descriptorLabel,
+            self.descriptorEdit,
+            self.descriptorQRImageButton,
+            self.addresses_label,
+        ):
             vbox.addWidget(widget)
 
         vbox.addLayout(hbox)
 
+        for widget in self.descriptorSubmitButton, self.verifyLabel, self.verifyEdit:
+            vbox.addWidget(widget)
+
+        vbox.addLayout(verify_hbox)
+
         for widget in (
-            self.descriptorSubmitButton,
+            self.progressBar,
+            self.cancelButton,
             self.addrResultsLabel,
             self.addrResultsROEdit,
         ):
@@ -181,30 +320,67 @@ class ReceiveTab(QWidget):
 
         self.setLayout(vbox)
 
-    def process_submit(self):
-        # Clear any previous submission in case of errors
-        self.addrResultsROEdit.clear()
-        self.addrResultsROEdit.setHidden(True)
-        self.addrResultsLabel.setText("")
-        # TODO: why setText and not hide?
-
+    def _get_pubkeys_info(self):
+        # Returns None (after showing the error) if the descriptor is invalid
         desciptor_raw = _clean_submisission(self.descriptorEdit.toPlainText())
         if not desciptor_raw:
-            return _msgbox_err(
+            _msgbox_err(
                 main_text="No Wallet Desciptor",
                 informative_text="Enter a wallet descriptor to derive your bitcoin addresses.",
             )
+            return
         try:
             pubkeys_info = _get_pubkeys_info_from_descriptor(desciptor_raw)
         except Exception as e:
-            return _msgbox_err(
+            _msgbox_err(
                 main_text="Parse Error",
                 informative_text=str(e),
             )
+            return
         if not pubkeys_info:
-            return _msgbox_err(
+            _msgbox_err(
                 main_text="Could not parse pubkeys from submission",
             )
+            return
+        return pubkeys_info
+
+    def _clear_results(self):
+        # Clear any previous submission in case of errors
+        self.addrResultsROEdit.clear()
+        self.addrResultsROEdit.setHidden(True)
+        self.addrResultsLabel.setText("")
+        # TODO: why setText and not hide?
+
+    def _start_worker(self, worker, progress_max):
+        self.progressBar.setRange(0, progress_max)
+        self.progressBar.setValue(0)
+        self.progressBar.setHidden(False)
+        self.cancelButton.setHidden(False)
+        self.descriptorSubmitButton.setEnabled(False)
+        self.verifySubmitButton.setEnabled(False)
+        self.descriptorQRImageButton.setEnabled(False)
+
+        self.worker = worker
+        self.worker.signals.error.connect(self.derivation_error)
+        self.worker.signals.finished.connect(self.derivation_finished)
+        QThreadPool.globalInstance().start(self.worker)
+
+    def process_submit(self):
+        # Profiled (derivation included) if armed in the diagnostics panel
+        start_action_profile(action="receive.process_submit")
+        try:
+            self._process_submit()
+        finally:
+            # Otherwise derivation_finished finishes it
+            if self.worker is None:
+                finish_action_profile()
+
+    def _process_submit(self):
+        self._clear_results()
+
+        pubkeys_info = self._get_pubkeys_info()
+        if not pubkeys_info:
+            return
 
         results_label = f"<b>{pubkeys_info['quorum_m']}-of-{pubkeys_info['quorum_n']} Multisig Addresses</b>"
         if not _is_libsec_enabled():
@@ -215,16 +391,156 @@ class ReceiveTab(QWidget):
 
         limit = self.limit_box.value()
         offset = self.offset_box.value()
-
-        # https://stackoverflow.com/questions/50104163/update-pyqt-gui-from-a-python-thread
-        for index, address in get_addresses(
-            pubkey_dicts=pubkeys_info["pubkey_dicts"],
-            quorum_m=pubkeys_info["quorum_m"],
-            quorum_n=pubkeys_info["quorum_n"],
+        workers = self.workers_box.value()
+        if self.storeCheckbox.isChecked():
+            store_path = get_default_store_path(get_descriptor_checksum(pubkeys_info))
+        else:
+            store_path = None
+
+        worker = DeriveAddressesWorker(
+            pubkeys_info=pubkeys_info,
             limit=limit,
             offset=offset,
-            is_testnet=pubkeys_info["is_testnet"],
-        ):
-            result = f"#{index}: {address}"
-            self.addrResultsROEdit.appendPlainText(result)
-            QApplication.processEvents()  # needed to stream output (otherwise terrible UX)
+            workers=workers,
+            store_path=store_path,
+        )
+        worker.signals.chunk.connect(self.append_addresses)
+        self._start_worker(worker=worker, progress_max=limit)
+
+    def load_descriptor_qr_images(self):
+        filenames, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Scan QR Image(s)",
+            "",
+            QR_IMAGE_FILE_FILTER,
+        )
+        if not filenames:
+            return
+        self.descriptorQRImageButton.setEnabled(False)
+        self.descriptorQRImageButton.setText("Scanning...")
+        self.qr_worker = DecodeQRImagesWorker(
+            paths=filenames, workers=get_default_workers()
+        )
+        self.qr_worker.signals.finished.connect(self.show_descriptor_qr_images)
+        self.qr_worker.signals.error.connect(self.descriptor_qr_images_error)
+        QThreadPool.globalInstance().start(self.qr_worker)
+
+    def _descriptor_qr_images_done(self):
+        self.qr_worker = None
+        self.descriptorQRImageButton.setEnabled(self.worker is None)
+        self.descriptorQRImageButton.setText("Scan QR Image(s)...")
+
+    def descriptor_qr_images_error(self, error):
+        self._descriptor_qr_images_done()
+        return _msgbox_err(main_text="Could not scan QR images", informative_text=error)
+
+    def show_descriptor_qr_images(self, result):
+        self._descriptor_qr_images_done()
+        if not result["payloads"]:
+            return _msgbox_err(
+                main_text="No Wallet Descriptor Found",
+                informative_text="No complete QR code was decoded from these images.",
+                detailed_text=get_qr_decode_problems(result),
+            )
+        descriptor = result["payloads"][0]
+        try:
+            # Specter-Desktop's wallet export QR is JSON with the descriptor in it
+            descriptor = json.loads(descriptor)["descriptor"]
+        except (ValueError, KeyError, TypeError):
+            pass
+        # Straight into the descriptor parser, as if it had been pasted
+        self.descriptorEdit.setPlainText(descriptor)
+        # Unless a derivation started while scanning, then it's submitted by hand
+        if self.worker is None:
+            self.process_submit()
+
+    def load_verify_file(self):
+        filename, _ = QFileDialog.getOpenFileName(
+            self,
+            "Load Addresses to Verify",
+            "",
+            "Text Files (*.txt *.csv);;All Files (*)",
+        )
+        if not filename:
+            return
+        try:
+            with open(filename, "r") as f:
+                self.verifyEdit.setPlainText(f.read())
+        except Exception as e:
+            return _msgbox_err(
+                main_text="Could not read file",
+                informative_text=str(e),
+            )
+
+    def process_verify(self):
+        self._clear_results()
+
+        addresses = _parse_addresses(self.verifyEdit.toPlainText())
+        if not addresses:
+            return _msgbox_err(
+                main_text="No Addresses to Verify",
+                informative_text="Enter the addresses to verify (one per line).",
+            )
+
+        pubkeys_info = self._get_pubkeys_info()
+        if not pubkeys_info:
+            return
+
+        limit = self.limit_box.value()
+        results_label = (
+            f"<b>Address Verification</b> - first {limit:,} receive and change addresses "
+            f"of {pubkeys_info['quorum_m']}-of-{pubkeys_info['quorum_n']} multisig"
+        )
+        if not _is_libsec_enabled():
+            results_label += "<br>(this is ~100x faster with libsec installed)"
+        self.addrResultsLabel.setText(results_label)
+        self.addrResultsROEdit.setHidden(False)
+
+        worker = VerifyAddressesWorker(
+            pubkeys_info=pubkeys_info,
+            addresses=addresses,
+            limit=limit,
+            workers=self.workers_box.value(),
+            store_dir=DEFAULT_STORE_DIR if self.storeCheckbox.isChecked() else None,
+        )
+        worker.signals.progress.connect(self.progressBar.setValue)
+        worker.signals.chunk.connect(self.append_verify_results)
+        self._start_worker(worker=worker, progress_max=2 * limit)
+
+    def append_verify_results(self, results):
+        to_display, num_found = [], 0
+        for address, branch, index in results:
+            if branch is None:
+                to_display.append(f"NOT FOUND: {address}")
+            else:
+                num_found += 1
+                to_display.append(f"#{index} ({BRANCH_NAMES[branch]}): {address}")
+        summary = f"{num_found:,} of {len(results):,} addresses belong to this wallet"
+        self.addrResultsLabel.setText(f"{self.addrResultsLabel.text()}<br>{summary}")
+        self.addrResultsROEdit.appendPlainText("\n".join(to_display))
+
+    def append_addresses(self, chunk):
+        # One append per chunk (not per address) keeps repaint cost down
+        self.addrResultsROEdit.appendPlainText("\n".join(chunk))
+        self.progressBar.setValue(self.progressBar.value() + len(chunk))
+
+    def cancel_submit(self):
+        if self.worker:
+            self.worker.cancel()
+
+    def derivation_error(self, err_str):
+        return _msgbox_err(
+            main_text="Address Derivation Error",
+            informative_text=err_str,
+        )
+
+    def derivation_finished(self, is_cancelled):
+        self.worker = None
+        self.progressBar.setHidden(True)
+        self.cancelButton.setHidden(True)
+        self.descriptorSubmitButton.setEnabled(True)
+        self.verifySubmitButton.setEnabled(True)
+        self.descriptorQRImageButton.setEnabled(self.qr_worker is None)
+        if is_cancelled:
+            self.addrResultsROEdit.appendPlainText("(cancelled)")
+        finish_action_profile()
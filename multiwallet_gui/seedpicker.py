@@ -5,10 +5,18 @@ from multiwallet_gui.helper import (
     BITCOIN_TESTNET_TOOLTIP,
     BITCOIN_MAINNET_TOOLTIP,
     create_qr_icon,
-    _clean_submisission,
     _msgbox_err,
     qr_dialog,
 )
+from multiwallet_gui.tabs import SEEDPICKER_HOVER, SEEDPICKER_TITLE
+from multiwallet_core.helper import _clean_submisission
+from multiwallet_core.metrics import span
+from multiwallet_core.seedpicker import (
+    VALID_FIRST_WORDS_LENGTHS,
+    _get_all_valid_checksum_words,
+    _get_invalid_words,
+    _get_pubkey_info,
+)
 
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (
@@ -22,33 +30,11 @@ from PyQt5.QtWidgets import (
 )
 
 from buidl.hd import HDPrivateKey
-from buidl.mnemonic import WORD_LOOKUP, WORD_LIST
-
-
-def _get_all_valid_checksum_words(first_words, first_match=True):
-    # TODO: move to buidl library
-    to_return = []
-    for word in WORD_LIST:
-        try:
-            HDPrivateKey.from_mnemonic(first_words + " " + word)
-            if first_match:
-                return [word], ""
-            to_return.append(word)
-        except KeyError as e:
-            # We have a word in first_words that is not in WORD_LIST
-            return [], "Invalid BIP39 Word: {}".format(e.args[0])
-        except ValueError:
-            pass
-
-    return to_return, ""
 
 
 class SeedpickerTab(QWidget):
-    TITLE = "Seedpicker"
-    HOVER = (
-        "<b>Protect yourself against a bad random number generator.</b> "
-        "Pick 23 words of your seed phrase and Seedpicker will calculate the last word."
-    )
+    TITLE = SEEDPICKER_TITLE
+    HOVER = SEEDPICKER_HOVER
 
     def __init__(self):
         super().__init__()
@@ -147,17 +133,14 @@ class SeedpickerTab(QWidget):
 
         first_words = _clean_submisission(self.firstWordsEdit.toPlainText())
         fw_num = len(first_words.split())
-        if fw_num not in (11, 14, 17, 20, 23):
+        if fw_num not in VALID_FIRST_WORDS_LENGTHS:
             # TODO: 11, 14, 17, or 20 word seed phrases also work but this is not documented as it's for advanced users
             return _msgbox_err(
                 main_text="Seed Phrase Must Be 23 Words",
                 informative_text=f"you entered {fw_num} words",
             )
 
-        wordlist_errors = []
-        for cnt, word in enumerate(first_words.split()):
-            if word not in WORD_LOOKUP:
-                wordlist_errors.append([cnt + 1, word])
+        wordlist_errors = _get_invalid_words(first_words)
         if wordlist_errors:
             return _msgbox_err(
                 main_text="Invalid BIP39 Word(s)",
@@ -177,29 +160,21 @@ class SeedpickerTab(QWidget):
             )
 
         self.IS_TESTNET = self.testnet_button.isChecked()
-        if self.IS_TESTNET:
-            PATH = "m/48'/1'/0'/2'"
-            SLIP132_VERSION_BYTES = "02575483"
-        else:
-            # Mainnet
-            PATH = "m/48'/0'/0'/2'"
-            SLIP132_VERSION_BYTES = "02aa7ed3"
 
         last_word = valid_checksum_words[0]
-        hd_priv = HDPrivateKey.from_mnemonic(first_words + " " + last_word)
+        # Local so no private keys outlive this submission
+        with span("hd.from_mnemonic"):
+            hd_priv = HDPrivateKey.from_mnemonic(first_words + " " + last_word)
 
         priv_to_display = [
             f"Last Word: {last_word}",
             f"Full {fw_num + 1} word mnemonic (including last word): {first_words + ' ' + last_word}",
         ]
         pub_to_display = [
-            "[{}{}]{}".format(
-                hd_priv.fingerprint().hex(),
-                PATH.replace("m", "").replace("'", "h"),
-                hd_priv.traverse(PATH).xpub(
-                    version=bytes.fromhex(SLIP132_VERSION_BYTES)
-                ),
-            ),
+            _get_pubkey_info(
+                hd_priv=hd_priv,
+                is_testnet=self.IS_TESTNET,
+            )
         ]
 
         self.privResultsLabel.setText("<b>SECRET INFO</b>")
@@ -1,16 +1,26 @@
 #! /usr/bin/env bash
 
+import os
+from pathlib import Path
+
 from multiwallet_gui.helper import (
     BITCOIN_NETWORK_TOOLTIP,
     BITCOIN_TESTNET_TOOLTIP,
     BITCOIN_MAINNET_TOOLTIP,
-    _clean_submisission,
+    QR_IMAGE_FILE_FILTER,
+    QR_MAX_STATIC_LEN,
+    DecodeQRImagesWorker,
     create_qr_icon,
+    get_qr_decode_problems,
     _msgbox_err,
     qr_dialog,
 )
-from PyQt5.QtCore import Qt
+from multiwallet_gui.tabs import SEND_HOVER, SEND_TITLE
+from PyQt5.QtCore import QEvent, QObject, QRunnable, QThreadPool, Qt, QTimer, pyqtSignal
+from PyQt5.QtGui import QFontDatabase
 from PyQt5.QtWidgets import (
+    QCheckBox,
+    QFileDialog,
     QHBoxLayout,
     QLabel,
     QPlainTextEdit,
@@ -21,34 +31,83 @@ from PyQt5.QtWidgets import (
 )
 
 
-from buidl.hd import HDPrivateKey
-from buidl.helper import hash256
-from buidl.psbt import PSBT
-from buidl.script import WitnessScript
-from buidl.op import OP_CODE_NAMES
+from multiwallet_core.action_profile import (
+    finish_action_profile,
+    profile_thread,
+    start_action_profile,
+)
+from multiwallet_core.helper import _clean_submisission
+from multiwallet_core.keycache import MasterKeyCache
+from multiwallet_core.derivation import get_default_workers
+from multiwallet_core.psbt import (
+    PSBTError,
+    _get_detailed_view,
+    _parse_psbt_source,
+    describe_psbt,
+    get_batch_summary,
+    get_psbt_source_digest,
+    sign_psbt,
+    sign_psbts,
+    split_psbts,
+    write_psbt_file,
+)
+from multiwallet_core.qr_decode import is_qr_image_path
+
+
+class SignPSBTSignals(QObject):
+    # QRunnable is not a QObject, so it needs a helper to emit signals
+    finished = pyqtSignal(object)
+    error = pyqtSignal(object)
 
 
-# TODO: is there a standard to use here?
-# Inspired by https://github.com/trezor/trezor-firmware/blob/e23bb10ec49710cc2b2b993db9c907d3c7becf2c/core/src/apps/wallet/sign_tx/multisig.py#L37
-def _calculate_msig_digest(quorum_m, root_xfp_hexes):
-    fingerprints_to_hash = "-".join(sorted(root_xfp_hexes))
-    return hash256(f"{quorum_m}:{fingerprints_to_hash}".encode()).hex()
+class SignPSBTWorker(QRunnable):
+    """
+    Sign off the GUI thread (sign_psbt or sign_psbts), large PSBTs can take minutes
+    without libsec.
 
+    Emits finished with the return value of sign_func, or error with a PSBTError.
+    """
 
-def _format_satoshis(sats, in_btc=False):
-    if in_btc:
-        btc = sats / 10 ** 8
-        return f"{btc:,.8f} BTC"
-    return f"{sats:,} sats"
+    def __init__(self, sign_func, **kwargs):
+        super().__init__()
+        self.sign_func = sign_func
+        self.kwargs = kwargs
+        self.signals = SignPSBTSignals()
+
+    def run(self):
+        # Emits after profile_thread() so this thread's profile is in by the time
+        # signing_done saves it
+        error = None
+        with profile_thread():
+            try:
+                result = self.sign_func(**self.kwargs)
+            except PSBTError as e:
+                error = e
+            except Exception as e:
+                error = PSBTError(
+                    main_text="Transaction Not Signed",
+                    informative_text="There was an error during signing.",
+                    detailed_text=f"For developers: {e}",
+                )
+        if error is None:
+            self.signals.finished.emit(result)
+        else:
+            self.signals.error.emit(error)
 
 
 class SendTab(QWidget):
-    TITLE = "Send"
-    HOVER = "Use your seed to cosign a transaction."
+    TITLE = SEND_TITLE
+    HOVER = SEND_HOVER
 
     # FIXME (add support and UX for this)
     UNITS = "sats"
 
+    # How long "Remember seed" keeps the master key in memory
+    KEY_CACHE_TTL_SECONDS = 5 * 60
+
+    # Signed PSBTs loaded from larger files are only saved, not shown (or QR'd)
+    MAX_SHOWN_PSBT_FILE_BYTES = 1_000_000
+
     def __init__(self):
         super().__init__()
 
@@ -61,7 +120,31 @@ class SendTab(QWidget):
             "What your online computer is asking you to sign, in base64 format."
         )
         self.psbtEdit = QPlainTextEdit("")
-        self.psbtEdit.setPlaceholderText("Something like this:\n\ncHNidP8BAH0CAAAAA...")
+        self.psbtEdit.setPlaceholderText(
+            "Something like this:\n\ncHNidP8BAH0CAAAAA...\n\n(paste several, one per line, to sign them all at once)"
+        )
+
+        self.psbtFileButton = QPushButton("Load PSBT File(s)...")
+        self.psbtFileButton.setToolTip(
+            "Load one or more .psbt files (binary or base64) to decode and sign together."
+            "<br/><br/>"
+            "You can also drag and drop them here."
+        )
+        self.psbtFileButton.clicked.connect(self.load_psbt_files)
+        # (text, names, paths) of the loaded files, they're read from disk on decode
+        self.loaded_psbts = ("", [], [])
+
+        self.psbtQRImageButton = QPushButton("Scan QR Image(s)...")
+        self.psbtQRImageButton.setToolTip(
+            "Decode PSBTs from pictures of QR codes, including every frame of an animated QR (in any order)."
+            "<br/><br/>"
+            "You can also drag and drop the images here."
+        )
+        self.psbtQRImageButton.clicked.connect(self.load_psbt_qr_images)
+        self.qr_worker = None
+        self.setAcceptDrops(True)
+        # Files dropped on the text box are loaded too, not pasted as file:// URLs
+        self.psbtEdit.viewport().installEventFilter(self)
 
         # Network toggle
         # https://www.tutorialspoint.com/pyqt/pyqt_qradiobutton_widget.htm
@@ -97,6 +180,9 @@ class SendTab(QWidget):
 
         self.psbtSubmitButton = QPushButton("Decode Transaction")
         self.psbtSubmitButton.clicked.connect(self.decode_psbt)
+        # ((PSBT digest, network), psbt_obj, psbt_desc) of the last decoded PSBT, so
+        # signing right after decoding doesn't parse and validate it again
+        self.decoded_psbt = (None, None, None)
 
         self.fullSeedLabel = QLabel("<b>Full 24-Word Seed Phrase</b>")
         self.fullSeedLabel.setToolTip(
@@ -107,6 +193,30 @@ class SendTab(QWidget):
             "zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo"
         )
 
+        # Opt-in: skip the (slow) seed phrase stretching when signing several PSBTs
+        self.key_cache = MasterKeyCache(ttl_seconds=self.KEY_CACHE_TTL_SECONDS)
+        self.rememberSeedCheckbox = QCheckBox(
+            f"Remember seed for {self.KEY_CACHE_TTL_SECONDS // 60} minutes"
+        )
+        self.rememberSeedCheckbox.setToolTip(
+            "Keep the key derived from your seed phrase in memory (never on disk) so that signing more transactions is faster."
+            "<br/><br/>"
+            "It is wiped after the time is up, when you click <i>Forget Seed</i>, or when you uncheck this."
+        )
+        self.rememberSeedCheckbox.toggled.connect(self.toggle_remember_seed)
+        self.forgetSeedButton = QPushButton("Forget Seed")
+        self.forgetSeedButton.setEnabled(False)
+        self.forgetSeedButton.clicked.connect(self.forget_seed)
+        self.keyCacheTimer = QTimer(self)
+        self.keyCacheTimer.setInterval(1000)
+        self.keyCacheTimer.timeout.connect(self.expire_seed)
+        # Set while signing in the background
+        self.signing_worker = None
+
+        key_cache_hbox = QHBoxLayout()
+        key_cache_hbox.addWidget(self.rememberSeedCheckbox)
+        key_cache_hbox.addWidget(self.forgetSeedButton)
+
         self.fullSeedSubmitButton = QPushButton("Sign Transaction")
         self.fullSeedSubmitButton.clicked.connect(self.sign_psbt)
 
@@ -137,9 +247,32 @@ class SendTab(QWidget):
         self.qrButton.setHidden(True)
         self.qrButton.clicked.connect(self.make_qr_popup)
 
+        self.animatedQrButton = QPushButton("Animated QR")
+        self.animatedQrButton.setToolTip(
+            "Shows the signed PSBT as a loop of smaller QR codes, for PSBTs too large (or too dense) to scan as one."
+            "<br/><br/>"
+            "Your online computer needs to read Multiwallet's animated QR format."
+        )
+        self.animatedQrButton.setHidden(True)
+        self.animatedQrButton.clicked.connect(self.make_animated_qr_popup)
+
+        self.saveSignedButton = QPushButton("Save Signed PSBT(s)...")
+        self.saveSignedButton.setToolTip(
+            "Write each signed PSBT to its own NAME.signed.psbt file in a folder."
+            "<br/><br/>"
+            "PSBTs loaded from files are saved in binary, pasted ones in base64."
+        )
+        self.saveSignedButton.setHidden(True)
+        self.saveSignedButton.clicked.connect(self.save_signed_psbts)
+        # [(name, signed PSBT object or base64), ...] and whether to save them in binary
+        self.signed_psbts_to_save = []
+        self.save_signed_as_binary = False
+
         for widget in (
             self.psbtLabel,
             self.psbtEdit,
+            self.psbtFileButton,
+            self.psbtQRImageButton,
             self.network_label,
         ):
             vbox.addWidget(widget)
@@ -150,12 +283,20 @@ class SendTab(QWidget):
             self.psbtSubmitButton,
             self.fullSeedLabel,
             self.fullSeedEdit,
+        ):
+            vbox.addWidget(widget)
+
+        vbox.addLayout(key_cache_hbox)
+
+        for widget in (
             self.fullSeedSubmitButton,
             self.psbtDecodedLabel,
             self.psbtDecodedROEdit,
             self.psbtSignedLabel,
             self.psbtSignedROEdit,
             self.qrButton,
+            self.animatedQrButton,
+            self.saveSignedButton,
         ):
             vbox.addWidget(widget)
 
@@ -167,14 +308,167 @@ class SendTab(QWidget):
     def sign_psbt(self):
         return self.process_psbt(sign_tx=True)
 
+    def toggle_remember_seed(self, checked):
+        if not checked:
+            self.forget_seed()
+
+    def forget_seed(self):
+        self.key_cache.forget()
+        self.keyCacheTimer.stop()
+        self.forgetSeedButton.setEnabled(False)
+
+    def expire_seed(self):
+        if not len(self.key_cache):  # len() expires stale entries
+            self.forget_seed()
+
+    def load_psbt_files(self):
+        filenames, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Load PSBT File(s)",
+            "",
+            "PSBT Files (*.psbt);;All Files (*)",
+        )
+        if filenames:
+            self.load_psbt_paths(filenames)
+
+    def load_psbt_paths(self, paths):
+        names = []
+        for path in paths:
+            name = os.path.basename(path)
+            names.append(name[: -len(".psbt")] if name.endswith(".psbt") else name)
+        # Just the paths, the files are parsed from disk when decoding
+        lines = [f"Loaded {len(paths)} PSBT file(s), clear this to paste instead:"]
+        self.psbtEdit.setPlainText("\n".join(lines + list(paths)))
+        self.loaded_psbts = (self.psbtEdit.toPlainText(), names, paths)
+
+    def load_psbt_qr_images(self):
+        filenames, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Scan QR Image(s)",
+            "",
+            QR_IMAGE_FILE_FILTER,
+        )
+        if filenames:
+            self.decode_psbt_qr_images(filenames)
+
+    def decode_psbt_qr_images(self, paths):
+        self.psbtQRImageButton.setEnabled(False)
+        self.psbtQRImageButton.setText("Scanning...")
+        self.qr_worker = DecodeQRImagesWorker(
+            paths=paths, workers=get_default_workers()
+        )
+        self.qr_worker.signals.finished.connect(self.show_psbt_qr_images)
+        self.qr_worker.signals.error.connect(self.psbt_qr_images_error)
+        QThreadPool.globalInstance().start(self.qr_worker)
+
+    def _psbt_qr_images_done(self):
+        self.qr_worker = None
+        self.psbtQRImageButton.setEnabled(self.signing_worker is None)
+        self.psbtQRImageButton.setText("Scan QR Image(s)...")
+
+    def psbt_qr_images_error(self, error):
+        self._psbt_qr_images_done()
+        return _msgbox_err(main_text="Could not scan QR images", informative_text=error)
+
+    def show_psbt_qr_images(self, result):
+        self._psbt_qr_images_done()
+        if not result["payloads"]:
+            return _msgbox_err(
+                main_text="No PSBT Found",
+                informative_text="No complete QR code was decoded from these images.",
+                detailed_text=get_qr_decode_problems(result),
+            )
+        # Scanning started before signing did
+        if self.signing_worker is not None:
+            return _msgbox_err(
+                main_text="Still Signing",
+                informative_text="Scan the QR images again once signing is done.",
+            )
+        # Straight into the PSBT parser, as if they had been pasted
+        self.psbtEdit.setPlainText("\n".join(result["payloads"]))
+        self.decode_psbt()
+
+    def _get_dropped_paths(self, event):
+        return [x.toLocalFile() for x in event.mimeData().urls() if x.isLocalFile()]
+
+    def dragEnterEvent(self, event):
+        if self.signing_worker is None and self._get_dropped_paths(event):
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        paths = self._get_dropped_paths(event)
+        if paths and self.signing_worker is None:
+            event.acceptProposedAction()
+            if all(is_qr_image_path(x) for x in paths):
+                self.decode_psbt_qr_images(paths)
+            else:
+                self.load_psbt_paths(paths)
+
+    def eventFilter(self, obj, event):
+        drag_events = (QEvent.DragEnter, QEvent.DragMove, QEvent.Drop)
+        if event.type() in drag_events and self._get_dropped_paths(event):
+            if event.type() == QEvent.Drop:
+                self.dropEvent(event)
+            elif self.signing_worker is None:
+                event.acceptProposedAction()
+            else:
+                event.ignore()
+            return True
+        return super().eventFilter(obj, event)
+
+    def save_signed_psbts(self):
+        dirname = QFileDialog.getExistingDirectory(self, "Save Signed PSBTs")
+        if not dirname:
+            return
+        try:
+            for name, signed in self.signed_psbts_to_save:
+                path = os.path.join(dirname, f"{name}.signed.psbt")
+                if self.save_signed_as_binary:
+                    write_psbt_file(signed, path)
+                    continue
+                if not isinstance(signed, str):
+                    signed = signed.serialize_base64()
+                with open(path, "w") as f:
+                    f.write(signed + "\n")
+        except Exception as e:
+            return _msgbox_err(
+                main_text="Could not save signed PSBTs",
+                informative_text=dirname,
+                detailed_text=str(e),
+            )
+
     def make_qr_popup(self):
+        qr_text = self.psbtSignedROEdit.toPlainText()
+        if len(qr_text) > QR_MAX_STATIC_LEN:
+            return _msgbox_err(
+                main_text="Signed PSBT too large for a single QR code",
+                informative_text="Use Animated QR, or save the signed PSBT to a file.",
+            )
+        return qr_dialog(
+            qwidget=self,
+            qr_text=qr_text,
+            window_title=self.psbtSignedLabel.text(),
+        )
+
+    def make_animated_qr_popup(self):
         return qr_dialog(
             qwidget=self,
             qr_text=self.psbtSignedROEdit.toPlainText(),
             window_title=self.psbtSignedLabel.text(),
+            animated=True,
         )
 
     def process_psbt(self, sign_tx=True):
+        # Profiled (signing included) if armed in the diagnostics panel
+        start_action_profile(action="send.process_psbt")
+        try:
+            self._process_psbt(sign_tx=sign_tx)
+        finally:
+            # Otherwise signing_done finishes it
+            if self.signing_worker is None:
+                finish_action_profile()
+
+    def _process_psbt(self, sign_tx=True):
         # Clear any previous submission in case of errors
         self.psbtDecodedLabel.setText("")
         self.psbtDecodedROEdit.clear()
@@ -187,6 +481,12 @@ class SendTab(QWidget):
         self.qrButton.setHidden(True)
         self.qrButton.setText("")
         # TODO: why setText and not hide?
+        self.animatedQrButton.setHidden(True)
+
+        self.saveSignedButton.setHidden(True)
+        self.signed_psbts_to_save = []
+        self.save_signed_as_binary = False
+        self.psbtDecodedROEdit.setFont(self.font())
 
         if self.infernetwork_button.isChecked():
             PARSE_WITH_TESTNET = None
@@ -198,294 +498,196 @@ class SendTab(QWidget):
             # This shouldn't be possible
             raise Exception("Invalid Network Selection: No Radio Button Chosen")
 
-        psbt_str = _clean_submisission(self.psbtEdit.toPlainText())
-
-        if not psbt_str:
-            return _msgbox_err(
-                main_text="No PSBT Supplied",
-                informative_text="Enter a PSBT to decode and/or sign.",
-            )
-
-        try:
-            psbt_obj = PSBT.parse_base64(b64=psbt_str, testnet=PARSE_WITH_TESTNET)
-        except Exception as e:
-            if type(e) is ValueError and str(e) == "Mainnet/Testnet mixing":
-                # TODO: less hackey way to catch this error?
-                return _msgbox_err(
-                    main_text="PSBT Network Error",
-                    informative_text="The network you selected doesn't match the PSBT.",
-                    detailed_text=str(e),
-                )
-            else:
-                return _msgbox_err(
-                    main_text="PSBT Parse Error",
-                    informative_text="Are you sure that's a valid PSBT?",
-                    detailed_text=str(e),
-                )
-
-        # Parse TX
-        self.TX_FEE_SATS = psbt_obj.tx_obj.fee()
-        self.IS_TESTNET = psbt_obj.tx_obj.testnet
-
-        # Validate multisig transaction
-        # TODO: abstract some of this into buidl library?
-        # Below is confusing because we perform both validation and coordinate signing.
-
-        # This tool only supports a TX with the following constraints:
-        #   We sign ALL inputs and they have the same multisig wallet (quorum + pubkeys)
-        #   There can only be 1 output (sweep transaction) or 2 outputs (spend + change).
-        #   If there is change, we validate it has the same multisig wallet as the inputs we sign.
-
-        # Gather TX info and validate
-        inputs_desc = []
-        for cnt, psbt_in in enumerate(psbt_obj.psbt_ins):
-            psbt_in.validate()  # redundant but explicit
-
-            if type(psbt_in.witness_script) != WitnessScript:
-                return _msgbox_err(
-                    main_text="Input #{cnt} does not contain a witness script",
-                    informative_text="This tool can only sign p2wsh transactions.",
-                )
-
-            # Determine quroum_m (and that it hasn't changed between inputs)
-            try:
-                quorum_m = OP_CODE_NAMES[psbt_in.witness_script.commands[0]].split(
-                    "OP_"
-                )[1]
-            except Exception:
+        loaded_text, loaded_names, loaded_paths = self.loaded_psbts
+        if loaded_paths and loaded_text == self.psbtEdit.toPlainText():
+            psbt_srcs, names = [Path(x) for x in loaded_paths], loaded_names
+        else:
+            psbt_str = _clean_submisission(self.psbtEdit.toPlainText())
+            if not psbt_str:
                 return _msgbox_err(
-                    main_text="Non-p2wsh Input",
-                    informative_text=f"Witness script for input #{cnt} is not p2wsh",
-                    detailed_text=f"PSBT Input:\n {psbt_in}",
+                    main_text="No PSBT Supplied",
+                    informative_text="Enter a PSBT to decode and/or sign.",
                 )
-
-            # for calculating msig fingerprint
-            root_xfp_hexes = []
-            for _, details in psbt_in.named_pubs.items():
-                root_xfp_hexes.append(details.root_fingerprint.hex())
-
-            input_desc = {
-                "quorum": f"{quorum_m}-of-{len(root_xfp_hexes)}",
-                "root_xfp_hexes": root_xfp_hexes,
-                "prev_txhash": psbt_in.tx_in.prev_tx.hex(),
-                "prev_idx": psbt_in.tx_in.prev_index,
-                "n_sequence": psbt_in.tx_in.sequence,
-                "sats": psbt_in.tx_in.value(),
-                # TODO: would be possible for transaction to be p2sh-wrapped p2wsh (can we tell?)
-                "addr": psbt_in.witness_script.address(testnet=self.IS_TESTNET),
-                # "p2sh_addr": psbt_in.witness_script.p2sh_address(testnet=self.IS_TESTNET),
-                "witness_script": str(psbt_in.witness_script),
-                "msig_digest": _calculate_msig_digest(
-                    quorum_m=quorum_m, root_xfp_hexes=root_xfp_hexes
-                ),
-            }
-            inputs_desc.append(input_desc)
-
-        if not all(
-            x["msig_digest"] == inputs_desc[0]["msig_digest"] for x in inputs_desc
-        ):
-            return _msgbox_err(
-                main_text="Inputs Contain Conflicting Wallet Quorums",
-                informative_text="This transaction is not inherently bad, but transactions of this type are only possible for experts. Please construct 1 or more transactions with one input instead.",
-                detailed_text=f"For developers: {inputs_desc}",
+            psbt_srcs = split_psbts(psbt_str)
+            names = [f"psbt-{x + 1}" for x in range(len(psbt_srcs))]
+        # Signed PSBTs are saved in the format they came in
+        self.save_signed_as_binary = isinstance(psbt_srcs[0], Path)
+
+        if len(psbt_srcs) > 1:
+            return self.process_psbt_batch(
+                psbt_srcs=psbt_srcs,
+                names=names,
+                testnet=PARSE_WITH_TESTNET,
+                sign_tx=sign_tx,
             )
 
-        TOTAL_INPUT_SATS = sum([x["sats"] for x in inputs_desc])
-
-        # This too only supports TXs with 1-2 outputs (sweep TX OR spend+change TX):
-        if len(psbt_obj.psbt_outs) > 2:
-            return _msgbox_err(
-                main_text="Too Many Outputs",
-                informative_text=f"Multiwallet does not support batching, and your transaction has {len(psbt_obj.psbt_outs)} outputs.",
-                detailed_text="Please construct a transaction with <= 2 outputs.",
-            )
-
-        spend_addr, output_spend_sats = "", 0
-        outputs_desc = []
-        for cnt, psbt_out in enumerate(psbt_obj.psbt_outs):
-            psbt_out.validate()  # redundant but explicit
-
-            output_desc = {
-                "sats": psbt_out.tx_out.amount,
-                "addr_type": psbt_out.tx_out.script_pubkey.__class__.__name__.rstrip(
-                    "ScriptPubKey"
-                ),
-            }
-
-            if psbt_out.witness_script:
-                output_desc["addr"] = psbt_out.witness_script.address(
-                    testnet=self.IS_TESTNET
-                )
+        try:
+            cache_key = (get_psbt_source_digest(psbt_srcs[0]), PARSE_WITH_TESTNET)
+            if self.decoded_psbt[0] == cache_key:
+                _, psbt_obj, psbt_desc = self.decoded_psbt
             else:
-                output_desc["addr"] = psbt_out.tx_out.script_pubkey.address(
-                    testnet=self.IS_TESTNET
-                )
-
-            if psbt_out.named_pubs:
-                # Validate below that this is correct and abort otherwise
-                output_desc["is_change"] = True
-
-                root_xfp_hexes = []  # for calculating msig fingerprint
-                for _, details in psbt_out.named_pubs.items():
-                    root_xfp_hexes.append(details.root_fingerprint.hex())
-
-                # Determine quroum_m (and that it hasn't changed between inputs)
-                try:
-                    quorum_m = OP_CODE_NAMES[psbt_out.witness_script.commands[0]].split(
-                        "OP_"
-                    )[1]
-                except Exception:
-                    return _msgbox_err(
-                        main_text="Non-p2wsh Change Output",
-                        informative_text="This transaction may be trying to trick you into sending change to a third party.",
-                        detailed_text=f"Witness script for output #{cnt} is not p2wsh: {psbt_out}",
-                    )
-
-                output_msig_digest = _calculate_msig_digest(
-                    quorum_m=quorum_m, root_xfp_hexes=root_xfp_hexes
+                psbt_obj = _parse_psbt_source(
+                    psbt_src=psbt_srcs[0], testnet=PARSE_WITH_TESTNET
                 )
-                if output_msig_digest != inputs_desc[0]["msig_digest"]:
-                    return _msgbox_err(
-                        main_text="Invalid Change Detected",
-                        informative_text=f"Output #{cnt} is claiming to be change but has different multisig wallet(s)! Do a sweep transaction (1-output) if you want this wallet to cosign.",
-                        detailed_text=f"For developers: {outputs_desc}",
-                    )
-            else:
-                output_desc["is_change"] = False
-                spend_addr = output_desc["addr"]
-                output_spend_sats = output_desc["sats"]
-
-            outputs_desc.append(output_desc)
-
-        # Sanity check
-        if len(outputs_desc) != len(psbt_obj.psbt_outs):
+                psbt_desc = describe_psbt(psbt_obj=psbt_obj, units=self.UNITS)
+                self.decoded_psbt = (cache_key, psbt_obj, psbt_desc)
+        except PSBTError as e:
             return _msgbox_err(
-                main_text="PSBT Parse Error",
-                informative_text=f"{len(outputs_desc)} outputs in TX summary doesn't match {len(psbt_obj.psbt_outs)} outputs in PSBT.",
+                main_text=e.main_text,
+                informative_text=e.informative_text,
+                detailed_text=e.detailed_text,
             )
 
-        # Confirm if 2 outputs we only have 1 change and 1 spend (can't be 2 changes or 2 spends)
-        if len(outputs_desc) == 2:
-            if all(
-                x["is_change"] == outputs_desc[0]["is_change"] for x in outputs_desc
-            ):
-                return _msgbox_err(
-                    main_text="Change-Only Transaction with 2 Outputs",
-                    informative_text="Transactions with 2 outputs that are BOTH change are not allowed, as only experts can properly validate them. Please construct a transaction with fewer outputs.",
-                    detailed_text=f"For developers: {outputs_desc}",
-                )
+        self.TX_FEE_SATS = psbt_desc["tx_fee_sats"]
+        self.IS_TESTNET = psbt_desc["is_testnet"]
 
-        TX_SUMMARY = " ".join(
-            [
-                inputs_desc[0]["quorum"],
-                "PSBT sends",
-                _format_satoshis(output_spend_sats, in_btc=self.UNITS == "btc"),
-                "to",
-                spend_addr,
-                "with a fee of",
-                _format_satoshis(self.TX_FEE_SATS, in_btc=self.UNITS == "btc"),
-                f"({round(self.TX_FEE_SATS / TOTAL_INPUT_SATS * 100, 2)}% of spend)",
-            ]
-        )
         self.psbtDecodedLabel.setText(
             f"<b>Decoded Transaction Summary</b> - {'Testnet' if self.IS_TESTNET else 'Mainnet'}"
         )
         self.psbtDecodedROEdit.setHidden(False)
-        self.psbtDecodedROEdit.appendPlainText(TX_SUMMARY)
+        self.psbtDecodedROEdit.appendPlainText(psbt_desc["tx_summary"])
 
         # TODO: surface this to user somehow
-        to_print = []
-        to_print.append("DETAILED VIEW")
-        to_print.append(f"TXID: {psbt_obj.tx_obj.id()}")
-        to_print.append(
-            f"Network: {'Testnet' if psbt_obj.tx_obj.testnet else 'Mainnet'}"
+        print(
+            _get_detailed_view(
+                psbt_obj=psbt_obj,
+                inputs_desc=psbt_desc["inputs_desc"],
+                outputs_desc=psbt_desc["outputs_desc"],
+            )
         )
-        to_print.append("-" * 80)
-        to_print.append(f"{len(inputs_desc)} Input(s):")
-        for cnt, input_desc in enumerate(inputs_desc):
-            to_print.append(f"  input #{cnt}")
-            for k in input_desc:
-                to_print.append(f"    {k}: {input_desc[k]}")
-        to_print.append("-" * 80)
-        to_print.append(f"{len(outputs_desc)} Output(s):")
-        for cnt, output_desc in enumerate(outputs_desc):
-            to_print.append(f"  output #{cnt}")
-            for k in output_desc:
-                to_print.append(f"    {k}: {output_desc[k]}")
-        print("\n".join(to_print))
 
         seed_phrase = _clean_submisission(self.fullSeedEdit.toPlainText())
 
         if not sign_tx:
             return
 
-        if not seed_phrase:
-            return _msgbox_err(
-                main_text="No Seed Phrase Supplied",
-                informative_text="Cannot sign transaction without seed phrase",
-            )
+        # Signing adds signatures to psbt_obj, so it can't be reused after this
+        self.decoded_psbt = (None, None, None)
+        self._start_signing(
+            sign_func=sign_psbt,
+            on_finished=lambda psbt_obj: self.show_signed_psbt(
+                psbt_obj=psbt_obj, name=names[0], psbt_src=psbt_srcs[0]
+            ),
+            psbt_obj=psbt_obj,
+            inputs_desc=psbt_desc["inputs_desc"],
+            seed_phrase=seed_phrase,
+        )
 
-        seed_phrase_num = len(seed_phrase.split())
-        if seed_phrase_num not in (12, 15, 18, 21, 24):
-            return _msgbox_err(
-                main_text="Enter 24 word seed-phrase",
-                informative_text=f"You entered {seed_phrase_num} words",
-            )
+    def show_signed_psbt(self, psbt_obj, name, psbt_src):
+        if isinstance(psbt_src, Path):
+            self.signed_psbts_to_save = [(name, psbt_obj)]
+            self.saveSignedButton.setHidden(False)
+            if os.path.getsize(psbt_src) > self.MAX_SHOWN_PSBT_FILE_BYTES:
+                return self.psbtSignedLabel.setText(
+                    "<b>Signed PSBT to Broadcast</b> - too large to show, save it to a file"
+                )
 
-        try:
-            hd_priv = HDPrivateKey.from_mnemonic(seed_phrase, testnet=self.IS_TESTNET)
-        except Exception as e:
-            return _msgbox_err(
-                main_text="Invalid BIP39 Seed Phrase",
-                informative_text="Transaction NOT signed",
-                detailed_text=str(e),
+        self.psbtSignedLabel.setText("<b>Signed PSBT to Broadcast</b>")
+        self.psbtSignedROEdit.setHidden(False)
+        self.psbtSignedROEdit.appendPlainText(psbt_obj.serialize_base64())
+
+        self.qrButton.setHidden(False)
+        self.qrButton.setText("QR")
+        self.qrButton.setIcon(create_qr_icon())
+        self.animatedQrButton.setHidden(False)
+
+    def _start_signing(self, sign_func, on_finished, **kwargs):
+        use_key_cache = self.rememberSeedCheckbox.isChecked()
+        self.signing_worker = SignPSBTWorker(
+            sign_func=sign_func,
+            key_cache=self.key_cache if use_key_cache else None,
+            workers=get_default_workers(),
+            **kwargs,
+        )
+        # signing_done first, it resets the "Signing..." label
+        self.signing_worker.signals.finished.connect(self.signing_done)
+        self.signing_worker.signals.error.connect(self.signing_done)
+        self.signing_worker.signals.finished.connect(on_finished)
+        self.signing_worker.signals.error.connect(self.signing_error)
+
+        self.psbtSignedLabel.setText("<b>Signing...</b>")
+        # Nothing may replace the PSBT being signed (drops are ignored too)
+        for button in (
+            self.psbtFileButton,
+            self.psbtSubmitButton,
+            self.fullSeedSubmitButton,
+            self.psbtQRImageButton,
+        ):
+            button.setEnabled(False)
+        QThreadPool.globalInstance().start(self.signing_worker)
+
+    def signing_error(self, e):
+        return _msgbox_err(
+            main_text=e.main_text,
+            informative_text=e.informative_text,
+            detailed_text=e.detailed_text,
+        )
+
+    def signing_done(self, _):
+        self.signing_worker = None
+        self.psbtSignedLabel.setText("")
+        for button in (
+            self.psbtFileButton,
+            self.psbtSubmitButton,
+            self.fullSeedSubmitButton,
+        ):
+            button.setEnabled(True)
+        self.psbtQRImageButton.setEnabled(self.qr_worker is None)
+        if self.rememberSeedCheckbox.isChecked() and len(self.key_cache):
+            self.forgetSeedButton.setEnabled(True)
+            self.keyCacheTimer.start()
+        finish_action_profile()
+
+    def process_psbt_batch(self, psbt_srcs, names, testnet, sign_tx):
+        if sign_tx:
+            return self._start_signing(
+                sign_func=sign_psbts,
+                on_finished=lambda results: self.show_batch_results(
+                    names=names, results=results, sign_tx=True
+                ),
+                psbt_strs=psbt_srcs,
+                seed_phrase=_clean_submisission(self.fullSeedEdit.toPlainText()),
+                testnet=testnet,
+                units=self.UNITS,
             )
 
-        # Derive list of child private keys we'll use to sign the TX
-        root_paths = set()
-        for cnt, psbt_in in enumerate(psbt_obj.psbt_ins):
-            # Redundant safety check:
-            bad_txhash = inputs_desc[cnt]["prev_txhash"] != psbt_in.tx_in.prev_tx.hex()
-            bad_idx = inputs_desc[cnt]["prev_idx"] != psbt_in.tx_in.prev_index
-            if bad_txhash or bad_idx:
-                return _msgbox_err(
-                    main_text="PSBT Parse Error",
-                    informative_text="Transaction NOT signed",
-                    detailed_text=f"For developers: Input #{cnt} prev_txhash or prev_idx mismatch: \n{PSBT.serialize_base64()}",
+        results = []
+        for psbt_src in psbt_srcs:
+            result = {"psbt_desc": None, "signed_b64": None, "error": None}
+            try:
+                result["psbt_desc"] = describe_psbt(
+                    psbt_obj=_parse_psbt_source(psbt_src=psbt_src, testnet=testnet),
+                    units=self.UNITS,
                 )
+            except PSBTError as e:
+                result["error"] = e
+            results.append(result)
+        self.show_batch_results(names=names, results=results, sign_tx=False)
 
-            for _, details in psbt_in.named_pubs.items():
-                if details.root_fingerprint.hex() == hd_priv.fingerprint().hex():
-                    root_paths.add(details.root_path)
-
-        if not root_paths:
-            return _msgbox_err(
-                main_text="Wrong Seed",
-                informative_text="Seed supplied does not correspond to transaction input(s). Does it belong to another wallet?",
-            )
+    def show_batch_results(self, names, results, sign_tx):
+        num_ok = len([x for x in results if x["error"] is None])
+        self.psbtDecodedLabel.setText(
+            f"<b>Batch Summary</b> - {num_ok} of {len(results)} PSBTs {'signed' if sign_tx else 'valid'}"
+        )
+        self.psbtDecodedROEdit.setFont(
+            QFontDatabase.systemFont(QFontDatabase.FixedFont)
+        )
+        self.psbtDecodedROEdit.setHidden(False)
+        self.psbtDecodedROEdit.appendPlainText(
+            get_batch_summary(names=names, results=results)
+        )
 
-        private_keys = [
-            hd_priv.traverse(root_path).private_key for root_path in root_paths
+        self.signed_psbts_to_save = [
+            (name, x["signed_b64"])
+            for name, x in zip(names, results)
+            if x["signed_b64"]
         ]
+        if not self.signed_psbts_to_save:
+            return
 
-        try:
-            if psbt_obj.sign_with_private_keys(private_keys) is True:
-                self.psbtSignedLabel.setText("<b>Signed PSBT to Broadcast</b>")
-                self.psbtSignedROEdit.setHidden(False)
-                self.psbtSignedROEdit.appendPlainText(psbt_obj.serialize_base64())
-
-                self.qrButton.setHidden(False)
-                self.qrButton.setText("QR")
-                self.qrButton.setIcon(create_qr_icon())
-            else:
-                return _msgbox_err(
-                    main_text="Transaction Not Signed",
-                    informative_text="Couldn't find private key to sign with",
-                    detailed_text="This should've been checked earlier and should not be possible!",
-                )
-        except Exception as e:
-            return _msgbox_err(
-                main_text="Transaction Not Signed",
-                informative_text="There was an error during signing.",
-                detailed_text=f"For developers: {e}",
-            )
+        self.psbtSignedLabel.setText("<b>Signed PSBTs to Broadcast</b>")
+        self.psbtSignedROEdit.setHidden(False)
+        self.psbtSignedROEdit.appendPlainText(
+            "\n".join(x[1] for x in self.signed_psbts_to_save)
+        )
+        self.saveSignedButton.setHidden(False)
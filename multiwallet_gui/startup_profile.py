@@ -0,0 +1,196 @@
+#! /usr/bin/env bash
+
+# Startup profiling, enabled with --profile-startup[=PATH] or
+# MULTIWALLET_PROFILE_STARTUP=1 (or =PATH). Times every module import and each
+# startup phase (QApplication, building each tab, first show) and writes them to
+# a JSON report once the main window first paints. Tabs are built when first
+# selected, so the report is written again each time one is (with its phases,
+# imports are only timed until the first report).
+#
+# multiwallet_gui/__init__.py starts it, so it sees every import after that. It
+# keeps its own imports to a minimum (json is only imported for the report) so it
+# doesn't skew the numbers it's measuring.
+
+import _thread
+import builtins
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+PROFILE_STARTUP_FLAG = "--profile-startup"
+PROFILE_STARTUP_ENV_VAR = "MULTIWALLET_PROFILE_STARTUP"
+DEFAULT_REPORT_PATH = os.path.join(
+    os.path.expanduser("~"), ".multiwallet", "startup-profile.json"
+)
+# From show() until the main window's first paint
+FIRST_SHOW_PHASE = "first show"
+
+
+def _get_report_path(argv, environ):
+    # Returns None if startup profiling isn't enabled
+    for arg in argv[1:]:
+        if arg == PROFILE_STARTUP_FLAG:
+            return DEFAULT_REPORT_PATH
+        if arg.startswith(PROFILE_STARTUP_FLAG + "="):
+            return arg.split("=", 1)[1] or DEFAULT_REPORT_PATH
+    value = environ.get(PROFILE_STARTUP_ENV_VAR, "")
+    if value.lower() in ("", "0", "false", "no"):
+        return None
+    if value.lower() in ("1", "true", "yes"):
+        return DEFAULT_REPORT_PATH
+    return value
+
+
+class _ImportTimer:
+    """
+    Replaces builtins.__import__ to time each module's first import, with self
+    and cumulative times like `python -X importtime`. A statement like
+    `import a.b` is counted under a.b, including a if that was new too.
+
+    Only imports on the thread that installed it are timed.
+    """
+
+    def __init__(self):
+        self.original_import = builtins.__import__
+        self.thread_id = _thread.get_ident()
+        # Time spent in nested imports, for each import in progress
+        self.stack = []
+        # {module: [self_s, cumulative_s]}
+        self.imports = {}
+
+    def install(self):
+        builtins.__import__ = self
+
+    def uninstall(self):
+        if builtins.__import__ is self:
+            builtins.__import__ = self.original_import
+
+    def __call__(self, name, globals=None, locals=None, fromlist=(), level=0):
+        full_name = name
+        if level:
+            package = (globals or {}).get("__package__") or ""
+            parts = package.split(".")[: len(package.split(".")) - level + 1]
+            full_name = ".".join(x for x in parts + [name] if x)
+        if full_name in sys.modules or _thread.get_ident() != self.thread_id:
+            return self.original_import(name, globals, locals, fromlist, level)
+
+        self.stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += elapsed
+            entry = self.imports.setdefault(full_name, [0.0, 0.0])
+            entry[0] += elapsed - nested
+            entry[1] += elapsed
+
+
+class _StartupProfile:
+    def __init__(self, report_path):
+        self.report_path = report_path
+        self.started_at = time.perf_counter()
+        self.import_timer = _ImportTimer()
+        # [(name, started_at, ended_at), ...]
+        self.phases = []
+
+    def _ms_since_start(self, perf_counter):
+        return round((perf_counter - self.started_at) * 1000, 3)
+
+    def get_report(self):
+        imports = [
+            {
+                "module": module,
+                "self_ms": round(self_s * 1000, 3),
+                "cumulative_ms": round(cumulative_s * 1000, 3),
+            }
+            for module, (self_s, cumulative_s) in self.import_timer.imports.items()
+        ]
+        imports.sort(key=lambda x: x["cumulative_ms"], reverse=True)
+        first_paint_ms = None
+        for name, _, ended_at in self.phases:
+            if name == FIRST_SHOW_PHASE:
+                first_paint_ms = self._ms_since_start(ended_at)
+        return {
+            "first_paint_ms": first_paint_ms,
+            "imports_ms": round(sum(x["self_ms"] for x in imports), 3),
+            "phases": [
+                {
+                    "name": name,
+                    "start_ms": self._ms_since_start(started_at),
+                    "duration_ms": round((ended_at - started_at) * 1000, 3),
+                }
+                for name, started_at, ended_at in self.phases
+            ],
+            "imports": imports,
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "frozen": bool(getattr(sys, "frozen", False)),
+        }
+
+
+_startup_profile = None
+
+
+def start_startup_profile(report_path):
+    global _startup_profile
+    if _startup_profile is None:
+        _startup_profile = _StartupProfile(report_path=report_path)
+        _startup_profile.import_timer.install()
+
+
+def _maybe_start_startup_profile():
+    report_path = _get_report_path(argv=sys.argv, environ=os.environ)
+    if report_path:
+        start_startup_profile(report_path)
+
+
+def is_profiling_startup():
+    return _startup_profile is not None
+
+
+def add_startup_phase(name, started_at, ended_at=None):
+    # started_at/ended_at are time.perf_counter() values
+    if is_profiling_startup():
+        if ended_at is None:
+            ended_at = time.perf_counter()
+        _startup_profile.phases.append((name, started_at, ended_at))
+
+
+@contextmanager
+def startup_phase(name):
+    if not is_profiling_startup():
+        yield
+        return
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_startup_phase(name, started_at)
+
+
+def write_startup_profile():
+    """
+    Writes the JSON report, returns its path (or None if startup isn't being
+    profiled or it couldn't be written).
+    """
+    if not is_profiling_startup():
+        return None
+    # Startup is over, stop wrapping every later import
+    _startup_profile.import_timer.uninstall()
+    import json
+
+    report = _startup_profile.get_report()
+    report_path = _startup_profile.report_path
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+    except OSError as e:
+        print(f"Could not write startup profile: {e}", file=sys.stderr)
+        return None
+    print(f"Startup profile written to {report_path}", file=sys.stderr)
+    return report_path
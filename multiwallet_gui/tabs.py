@@ -0,0 +1,76 @@
+#! /usr/bin/env bash
+
+# What the main window needs to list its tabs without building them. Most tab
+# modules pull in buidl, qrcode and Pillow, so MultiwalletApp only imports one
+# (via get_class) when its tab is first selected. Keep this module light.
+
+ABOUT_TITLE = "About"
+ABOUT_HOVER = "Info about Multiwallet GUI"
+
+SEEDPICKER_TITLE = "Seedpicker"
+SEEDPICKER_HOVER = (
+    "<b>Protect yourself against a bad random number generator.</b> "
+    "Pick 23 words of your seed phrase and Seedpicker will calculate the last word."
+)
+
+RECEIVE_TITLE = "Receive"
+RECEIVE_HOVER = "Verify your bitcoin addresses belong to you qourum."
+
+SEND_TITLE = "Send"
+SEND_HOVER = "Use your seed to cosign a transaction."
+
+
+# Plain import statements (not importlib) so PyInstaller still finds the modules
+
+
+def _get_about_tab_class():
+    from multiwallet_gui.about import AboutTab
+
+    return AboutTab
+
+
+def _get_seedpicker_tab_class():
+    from multiwallet_gui.seedpicker import SeedpickerTab
+
+    return SeedpickerTab
+
+
+def _get_receive_tab_class():
+    from multiwallet_gui.receive import ReceiveTab
+
+    return ReceiveTab
+
+
+def _get_send_tab_class():
+    from multiwallet_gui.send import SendTab
+
+    return SendTab
+
+
+# In display order, attr is the MultiwalletApp attribute the built tab is saved to
+TABS = (
+    {
+        "attr": "about_tab",
+        "title": ABOUT_TITLE,
+        "hover": ABOUT_HOVER,
+        "get_class": _get_about_tab_class,
+    },
+    {
+        "attr": "seedpicker_tab",
+        "title": SEEDPICKER_TITLE,
+        "hover": SEEDPICKER_HOVER,
+        "get_class": _get_seedpicker_tab_class,
+    },
+    {
+        "attr": "receive_tab",
+        "title": RECEIVE_TITLE,
+        "hover": RECEIVE_HOVER,
+        "get_class": _get_receive_tab_class,
+    },
+    {
+        "attr": "send_tab",
+        "title": SEND_TITLE,
+        "hover": SEND_HOVER,
+        "get_class": _get_send_tab_class,
+    },
+)
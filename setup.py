@@ -19,7 +19,10 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/mflaxman/multiwallet",
     entry_points={
-        "console_scripts": ["multiwallet_gui=multiwallet_gui.app:main"],
+        "console_scripts": [
+            "multiwallet=multiwallet_core.cli:main",
+            "multiwallet_gui=multiwallet_gui.app:main",
+        ],
     },
     packages=find_packages(),
     classifiers=[